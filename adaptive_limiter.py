@@ -0,0 +1,224 @@
+"""
+Adaptive Concurrency Limiter
+
+A concurrency limiter for the profile and photo fetchers whose limit adapts to
+the server with an AIMD (additive increase, multiplicative decrease) rule:
+
+- After every window of completed requests, if the error rate is below the
+  threshold and the window's p95 latency is within `latency_tolerance` times the
+  best p95 seen so far, the limit grows by one.
+- A 429 or 5xx response or a timeout halves the limit immediately (at most once
+  per limit's worth of completions, so one burst of failures counts once), as
+  does a window whose error rate is above the threshold.
+
+The limit always stays between the floor and the ceiling. With floor == ceiling
+the limiter behaves like a plain asyncio.Semaphore. Every change of the limit is
+logged.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class _Outcome:
+    """
+    Result of one request, filled in by the caller inside AdaptiveLimiter.request().
+    """
+
+    def __init__(self):
+        self.status = None
+
+
+class _RequestSlot:
+    def __init__(self, limiter):
+        self._limiter = limiter
+        self._outcome = _Outcome()
+        self._start = None
+
+    async def __aenter__(self):
+        await self._limiter.acquire()
+        self._start = time.monotonic()
+        return self._outcome
+
+    async def __aexit__(self, exc_type, exc, tb):
+        latency = time.monotonic() - self._start
+        self._limiter.release()
+        if exc_type is not asyncio.CancelledError:
+            # A cancelled request (e.g. the losing half of a hedged pair) says nothing about the server
+            self._limiter.observe(latency, self._outcome.status, exc)
+        return False
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limiter.
+
+    Args:
+        initial (int): Starting limit.
+        floor (int): Lowest allowed limit.
+        ceiling (int): Highest allowed limit.
+        name (str): Name used in log messages.
+        window (int): Number of completed requests per evaluation window.
+        error_threshold (float): Highest healthy share of failed requests per window.
+        latency_tolerance (float): Highest healthy ratio of window p95 to the best p95 seen.
+    """
+
+    def __init__(self, initial, floor=1, ceiling=None, name='requests', window=20,
+                 error_threshold=0.05, latency_tolerance=1.5):
+        self.floor = max(1, floor)
+        self.ceiling = max(self.floor, ceiling if ceiling is not None else initial)
+        self.limit = min(max(initial, self.floor), self.ceiling)
+        self.name = name
+        self.window = window
+        self.error_threshold = error_threshold
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self._waiters = deque()
+        self._latencies = []
+        self._errors = 0
+        self._best_p95 = None
+        self._since_decrease = 0
+
+    @property
+    def adaptive(self):
+        """
+        True if the limit can change.
+        """
+        return self.floor != self.ceiling
+
+    def request(self):
+        """
+        Return an async context manager that holds a slot for one request.
+
+        It yields an outcome object whose `status` attribute should be set to the
+        HTTP status; exceptions raised inside count as failed requests.
+        """
+        return _RequestSlot(self)
+
+    async def acquire(self):
+        """
+        Wait until fewer than `limit` requests are in flight and take a slot.
+        """
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # _wake() takes the slot on our behalf before resolving the future
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self):
+        """
+        Give back a slot taken with acquire().
+        """
+        self.in_flight -= 1
+        self._wake()
+
+    def observe(self, latency, status=None, error=None):
+        """
+        Record the outcome of one request and adapt the limit.
+
+        Args:
+            latency (float): Seconds the request took.
+            status (int, optional): HTTP status code.
+            error (BaseException, optional): Exception the request failed with.
+        """
+        if not self.adaptive:
+            return
+        self._since_decrease += 1
+        throttled = (
+            status is not None and (status == 429 or status >= 500)
+        ) or isinstance(error, asyncio.TimeoutError)
+        if throttled or error is not None:
+            self._errors += 1
+        else:
+            self._latencies.append(latency)
+
+        if throttled and self._since_decrease >= self.limit:
+            self._decrease(f"status {status}" if status is not None else "timeout")
+
+        if len(self._latencies) + self._errors >= self.window:
+            self._evaluate_window()
+
+    def _evaluate_window(self):
+        total = len(self._latencies) + self._errors
+        error_rate = self._errors / total
+        p95 = None
+        if self._latencies:
+            latencies = sorted(self._latencies)
+            p95 = latencies[int(0.95 * (len(latencies) - 1))]
+            if self._best_p95 is None or p95 < self._best_p95:
+                self._best_p95 = p95
+        self._latencies = []
+        self._errors = 0
+
+        if error_rate > self.error_threshold:
+            if self._since_decrease >= self.limit:
+                self._decrease(f"error rate {error_rate:.0%}")
+        elif p95 is not None and p95 <= self._best_p95 * self.latency_tolerance:
+            self._set_limit(self.limit + 1, f"p95 {p95 * 1000:.0f} ms, error rate {error_rate:.0%}")
+
+    def _decrease(self, reason):
+        # Start a fresh window so the failures behind this decrease are not counted again
+        self._since_decrease = 0
+        self._latencies = []
+        self._errors = 0
+        self._set_limit(self.limit // 2, reason)
+
+    def _set_limit(self, limit, reason):
+        limit = min(max(limit, self.floor), self.ceiling)
+        if limit == self.limit:
+            return
+        logger.info(f"{self.name} concurrency limit {self.limit} -> {limit} ({reason})")
+        self.limit = limit
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+
+def add_limiter_arguments(parser):
+    """
+    Add the --adaptive, --min-concurrency and --max-concurrency options to an argument parser.
+    """
+    parser.add_argument(
+        '--adaptive',
+        action='store_true',
+        help='Adapt the number of simultaneous requests to latency and errors, starting from -n'
+    )
+    parser.add_argument(
+        '--min-concurrency',
+        type=int,
+        default=1,
+        help='Lowest number of simultaneous requests in --adaptive mode (default: 1)'
+    )
+    parser.add_argument(
+        '--max-concurrency',
+        type=int,
+        help='Highest number of simultaneous requests in --adaptive mode (default: 4 x -n)'
+    )
+
+
+def limiter_from_args(args, name):
+    """
+    Create the limiter configured by -n/--concurrency and the add_limiter_arguments() options.
+    """
+    if not args.adaptive:
+        return AdaptiveLimiter(args.concurrency, args.concurrency, args.concurrency, name)
+    ceiling = args.max_concurrency if args.max_concurrency is not None else args.concurrency * 4
+    return AdaptiveLimiter(args.concurrency, args.min_concurrency, ceiling, name)
@@ -3,13 +3,40 @@ Adoption Photo Downloader
 
 This script reads a JSON file of extracted adoption profiles (generated by
 adoption_profiles_scraper.py) and downloads all listed photo URLs for each pet.
+NDJSON files (one profile per line) are read line by line.
 Each pet’s photos are saved into a subdirectory named after its `pet_id`. The
 downloading is done asynchronously using aiohttp + asyncio to speed up network I/O.
 
 Features:
-- Concurrent downloads throttled by a semaphore (configurable concurrency).
+- Concurrent downloads from a fixed pool of workers fed from a bounded queue
+  (configurable concurrency), so memory does not grow with the number of photos.
 - Creates a “photos” directory adjacent to the JSON file, with subfolders per pet_id.
 - Logs successes, warnings, and errors to both console and a rotating log file.
+- Streams each photo to a temporary file in chunks (off the event loop) and
+  renames it into place when complete, so memory stays flat at high concurrency.
+- Resumable: completed files are recorded in photos/manifest.jsonl (URL, size,
+  ETag, sha256) and skipped on the next run, or revalidated with --revalidate.
+- Retries connection errors, timeouts and 429/5xx responses with exponential
+  backoff and jitter (see retry_policy.py). Photos that still fail are written to
+  failed_photos.ndjson next to the JSON, which this script accepts as input.
+- Optional per-host request rate limit (--rate, --burst, see rate_limiter.py).
+- Connect/read/total timeouts on every request (see timeouts.py), and optional
+  hedging (--hedge) of downloads slower than the running p95 (see hedging.py).
+- Keep-alive connection pool, DNS caching and optional HTTP/2 (see http_client.py).
+- Request, latency, byte and queue metrics (see metrics.py).
+- Optional adaptive concurrency (--adaptive): the number of simultaneous downloads
+  grows while latency and error rate stay healthy and halves on 429/5xx/timeouts.
+- Optional content-addressed photo store (--store, see photo_store.py): each
+  distinct photo is kept once and linked into the per-pet directories.
+- Two different URLs with the same filename for one pet are saved under
+  different names instead of overwriting each other.
+- A photo URL shared by several pets (after normalization) is downloaded once
+  while in flight and copied to the others (see single_flight.py); the number of
+  requests saved is logged.
+- Optional photo check (--verify-images, see photo_processing.py): every photo
+  is decoded in a process pool alongside the downloads, its format and size are
+  recorded in the manifest, invalid ones are removed and a WebP thumbnail is
+  written to thumbnails/ (needs pip install Pillow).
 
 Expected JSON format:
 [
@@ -28,8 +55,24 @@ Expected JSON format:
 ]
 
 Command-line arguments:
-    json_path         Path to the input JSON file containing profiles.
+    json_path         Path to the input JSON or NDJSON file containing profiles.
     -n, --concurrency Number of simultaneous download requests (default: 10).
+    --revalidate      Re-check already downloaded photos with a conditional GET.
+    --adaptive, --min-concurrency, --max-concurrency
+                      Adaptive concurrency options (see adaptive_limiter.py).
+    --attempts, --backoff-base, --backoff-max
+                      Retry options (see retry_policy.py).
+    --rate, --burst   Requests per second to the photo host and burst size (default: unlimited).
+    --connect-timeout, --read-timeout, --total-timeout
+                      Request timeouts in seconds (see timeouts.py).
+    --hedge           Hedge downloads slower than the running p95 latency.
+    --store           Directory of a content-addressed photo store (default: disabled).
+    --verify-images, --thumbnail-size, --image-workers
+                      Photo check and thumbnail options (see photo_processing.py).
+    --keepalive, --dns-ttl, --http2
+                      Connection options (see http_client.py).
+    --metrics-port, --metrics-file, --metrics-json
+                      Metrics export options (see metrics.py).
 
 Example usage:
     python adoption_photos_downloader.py \
@@ -39,84 +82,346 @@ Example usage:
 
 import argparse
 import asyncio
-import json
+import functools
+import hashlib
 import logging
 import os
+import shutil
+from collections import Counter
 from pathlib import Path
 from urllib.parse import urlparse
 
-import aiohttp
 from aiohttp import ClientSession
 
+from adaptive_limiter import AdaptiveLimiter, add_limiter_arguments, limiter_from_args
+from dead_letter import DeadLetterFile
+from hedging import Hedger, add_hedge_arguments
+from http_client import add_client_arguments, client_options_from_args, create_async_session
+from metrics import add_metrics_arguments, collect_counters, metrics_from_args, track_request
+from ndjson_io import iter_profiles
+from photo_manifest import PhotoManifest
+from photo_processing import PhotoProcessor, add_image_arguments, image_options_from_args
+from photo_store import add_store_arguments, store_from_args
+from rate_limiter import add_rate_arguments, rate_limiter_from_args
+from retry_policy import NO_RETRY, RETRY_STATUSES, add_retry_arguments, policy_from_args
+from single_flight import SingleFlight, normalize_url
+from timeouts import add_timeout_arguments, timeouts_from_args
+from worker_pool import run_worker_pool
+
 # Global logger, initialized in setup_logging()
 logger = logging.getLogger(__name__)
 
+# Size of the chunks a photo is streamed to disk in
+CHUNK_SIZE = 64 * 1024
+
+# Dead-letter file of photos that still failed, next to the input JSON
+DEAD_LETTER_NAME = 'failed_photos.ndjson'
+
+
+async def stream_to_file(response, part_path: str):
+    """
+    Stream a response body to `part_path` in chunks without holding it in memory.
+
+    The caller renames the finished file into place, so a partial download never
+    replaces a good file and, of hedged attempts, only the winner's is kept.
+    Concurrent downloads of the same file must use different part paths.
+    All file operations run in the default executor so the event loop never
+    blocks on disk. If the download fails or is cancelled, the part file is
+    removed once the write in progress has finished.
+
+    Args:
+        response (aiohttp.ClientResponse): Response whose body should be saved.
+        part_path (str): Path of the temporary file.
+
+    Returns:
+        tuple[int, str]: Size in bytes and sha256 hex digest of the saved file.
+    """
+    loop = asyncio.get_running_loop()
+    digest = hashlib.sha256()
+    size = 0
+    f = None
+    pending = None  # the file operation running in the executor
+    try:
+        # Shielded, so a cancelled download still knows when the operation has finished
+        pending = loop.run_in_executor(None, open, part_path, 'wb')
+        f = await asyncio.shield(pending)
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+            pending = loop.run_in_executor(None, f.write, chunk)
+            await asyncio.shield(pending)
+        pending = loop.run_in_executor(None, f.close)
+        await asyncio.shield(pending)
+    except BaseException:
+        if pending is None:
+            raise
+        if not pending.done():
+            await asyncio.wait([pending])
+        if f is None and not pending.cancelled() and pending.exception() is None:
+            f = pending.result()
+        if f is not None:
+            f.close()
+        try:
+            os.remove(part_path)
+        except OSError:
+            pass
+        raise
+    return size, digest.hexdigest()
+
 
-async def download_photo(session: ClientSession, semaphore: asyncio.Semaphore, url: str, output_path: str):
+async def download_photo(session: ClientSession, limiter: AdaptiveLimiter, url: str, output_path: str,
+                         manifest: PhotoManifest = None, revalidate: bool = False, retry=None,
+                         rate_limiter=None, hedger=None, store=None, flights=None):
     """
-    Download a single photo asynchronously, respecting the concurrency semaphore.
+    Download a single photo asynchronously, respecting the concurrency limiter.
+
+    With a manifest, a photo that was already completely downloaded is skipped
+    without a request, or, with `revalidate`, checked with a conditional GET.
+    With a photo store, a URL already downloaded for another pet is linked from
+    the store without a request, and new downloads are moved into the store.
+    With `flights`, a URL that is already being downloaded for another pet is
+    not requested again: the finished file is copied (or linked from the store).
 
     Args:
         session (ClientSession): The shared aiohttp session for all requests.
-        semaphore (asyncio.Semaphore): Semaphore to throttle concurrent downloads.
+        limiter (AdaptiveLimiter): Limiter for concurrent downloads; it is told the outcome of each request.
         url (str): URL of the photo to download.
         output_path (str): Filesystem path where the downloaded photo will be saved.
+        manifest (PhotoManifest, optional): Record of completed downloads.
+        revalidate (bool): Check already downloaded photos with a conditional GET.
+        retry (RetryPolicy, optional): Retry policy for transient failures (default: a single attempt).
+        rate_limiter (RateLimiter, optional): Per-host request rate limit.
+        hedger (Hedger, optional): Sends a duplicate request when the download is slow.
+        store (PhotoStore, optional): Content-addressed store the photo is kept in.
+        flights (SingleFlight, optional): Shares downloads of the same URL that are in flight.
+
+    Returns:
+        str: 'downloaded', 'linked', 'shared', 'skipped' or 'failed'.
     """
-    async with semaphore:
-        try:
+    loop = asyncio.get_running_loop()
+    headers = None
+    if manifest is not None and manifest.is_complete(url, output_path):
+        entry = manifest.get(output_path)
+        if store is not None and entry.get('sha256') and not store.has(entry['sha256']):
+            # Downloaded before the store was used
+            await loop.run_in_executor(None, store.adopt, output_path, entry['sha256'])
+        if not revalidate:
+            logger.info(f"Already downloaded {url} -> {output_path}")
+            return 'skipped'
+        headers = {}
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+    elif store is not None and manifest is not None:
+        # The same URL may have been downloaded for another pet
+        entry = manifest.find_url(url)
+        if entry is not None and entry.get('sha256') and entry.get('valid') is not False \
+                and store.has(entry['sha256']):
+            size = await loop.run_in_executor(None, store.reuse, entry['sha256'], output_path)
+            manifest.add(url, output_path, size, entry['sha256'], entry['etag'], entry['last_modified'])
+            logger.info(f"Linked {url} -> {output_path} from the photo store")
+            return 'linked'
+
+    # Each attempt streams to its own .part file, as a hedged duplicate may run alongside;
+    # only the file of the attempt whose response is used is renamed into place
+    part_paths = []
+
+    async def attempt(clock=None):
+        part_path = f'{output_path}.{len(part_paths)}.part'
+        part_paths.append(part_path)
+        # Wait for the rate limit before taking a slot, so the wait does not count as latency
+        if rate_limiter is not None:
+            await rate_limiter.acquire_async(url)
+        async with limiter.request() as outcome:
+            if clock is not None:
+                clock.start()  # the hedge timer starts once the token and slot are held
             # Perform an HTTP GET request to fetch the photo
-            async with session.get(url) as response:
-                if response.status == 200:
-                    # Read the response content (binary) and write to file
-                    content = await response.read()
-                    with open(output_path, 'wb') as f:
-                        f.write(content)
-                    logger.info(f"Downloaded {url} -> {output_path}")
-                else:
+            with track_request('photo') as tracker:
+                async with session.get(url, headers=headers) as response:
+                    outcome.status = tracker.status = response.status
+                    if response.status in RETRY_STATUSES:
+                        response.raise_for_status()
+                    if response.status == 304 and headers is not None:
+                        logger.info(f"Not modified {url} -> {output_path}")
+                        return 'skipped', None
+                    if response.status == 200:
+                        # Stream the response content (binary) to the attempt's part file
+                        size, sha256 = await stream_to_file(response, part_path)
+                        tracker.bytes = size
+                        return 'downloaded', (part_path, size, sha256, response.headers.get('ETag'),
+                                              response.headers.get('Last-Modified'))
                     # Log a warning if the HTTP status is not 200 OK
                     logger.warning(f"Failed to download {url}, status code: {response.status}")
-        except Exception as e:
-            # Catch and log any exceptions during download
-            logger.error(f"Error downloading {url}: {e}")
+                    return 'failed', None
+
+    if hedger is not None:
+        attempt = functools.partial(hedger.run, attempt)
+
+    async def download():
+        outcome, result = await (retry or NO_RETRY).run_async(attempt, url)
+        if result is not None:
+            part_path, size, sha256, etag, last_modified = result
+            await loop.run_in_executor(None, os.replace, part_path, output_path)
+            if store is not None:
+                await loop.run_in_executor(None, store.adopt, output_path, sha256)
+            if manifest is not None:
+                manifest.add(url, output_path, size, sha256, etag, last_modified)
+            logger.info(f"Downloaded {url} -> {output_path}")
+        return outcome
+
+    async def fetch():
+        return output_path, await download()
+
+    try:
+        if flights is None:
+            return await download()
+        source_path, outcome = await flights.run(normalize_url(url), fetch)
+        if source_path == output_path or outcome == 'failed':
+            return outcome
+        # Another pet's download of the same URL was in flight: reuse its file
+        entry = manifest.get(source_path) if manifest is not None else None
+        sha256 = entry.get('sha256') if entry else None
+        size = await loop.run_in_executor(None, share_download, source_path, output_path, store, sha256)
+        if entry:
+            manifest.add(url, output_path, size, sha256, entry['etag'], entry['last_modified'])
+        logger.info(f"Shared {url} -> {output_path} with an in-flight download")
+        return 'shared'
+    except Exception as e:
+        # Catch and log any exceptions during download
+        logger.error(f"Error downloading {url}: {e or type(e).__name__}")
+    finally:
+        if hedger is not None:
+            # A hedged attempt that completed but lost leaves its part file behind
+            for part_path in part_paths:
+                try:
+                    os.remove(part_path)
+                except OSError:
+                    pass
+    return 'failed'
+
+
+def share_download(source_path: str, output_path: str, store=None, sha256: str = None):
+    """
+    Place the photo downloaded to `source_path` at `output_path` as well.
 
+    With a store and the photo's digest, the stored blob is linked; otherwise the
+    file is copied, through a temporary file so a partial copy never replaces a good file.
 
-async def download_all_photos(json_path: str, concurrency: int):
+    Returns:
+        int: Size of the photo in bytes.
     """
-    Read the JSON of adoption profiles, create directories per pet_id,
-    and spawn concurrent download tasks for each photo URL.
+    if store is not None and sha256:
+        return store.reuse(sha256, output_path)
+    tmp_path = output_path + '.shared.part'
+    shutil.copyfile(source_path, tmp_path)
+    os.replace(tmp_path, output_path)
+    return os.path.getsize(output_path)
+
+
+def photo_output_path(photos_dir: Path, pet_id: str, url: str):
+    """
+    Work out where a photo should be saved, creating the pet's subdirectory under
+    `photos_dir` if needed.
 
     Args:
-        json_path (str): Path to the JSON file containing profiles.
-        concurrency (int): Maximum number of concurrent download tasks.
+        photos_dir (Path): The 'photos' directory.
+        pet_id (str): ID of the pet the photo belongs to.
+        url (str): URL of the photo.
+
+    Returns:
+        Path or None: Output path, or None if the URL has no filename.
     """
-    # Load profiles JSON
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # Extract filename from URL path
+    filename = os.path.basename(urlparse(url).path)
+    if not filename:
+        logger.warning(f"Skipping invalid URL (no filename) for pet_id {pet_id}: {url}")
+        return None
+
+    # Create a subdirectory for this pet_id under 'photos'
+    pet_dir = photos_dir / pet_id
+    pet_dir.mkdir(exist_ok=True)
+    return pet_dir / filename
+
 
+def photo_output_paths(photos_dir: Path, pet_id: str, urls):
+    """
+    Work out where each of a pet's photos should be saved (see photo_output_path()).
+
+    Repeated URLs are left out. When two different URLs have the same filename,
+    the later one gets a short hash of its URL appended to the name, so it does
+    not overwrite the first.
+
+    Args:
+        photos_dir (Path): The 'photos' directory.
+        pet_id (str): ID of the pet the photos belong to.
+        urls (list[str]): URLs of the pet's photos.
+
+    Returns:
+        list[tuple[str, Path]]: (url, output path) pairs.
+    """
+    paths = []
+    taken = {}  # Output filename -> URL
+    for url in urls:
+        output_path = photo_output_path(photos_dir, pet_id, url)
+        if output_path is None or taken.get(output_path.name) == url:
+            continue
+        if output_path.name in taken:
+            url_hash = hashlib.sha256(url.encode('utf-8')).hexdigest()[:8]
+            output_path = output_path.with_name(f'{output_path.stem}-{url_hash}{output_path.suffix}')
+        taken[output_path.name] = url
+        paths.append((url, output_path))
+    return paths
+
+
+async def download_all_photos(json_path: str, concurrency: int, revalidate: bool = False,
+                              limiter: AdaptiveLimiter = None, retry=None, rate_limiter=None, timeouts=None,
+                              hedge: bool = False, client_options=None, store=None,
+                              image_options=None):
+    """
+    Read the JSON (or NDJSON) of adoption profiles, create directories per pet_id,
+    and download every photo URL on a fixed pool of concurrent workers.
+
+    Completed downloads are recorded in photos/manifest.jsonl and skipped on the
+    next run, so an interrupted run resumes where it stopped. Photos that still
+    fail after all retries are recorded in failed_photos.ndjson next to the JSON.
+
+    Args:
+        json_path (str): Path to the JSON or NDJSON file containing profiles.
+        concurrency (int): Maximum number of concurrent download tasks.
+        revalidate (bool): Check already downloaded photos with a conditional GET
+                           instead of skipping them outright.
+        limiter (AdaptiveLimiter, optional): Limiter for concurrent downloads
+            (default: a fixed limit of `concurrency`). One worker runs per slot of its ceiling.
+        retry (RetryPolicy, optional): Retry policy for transient failures (default: a single attempt).
+        rate_limiter (RateLimiter, optional): Per-host request rate limit.
+        timeouts (Timeouts, optional): Request timeouts (default: timeouts.DEFAULT_TIMEOUTS).
+        hedge (bool): Send a duplicate request when a download is slower than the running p95.
+        client_options (ClientOptions, optional): Connection options (see http_client.py).
+        store (PhotoStore, optional): Content-addressed store to keep each distinct photo in once.
+        image_options (ImageOptions, optional): Check the photos and write thumbnails
+            alongside the downloads (default: no check).
+    """
     # Determine base directory and create a 'photos' folder next to the JSON
     base_dir = Path(json_path).parent
     photos_dir = base_dir / 'photos'
     photos_dir.mkdir(exist_ok=True)
-
-    # Semaphore to limit concurrent downloads
-    semaphore = asyncio.Semaphore(concurrency)
-    # Limit per-host connections to the same concurrency value
-    connector = aiohttp.TCPConnector(limit_per_host=concurrency)
-    headers = {
-        # Use a realistic User-Agent to avoid potential blocking
-        'User-Agent': (
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-            'AppleWebKit/537.36 (KHTML, like Gecko) '
-            'Chrome/91.0.4472.124 Safari/537.36'
-        )
-    }
-
-    # Create a shared aiohttp client session
-    async with aiohttp.ClientSession(headers=headers, connector=connector) as session:
-        tasks = []
-
-        # Iterate over each pet in the JSON data
-        for pet in data:
+    manifest = PhotoManifest(photos_dir)
+    dead_letter = DeadLetterFile(base_dir / DEAD_LETTER_NAME)
+
+    # Limiter for concurrent downloads
+    if limiter is None:
+        limiter = AdaptiveLimiter(concurrency, concurrency, concurrency, 'Photo download')
+    hedger = Hedger('Photo download') if hedge else None
+    flights = SingleFlight('Photo download')
+    processor = PhotoProcessor(photos_dir, manifest, image_options, dead_letter) if image_options else None
+
+    outcomes = Counter()
+    collect_counters('photo', outcomes)
+
+    def iter_downloads():
+        # Iterate over each pet in the JSON data, one profile at a time
+        for pet in iter_profiles(json_path):
             pet_id = pet.get('pet_id')
             photos = pet.get('photos', [])
 
@@ -129,26 +434,48 @@ async def download_all_photos(json_path: str, concurrency: int):
                 logger.info(f"No photos for pet_id {pet_id}, skipping.")
                 continue
 
-            # Create a subdirectory for this pet_id under 'photos'
-            pet_dir = photos_dir / pet_id
-            pet_dir.mkdir(exist_ok=True)
-
-            # For each photo URL, schedule a download task
-            for url in photos:
-                # Extract filename from URL path
-                filename = os.path.basename(urlparse(url).path)
-                if not filename:
-                    logger.warning(f"Skipping invalid URL (no filename) for pet_id {pet_id}: {url}")
-                    continue
-
-                output_path = pet_dir / filename
-                # Create and collect the coroutine for asynchronous download
-                tasks.append(download_photo(session, semaphore, url, str(output_path)))
-
-        # Run all download tasks concurrently
-        await asyncio.gather(*tasks)
-
-    logger.info("Download complete.")
+            # For each photo URL, yield a download job
+            for url, output_path in photo_output_paths(photos_dir, pet_id, photos):
+                yield pet_id, url, str(output_path)
+
+    # Create a shared client session, with per-host connections limited to the
+    # highest concurrency the limiter allows
+    async with create_async_session(limiter.ceiling, timeouts, client_options) as session:
+        async def handle(job):
+            pet_id, url, output_path = job
+            outcome = await download_photo(
+                session, limiter, url, output_path, manifest, revalidate, retry, rate_limiter, hedger, store,
+                flights
+            )
+            outcomes[outcome] += 1
+            if outcome == 'failed':
+                dead_letter.add({'pet_id': pet_id, 'photos': [url]})
+            elif processor is not None:
+                await processor.submit(pet_id, url, output_path, outcome)
+
+        # Run the downloads on a fixed pool of workers
+        try:
+            await run_worker_pool(iter_downloads(), handle, limiter.ceiling, label='photos')
+            if processor is not None:
+                await processor.join()
+        finally:
+            if processor is not None:
+                processor.close()
+            manifest.close()
+            dead_letter.close()
+
+    logger.info(
+        f"Download complete: {outcomes['downloaded']} downloaded, {outcomes['linked']} linked from the store, "
+        f"{outcomes['shared']} shared with an in-flight download, {outcomes['skipped']} already present, "
+        f"{outcomes['failed']} failed."
+    )
+    flights.log_summary()
+    if processor is not None:
+        processor.log_summary()
+    if store is not None:
+        store.log_summary()
+    if hedger is not None:
+        hedger.log_summary()
 
 
 def setup_logging():
@@ -182,18 +509,38 @@ def main():
     setup_logging()
 
     parser = argparse.ArgumentParser(description="Download pet photos from adoption JSON file")
-    parser.add_argument("json_path", help="Path to the input JSON file containing profiles")
+    parser.add_argument("json_path", help="Path to the input JSON or NDJSON file containing profiles")
     parser.add_argument(
         '-n', '--concurrency',
         type=int,
         default=10,
         help='Number of simultaneous download requests (default: 10)'
     )
+    parser.add_argument(
+        '--revalidate',
+        action='store_true',
+        help='Check already downloaded photos with a conditional GET instead of skipping them'
+    )
+    add_limiter_arguments(parser)
+    add_retry_arguments(parser)
+    add_rate_arguments(parser)
+    add_timeout_arguments(parser)
+    add_hedge_arguments(parser)
+    add_store_arguments(parser)
+    add_image_arguments(parser)
+    add_client_arguments(parser)
+    add_metrics_arguments(parser)
     args = parser.parse_args()
 
     logger.info(f"Starting download using JSON: {args.json_path} with concurrency={args.concurrency}")
     # Run the asynchronous download_all_photos function
-    asyncio.run(download_all_photos(args.json_path, args.concurrency))
+    with metrics_from_args(args):
+        asyncio.run(download_all_photos(
+            args.json_path, args.concurrency, args.revalidate, limiter_from_args(args, 'Photo download'),
+            policy_from_args(args), rate_limiter_from_args(args),
+            timeouts_from_args(args), args.hedge, client_options_from_args(args), store_from_args(args),
+            image_options_from_args(args)
+        ))
 
 
 if __name__ == '__main__':
@@ -4,13 +4,38 @@ Asynchronous Pet Adoption Profile Extractor
 This script reads a CSV file of pet adoption profile URLs (with pet IDs),
 fetches each profile page asynchronously using aiohttp + asyncio, and extracts
 detailed information (name, age, gender, photos, videos, about, history) via
-BeautifulSoup. The collected profiles are written to a JSON file.
+BeautifulSoup (or lxml/selectolax, see --parser). The collected profiles are
+written to a JSON file.
 
 Features:
-- Concurrent HTTP requests controlled by a semaphore (configurable concurrency level).
+- Concurrent HTTP requests from a fixed pool of workers fed from a bounded queue
+  (configurable concurrency level), so memory does not grow with the CSV size.
 - Robust error handling and logging for failed fetches or missing data.
 - Parses “About” and “History” sections, plus both image and video URLs.
 - Supports command-line configuration of input CSV, output JSON, and concurrency.
+- Optional SQLite state store (--state-db) for incremental runs: conditional GETs
+  with ETag/Last-Modified, and unchanged pages (by content hash) are not re-parsed.
+- Optional process pool (-p/--parse-workers) for HTML parsing, so parsing uses
+  several cores and does not stall in-flight requests.
+- Optional NDJSON output (--format ndjson or a .ndjson/.jsonl output path) that
+  appends each profile as soon as it is extracted, with periodic fsync.
+- Optional raw page cache (--cache-dir) and --offline replay from it, to rerun
+  extraction without network access.
+- Retries connection errors, timeouts and 429/5xx responses with exponential
+  backoff and jitter (see retry_policy.py). Profiles that still fail are written
+  to a dead-letter CSV in the input format, so a rerun can target only them.
+- Optional adaptive concurrency (--adaptive): the number of simultaneous requests
+  grows while latency and error rate stay healthy and halves on 429/5xx/timeouts.
+- Optional per-host request rate limit (--rate, --burst, see rate_limiter.py).
+- Connect/read/total timeouts on every request (see timeouts.py), and optional
+  hedging (--hedge): a request slower than the running p95 is sent again and the
+  first response wins (see hedging.py).
+- Keep-alive connection pool, DNS caching and optional HTTP/2 (see http_client.py).
+- Rows with the same profile URL (after normalization) share one request while
+  it is in flight (see single_flight.py); the number of requests saved is logged.
+- Request, latency, byte, parse-time and queue metrics (see metrics.py).
+- Optional indexed SQLite output (--sqlite, see sqlite_sink.py), written in
+  batches as profiles are extracted.
 
 Expected CSV format:
     pet_id,link
@@ -20,9 +45,32 @@ Expected CSV format:
 
 Command-line arguments:
     csv_path           Path to the input CSV file (required).
-    -o, --output       Path to the output JSON file
+    -o, --output       Path to the output JSON (or .ndjson) file
                        (default: ./data/cats/adoption_profiles.json).
     -n, --concurrency  Number of simultaneous requests (default: 10).
+    --adaptive, --min-concurrency, --max-concurrency
+                       Adaptive concurrency options (see adaptive_limiter.py).
+    --attempts, --backoff-base, --backoff-max
+                       Retry options (see retry_policy.py).
+    --dead-letter      CSV of profiles that still failed
+                       (default: failed_profiles.csv next to the output).
+    --rate, --burst    Requests per second to the site and burst size (default: unlimited).
+    --connect-timeout, --read-timeout, --total-timeout
+                       Request timeouts in seconds (see timeouts.py).
+    --hedge            Hedge requests slower than the running p95 latency.
+    --keepalive, --dns-ttl, --http2
+                       Connection options (see http_client.py).
+    --metrics-port, --metrics-file, --metrics-json
+                       Metrics export options (see metrics.py).
+    --state-db         Path to the SQLite state store (default: disabled).
+    -p, --parse-workers
+                       Number of processes to parse pages in (default: 0, on the event loop).
+    --parser           HTML parser backend: html.parser, lxml or selectolax (default: html.parser).
+    --format           Output format: json or ndjson (default: by output file extension).
+    --cache-dir, --cache-ttl, --cache-max-mb, --offline
+                       Raw page cache options (see page_cache.py).
+    --sqlite, --sqlite-batch
+                       SQLite output options (see sqlite_sink.py).
 
 Example usage:
     python adoption_profiles_scraper.py \
@@ -34,15 +82,33 @@ Example usage:
 import argparse
 import asyncio
 import csv
+import functools
 import json
 import logging
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-import aiohttp
-from bs4 import BeautifulSoup
+from adaptive_limiter import AdaptiveLimiter, add_limiter_arguments, limiter_from_args
+from dead_letter import DeadLetterFile
+from hedging import Hedger, add_hedge_arguments
+from html_parsers import DEFAULT_PARSER, PARSERS, parse_profile
+from http_client import add_client_arguments, client_options_from_args, create_async_session
+from metrics import PARSE_SECONDS, add_metrics_arguments, collect_counters, metrics_from_args, track_request
+from ndjson_io import NdjsonWriter, is_ndjson_path
+from page_cache import add_cache_arguments, open_cache
+from rate_limiter import add_rate_arguments, rate_limiter_from_args
+from retry_policy import NO_RETRY, RETRY_STATUSES, add_retry_arguments, policy_from_args
+from single_flight import SingleFlight, normalize_url
+from sqlite_sink import add_sqlite_arguments, sqlite_sink_from_args
+from state_store import StateStore, content_hash
+from timeouts import add_timeout_arguments, timeouts_from_args
+from worker_pool import run_worker_pool
 
-logger = None  # Will be initialized in setup_logging()
+logger = logging.getLogger(__name__)
+
+# Columns of the dead-letter file, the same as the input CSV
+DEAD_LETTER_FIELDS = ['pet_id', 'link']
 
 
 def setup_logging():
@@ -50,7 +116,6 @@ def setup_logging():
     Configure logging to write to a rotating log file in a 'logs' subdirectory
     and also echo messages to the console. Log filename is based on script name.
     """
-    global logger
     script_path = Path(__file__).resolve()
     script_name = script_path.stem
     logs_dir = script_path.parent / 'logs'
@@ -67,192 +132,205 @@ def setup_logging():
             logging.StreamHandler()
         ]
     )
-    logger = logging.getLogger(__name__)
 
 
-def parse_age_gender(text):
+def extract_adoption_profile(html, parser=DEFAULT_PARSER):
     """
-    Parse a comma-separated age and gender string into separate fields.
+    Extract detailed adoption profile information from a profile page's HTML.
 
     Args:
-        text (str): A string like "1 місяць, Хлопчик".
+        html (str): Raw HTML content of an adoption profile page.
+        parser (str): HTML parser backend (see html_parsers.PARSERS).
 
     Returns:
-        tuple: (age, gender) or (None, None) if text is empty.
+        dict or None: Dictionary containing profile fields (name, age, gender,
+                      photos, videos, about, history) or None if profile not found.
     """
-    if not text:
-        return None, None
-    parts = [p.strip() for p in text.split(',')]
-    age = parts[0] if len(parts) > 0 else None
-    gender = parts[1] if len(parts) > 1 else None
-    return age, gender
+    return parse_profile(html, parser)
 
 
-def extract_adoption_profile(html):
+def new_counters():
     """
-    Extract detailed adoption profile information from a profile page's HTML.
+    Return a fresh set of the counters updated by fetch_profile().
+    """
+    return {'links': 0, 'success': 0, 'unchanged': 0, 'fail': 0, 'missing_info': 0}
+
+
+def build_profile_record(pet_id, url, info):
+    """
+    Build the output record for a profile from the fields extracted from its page.
 
     Args:
-        html (str): Raw HTML content of an adoption profile page.
+        pet_id (str): Unique ID of the pet from the CSV.
+        url (str): URL of the pet's profile page.
+        info (dict): Fields as returned by extract_adoption_profile().
 
     Returns:
-        dict or None: Dictionary containing profile fields (name, age, gender,
-                      photos, videos, about, history) or None if profile not found.
+        dict: The profile record as written to the output JSON.
     """
-    soup = BeautifulSoup(html, 'html.parser')
-    profile = soup.find('div', class_='adoptionProfilePage')
-    if not profile:
-        return None
-
-    info = {}
-
-    # Extract the pet's name
-    name_tag = profile.select_one('.profile-head h3')
-    info['name'] = name_tag.text.strip() if name_tag else None
-
-    # Extract and split age and gender
-    age_gender_tag = profile.select_one('.profile-head .body-secondary')
-    age_gender_text = age_gender_tag.text.strip() if age_gender_tag else None
-    age, gender = parse_age_gender(age_gender_text)
-    info['age'] = age
-    info['gender'] = gender
-
-    # Collect image and video URLs from the slider
-    photo_urls = []
-    video_urls = []
-    for slide in profile.select('.swiper.slider-profile .swiper-slide'):
-        # Check if this slide is a video block
-        video_block = slide.select_one('.videoBlock.img')
-        if video_block:
-            video_link = video_block.get('data-link')
-            if video_link:
-                video_urls.append(video_link)
-        else:
-            # Otherwise, extract image URL
-            img_tag = slide.select_one('.img img')
-            if img_tag:
-                url = img_tag.get('data-src')
-                if url:
-                    photo_urls.append(url)
-    info['photos'] = photo_urls
-    info['videos'] = video_urls
-
-    # Extract 'about' section (pet skills)
-    about_section = profile.select_one('.profile-skills')
-    about_texts = []
-    if about_section:
-        for span in about_section.select('.items .item span'):
-            about_texts.append(span.text.strip())
-    info['about'] = about_texts
-
-    # Extract history text, removing newlines
-    history_div = profile.find('div', class_='profile-history')
-    history_text = None
-    if history_div:
-        p_tag = history_div.find('p', class_='body-secondary')
-        if p_tag:
-            history_text = p_tag.get_text(separator='\n').strip()
-            history_text = history_text.replace('\n', '').replace('\r', '')
-    info['history'] = history_text
-
-    return info
-
-
-async def fetch_profile(session, semaphore, pet_id, url, results, counters):
+    return {
+        'pet_id': pet_id,
+        'link': url,
+        'name': info.get('name'),
+        'age': info.get('age'),
+        'gender': info.get('gender'),
+        'photos': info.get('photos', []),
+        'videos': info.get('videos', []),
+        'about': info.get('about', []),
+        'history': info.get('history')
+    }
+
+
+async def fetch_profile(session, limiter, pet_id, url, results, counters, state=None, executor=None,
+                        parser=DEFAULT_PARSER, cache=None, retry=None, dead_letter=None, rate_limiter=None,
+                        hedger=None, flights=None):
     """
     Asynchronously fetch and parse a single adoption profile.
 
+    With a state store, the request is a conditional GET using the validators from
+    the previous run; a 304 response, or a page whose content hash is unchanged,
+    reuses the stored profile instead of parsing the page again.
+
+    A fetch of a URL that is already being fetched (for another row of the CSV)
+    waits for that request instead of sending its own.
+
     Args:
         session (aiohttp.ClientSession): The HTTP session to use.
-        semaphore (asyncio.Semaphore): Semaphore to limit concurrency.
+        limiter (AdaptiveLimiter): Limiter for concurrent requests; it is told the outcome of the request.
         pet_id (str): Unique ID of the pet from the CSV.
         url (str): URL of the pet's profile page.
         results (list): Shared list to append extracted profile data.
         counters (dict): Shared counters for success/fail metrics.
+        state (StateStore, optional): Persistent fetch state for incremental runs.
+        executor (concurrent.futures.Executor, optional): Pool to parse the page in,
+            so the event loop keeps fetching while pages are parsed.
+        parser (str): HTML parser backend (see html_parsers.PARSERS).
+        cache (PageCache, optional): Raw page cache; pages found there are not requested.
+        retry (RetryPolicy, optional): Retry policy for transient failures (default: a single attempt).
+        dead_letter (DeadLetterFile, optional): Record of profiles whose fetch failed.
+        rate_limiter (RateLimiter, optional): Per-host request rate limit.
+        hedger (Hedger, optional): Sends a duplicate request when the fetch is slow.
+        flights (SingleFlight, optional): Shares the request with a fetch of the same URL
+            already in flight (e.g. a pet listed twice); the page is still parsed for this pet.
+
+    Returns:
+        dict or None: The extracted profile record, or None if the fetch failed
+                      or the page had no profile.
     """
-    async with semaphore:
-        try:
-            async with session.get(url) as resp:
-                if resp.status == 200:
-                    html = await resp.text()
-                    info = extract_adoption_profile(html)
-                    if info:
-                        # Add the extracted fields to the results list
-                        results.append({
-                            'pet_id': pet_id,
-                            'link': url,
-                            'name': info.get('name'),
-                            'age': info.get('age'),
-                            'gender': info.get('gender'),
-                            'photos': info.get('photos', []),
-                            'videos': info.get('videos', []),
-                            'about': info.get('about', []),
-                            'history': info.get('history')
-                        })
-                        counters['success'] += 1
-                        logger.info(f"  -> Extracted profile for {url}")
-                    else:
-                        counters['missing_info'] += 1
-                        logger.warning(f"  -> Profile info not found for {url}")
-                else:
-                    counters['fail'] += 1
-                    logger.error(f"  -> Failed to fetch {url}, status code: {resp.status}")
-        except Exception as e:
+    try:
+        cached = cache.get(url) if cache is not None else None
+        if cached is not None:
+            status, html, etag, last_modified = 200, cached.text, cached.etag, cached.last_modified
+        elif cache is not None and cache.offline:
+            counters['fail'] += 1
+            logger.error(f"  -> Not in cache (offline): {url}")
+            return None
+        else:
+            async def attempt(clock=None):
+                # Wait for the rate limit before taking a slot, so the wait does not count as latency
+                if rate_limiter is not None:
+                    await rate_limiter.acquire_async(url)
+                async with limiter.request() as outcome:
+                    if clock is not None:
+                        clock.start()  # the hedge timer starts once the token and slot are held
+                    headers = state.conditional_headers(url) if state is not None else None
+                    with track_request('profile') as tracker:
+                        async with session.get(url, headers=headers) as resp:
+                            outcome.status = tracker.status = resp.status
+                            if resp.status in RETRY_STATUSES:
+                                resp.raise_for_status()
+                            html = None
+                            if resp.status == 200:
+                                tracker.bytes = len(await resp.read())
+                                html = await resp.text()
+                            return resp.status, html, resp.headers.get('ETag'), resp.headers.get('Last-Modified')
+
+            if hedger is not None:
+                attempt = functools.partial(hedger.run, attempt)
+
+            async def fetch():
+                response = await (retry or NO_RETRY).run_async(attempt, url)
+                if response[0] == 200 and cache is not None:
+                    cache.put(url, *response[1:])
+                return response
+
+            if flights is not None:
+                status, html, etag, last_modified = await flights.run(normalize_url(url), fetch)
+            else:
+                status, html, etag, last_modified = await fetch()
+
+        if status == 304 and state is not None:
+            # Not modified since the previous run: reuse the stored profile
+            state.touch(url, pet_id)
+            return _reuse_stored_profile(state, pet_id, url, results, counters)
+
+        if status != 200:
             counters['fail'] += 1
-            logger.error(f"  -> Error fetching {url}: {e}")
+            logger.error(f"  -> Failed to fetch {url}, status code: {status}")
+            if dead_letter is not None:
+                dead_letter.add({'pet_id': pet_id, 'link': url})
+            return None
+
+        page_hash = None
+        if state is not None:
+            page_hash = content_hash(html)
+            previous = state.get(url)
+            if previous and previous['content_hash'] == page_hash:
+                # Same content under new validators: refresh them, skip parsing
+                state.save(url, pet_id, etag, last_modified, page_hash, state.stored_record(url, pet_id))
+                return _reuse_stored_profile(state, pet_id, url, results, counters)
+
+        with PARSE_SECONDS.time(stage='profile'):
+            if executor is not None:
+                info = await asyncio.get_running_loop().run_in_executor(
+                    executor, extract_adoption_profile, html, parser
+                )
+            else:
+                info = extract_adoption_profile(html, parser)
+        record = build_profile_record(pet_id, url, info) if info else None
+        if state is not None:
+            state.save(url, pet_id, etag, last_modified, page_hash, record)
+
+        if record:
+            # Add the extracted fields to the results list
+            results.append(record)
+            counters['success'] += 1
+            logger.info(f"  -> Extracted profile for {url}")
+            return record
+        else:
+            counters['missing_info'] += 1
+            logger.warning(f"  -> Profile info not found for {url}")
+    except Exception as e:
+        counters['fail'] += 1
+        logger.error(f"  -> Error fetching {url}: {e or type(e).__name__}")
+        if dead_letter is not None:
+            dead_letter.add({'pet_id': pet_id, 'link': url})
+    return None
 
 
-async def main_async(csv_path, output_path, concurrency):
+def _reuse_stored_profile(state, pet_id, url, results, counters):
     """
-    Main asynchronous routine to read URLs from CSV, fetch profiles in parallel,
-    and write the collected data to a JSON file.
+    Add the profile stored for an unchanged page to the results.
+    """
+    counters['unchanged'] += 1
+    record = state.stored_record(url, pet_id)
+    if record:
+        results.append(record)
+        logger.info(f"  -> Unchanged, reusing stored profile for {url}")
+    else:
+        counters['missing_info'] += 1
+        logger.warning(f"  -> Unchanged, profile info not found for {url}")
+    return record
+
+
+def write_profiles_json(results, output_path):
+    """
+    Write the collected profiles to a JSON file, creating its directory if needed.
 
     Args:
-        csv_path (str): Path to the input CSV file containing pet_id and link columns.
+        results (list[dict]): Profile records to write.
         output_path (str): Path to the output JSON file.
-        concurrency (int): Number of simultaneous fetch operations.
     """
-    logger.info(f"Reading URLs from: {csv_path}")
-
-    results = []
-    counters = {'links': 0, 'success': 0, 'fail': 0, 'missing_info': 0}
-    semaphore = asyncio.Semaphore(concurrency)
-
-    headers = {
-        'User-Agent': (
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-            'AppleWebKit/537.36 (KHTML, like Gecko) '
-            'Chrome/91.0.4472.124 Safari/537.36'
-        )
-    }
-
-    connector = aiohttp.TCPConnector(limit_per_host=concurrency)
-    async with aiohttp.ClientSession(headers=headers, connector=connector) as session:
-        tasks = []
-        # Open and iterate over CSV to enqueue fetch tasks
-        with open(csv_path, newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                pet_id = row.get('pet_id')
-                link = row.get('link')
-                if not pet_id:
-                    logger.warning("Skipping row with missing pet_id.")
-                    continue
-                if not link:
-                    logger.warning("Skipping row with missing link.")
-                    continue
-
-                counters['links'] += 1
-                logger.info(f"Fetching ({counters['links']}): {link}")
-                tasks.append(
-                    asyncio.create_task(
-                        fetch_profile(session, semaphore, pet_id, link, results, counters)
-                    )
-                )
-
-        # Wait for all tasks to complete
-        await asyncio.gather(*tasks)
-
     # Ensure the output directory exists
     output_dir = os.path.dirname(output_path)
     if output_dir:
@@ -266,14 +344,129 @@ async def main_async(csv_path, output_path, concurrency):
     except IOError as e:
         logger.error(f"Error writing to JSON file {output_path}: {e}")
 
-    # Log summary statistics
+
+def log_summary(counters):
+    """
+    Log the summary statistics of a profile extraction run.
+
+    Args:
+        counters (dict): Counters as updated by fetch_profile().
+    """
     logger.info("Summary:")
     logger.info(f"  Total URLs processed: {counters['links']}")
     logger.info(f"  Successful extractions: {counters['success']}")
+    logger.info(f"  Unchanged (reused from state store): {counters['unchanged']}")
     logger.info(f"  Missing profile info: {counters['missing_info']}")
     logger.info(f"  Failed fetches/errors: {counters['fail']}")
 
 
+async def main_async(csv_path, output_path, concurrency, state_db=None, parse_workers=0,
+                     parser=DEFAULT_PARSER, cache=None, output_format='json', limiter=None, retry=None,
+                     dead_letter_path=None, rate_limiter=None, timeouts=None, hedge=False, client_options=None,
+                     sink=None):
+    """
+    Main asynchronous routine to read URLs from CSV, fetch profiles in parallel,
+    and write the collected data to a JSON file.
+
+    With a state database, unchanged profiles are not re-parsed and the JSON is
+    rebuilt from the store in CSV order, so it also keeps the last known profile
+    of animals whose fetch failed in this run.
+
+    In NDJSON mode each profile is appended to the output file as soon as it is
+    extracted (in completion order) and nothing is kept in memory.
+
+    Args:
+        csv_path (str): Path to the input CSV file containing pet_id and link columns.
+        output_path (str): Path to the output JSON file.
+        concurrency (int): Number of simultaneous fetch operations.
+        state_db (str, optional): Path to the SQLite state store for incremental runs.
+        parse_workers (int): Number of processes to parse pages in (0 parses on the event loop).
+        parser (str): HTML parser backend (see html_parsers.PARSERS).
+        cache (PageCache, optional): Raw page cache.
+        output_format (str): 'json' for a JSON array, 'ndjson' for one profile per line.
+        limiter (AdaptiveLimiter, optional): Limiter for concurrent requests
+            (default: a fixed limit of `concurrency`). One worker runs per slot of its ceiling.
+        retry (RetryPolicy, optional): Retry policy for transient failures (default: a single attempt).
+        dead_letter_path (str, optional): CSV to record profiles that still failed
+            (default: failed_profiles.csv next to the output).
+        rate_limiter (RateLimiter, optional): Per-host request rate limit.
+        timeouts (Timeouts, optional): Request timeouts (default: timeouts.DEFAULT_TIMEOUTS).
+        hedge (bool): Send a duplicate request when a fetch is slower than the running p95.
+        client_options (ClientOptions, optional): Connection options (see http_client.py).
+        sink (SqliteSink, optional): SQLite output each profile is also written to as it is extracted.
+    """
+    logger.info(f"Reading URLs from: {csv_path}")
+
+    ndjson = output_format == 'ndjson'
+    results = NdjsonWriter(output_path) if ndjson else []
+    links = []
+    counters = new_counters()
+    collect_counters('profile', counters)
+    if limiter is None:
+        limiter = AdaptiveLimiter(concurrency, concurrency, concurrency, 'Profile fetch')
+    state = StateStore(state_db) if state_db else None
+    dead_letter = DeadLetterFile(
+        dead_letter_path or os.path.join(os.path.dirname(output_path), 'failed_profiles.csv'), DEAD_LETTER_FIELDS
+    )
+    executor = ProcessPoolExecutor(max_workers=parse_workers) if parse_workers > 0 else None
+    hedger = Hedger('Profile fetch') if hedge else None
+    flights = SingleFlight('Profile fetch')
+
+    async with create_async_session(limiter.ceiling, timeouts, client_options) as session:
+        def iter_rows():
+            # Read the CSV lazily; the worker pool pulls rows as slots free up
+            with open(csv_path, newline='', encoding='utf-8') as csvfile:
+                reader = csv.DictReader(csvfile)
+                for row in reader:
+                    pet_id = row.get('pet_id')
+                    link = row.get('link')
+                    if not pet_id:
+                        logger.warning("Skipping row with missing pet_id.")
+                        continue
+                    if not link:
+                        logger.warning("Skipping row with missing link.")
+                        continue
+
+                    counters['links'] += 1
+                    if state is not None and not ndjson:
+                        links.append(link)
+                    logger.info(f"Fetching ({counters['links']}): {link}")
+                    yield pet_id, link
+
+        async def handle(row):
+            pet_id, link = row
+            record = await fetch_profile(
+                session, limiter, pet_id, link, results, counters, state, executor, parser, cache, retry,
+                dead_letter, rate_limiter, hedger, flights
+            )
+            if record and sink is not None:
+                sink.add_profile(record)
+
+        try:
+            await run_worker_pool(iter_rows(), handle, limiter.ceiling, label='profiles')
+        finally:
+            dead_letter.close()
+            if executor is not None:
+                executor.shutdown()
+            if state is not None:
+                if not ndjson:
+                    results = state.records(links)
+                state.close()
+            if ndjson:
+                results.close()
+
+    if ndjson:
+        logger.info(f"Successfully wrote {results.count} profiles to {output_path}")
+    else:
+        write_profiles_json(results, output_path)
+
+    # Log summary statistics
+    log_summary(counters)
+    flights.log_summary()
+    if hedger is not None:
+        hedger.log_summary()
+
+
 def main():
     """
     Entry point: parse CLI arguments, configure logging, and invoke the async runner.
@@ -297,10 +490,62 @@ def main():
         default=10,
         help='Number of simultaneous requests (default: 10)'
     )
+    parser.add_argument(
+        '--state-db',
+        help='SQLite state store for incremental runs: unchanged profiles are not re-parsed '
+             '(default: disabled)'
+    )
+    parser.add_argument(
+        '-p', '--parse-workers',
+        type=int,
+        default=0,
+        help='Number of processes to parse profile pages in (default: 0, parse on the event loop)'
+    )
+    parser.add_argument(
+        '--parser',
+        choices=PARSERS,
+        default=DEFAULT_PARSER,
+        help=f'HTML parser backend (default: {DEFAULT_PARSER})'
+    )
+    parser.add_argument(
+        '--format',
+        choices=('json', 'ndjson'),
+        help='Output format: a JSON array, or NDJSON written as profiles are extracted '
+             '(default: ndjson for .ndjson/.jsonl outputs, json otherwise)'
+    )
+    parser.add_argument(
+        '--dead-letter',
+        help='CSV to record profiles that still failed after all retries, in the input format '
+             '(default: failed_profiles.csv next to the output)'
+    )
+    add_limiter_arguments(parser)
+    add_retry_arguments(parser)
+    add_rate_arguments(parser)
+    add_timeout_arguments(parser)
+    add_hedge_arguments(parser)
+    add_client_arguments(parser)
+    add_metrics_arguments(parser)
+    add_cache_arguments(parser)
+    add_sqlite_arguments(parser)
     args = parser.parse_args()
+    cache = open_cache(args)
+    sink = sqlite_sink_from_args(args)
+    output_format = args.format or ('ndjson' if is_ndjson_path(args.output) else 'json')
 
     logger.info("Starting profile extraction process...")
-    asyncio.run(main_async(args.csv_path, args.output, args.concurrency))
+    with metrics_from_args(args):
+        try:
+            asyncio.run(main_async(
+                args.csv_path, args.output, args.concurrency, args.state_db, args.parse_workers, args.parser, cache,
+                output_format, limiter_from_args(args, 'Profile fetch'), policy_from_args(args), args.dead_letter,
+                rate_limiter_from_args(args), timeouts_from_args(args), args.hedge,
+                client_options_from_args(args), sink
+            ))
+        finally:
+            if cache is not None:
+                cache.close()
+            if sink is not None:
+                sink.close()
 
 
 if __name__ == '__main__':
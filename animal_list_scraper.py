@@ -7,9 +7,22 @@ for each animal card, and writes the results to a CSV file.
 
 Features:
 - Handles pagination by following “Next” links until no more pages remain.
-- Uses requests + BeautifulSoup for HTML parsing.
+- Uses requests + BeautifulSoup for HTML parsing, or lxml/selectolax via --parser.
+- Optional --async mode: reads the page count from the first page's pagination and
+  fetches the remaining pages concurrently with aiohttp (same output, same order).
+- Optional raw page cache (--cache-dir) and --offline replay from it.
+- Retries connection errors, timeouts and 429/5xx responses with exponential
+  backoff and jitter (see retry_policy.py). Pages that still fail are logged as
+  errors and recorded in a dead-letter file (failed_pages.csv next to the output).
+- Optional per-host request rate limit (--rate, --burst, see rate_limiter.py).
+- Connect/read timeouts on every request (see timeouts.py), so a stalled
+  connection cannot block the crawl.
+- Keep-alive connection pools and DNS caching, optionally HTTP/2 in --async
+  mode (see http_client.py).
+- Request, latency, byte and parse-time metrics (see metrics.py).
 - Skips any animal entry missing a required field (pet_id, link, name, sex, age, or photo_url).
 - Avoids duplicate entries by deduplicating on profile URL.
+- Optional indexed SQLite output (--sqlite, see sqlite_sink.py) next to the CSV.
 
 Expected output CSV format:
     pet_id,link,name,sex,age,photo_url
@@ -19,25 +32,62 @@ Expected output CSV format:
 Command-line arguments:
     base_url       Starting URL to scrape (e.g., https://dogcat.com.ua/adoption?animal=2).
     -o, --output   Path to the output CSV file (default: ./data/cats/data.csv).
+    --async        Fetch listing pages concurrently.
+    -n, --concurrency
+                   Number of pages fetched at once in --async mode (default: 10).
+    --parser       HTML parser backend: html.parser, lxml or selectolax (default: html.parser).
+    --cache-dir, --cache-ttl, --cache-max-mb, --offline
+                   Raw page cache options (see page_cache.py).
+    --attempts, --backoff-base, --backoff-max
+                   Retry options (see retry_policy.py).
+    --rate, --burst
+                   Requests per second to the site and burst size (default: unlimited).
+    --connect-timeout, --read-timeout, --total-timeout
+                   Request timeouts in seconds (see timeouts.py).
+    --keepalive, --dns-ttl, --http2
+                   Connection options (see http_client.py).
+    --metrics-port, --metrics-file, --metrics-json
+                   Metrics export options (see metrics.py).
+    --sqlite, --sqlite-batch
+                   SQLite output options (see sqlite_sink.py).
 
 Example usage:
     python animal_list_scraper.py \
         "https://dogcat.com.ua/adoption?animal=2" \
-        -o ./data/cats/data.csv
+        -o ./data/cats/data.csv \
+        --async -n 10
 """
 
 import argparse
+import asyncio
 import csv
 import logging
 import os
-import re
+import sys
 from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
+import aiohttp
 import requests
-from bs4 import BeautifulSoup
+
+from dead_letter import DeadLetterFile
+from html_parsers import DEFAULT_PARSER, PARSERS, parse_listing_page
+from http_client import add_client_arguments, client_options_from_args, create_async_session, create_session
+from metrics import PARSE_SECONDS, add_metrics_arguments, metrics_from_args, track_request
+from page_cache import PageNotCached, add_cache_arguments, open_cache
+from rate_limiter import add_rate_arguments, rate_limiter_from_args
+from retry_policy import NO_RETRY, add_retry_arguments, policy_from_args
+from sqlite_sink import add_sqlite_arguments, sqlite_sink_from_args
+from timeouts import add_timeout_arguments, requests_timeout, timeouts_from_args
 
 logger = logging.getLogger(__name__)
 
+# Required fields of every animal entry, in CSV column order
+FIELDS = ['pet_id', 'link', 'name', 'sex', 'age', 'photo_url']
+
+# Columns of the dead-letter file of listing pages
+DEAD_LETTER_FIELDS = ['url']
+
 
 def setup_logging():
     """
@@ -62,106 +112,381 @@ def setup_logging():
     )
 
 
-def extract_animal_data(base_url):
+def add_animal_entries(animal_data, cards):
+    """
+    Validates parsed cards and adds the new ones to `animal_data`, skipping entries
+    with missing required fields and links that were already seen.
+
+    Args:
+        animal_data (dict): Entries collected so far, keyed by profile URL.
+        cards (list[dict]): Cards as returned by html_parsers.parse_listing_page().
+
+    Returns:
+        list[dict]: The entries that were newly added, in page order.
+    """
+    added = []
+    for card in cards:
+        # Skip entries with missing required fields
+        if not all(card[field] for field in FIELDS):
+            logger.warning(
+                f"Skipping animal due to missing data: pet_id={card['pet_id']}, link={card['link']}, "
+                f"name={card['name']}, sex={card['sex']}, age={card['age']}, photo_url={card['photo_url']}"
+            )
+            continue
+
+        # Deduplicate based on profile URL
+        if card['link'] in animal_data:
+            continue
+
+        animal_data[card['link']] = card
+        added.append(card)
+    return added
+
+
+def build_page_urls(hrefs, next_url, base_url=None):
+    """
+    Works out the URLs of all remaining listing pages from the first page's pagination.
+
+    The page query parameter is taken from the "Next" link (page 2), and the page
+    count is the highest value of that parameter among the pagination links.
+
+    Args:
+        hrefs (list[str]): Hrefs of all links on the first listing page.
+        next_url (str): URL of the "Next" button on the first page.
+        base_url (str, optional): URL of the first page, to tell the page parameter
+            apart from other numeric parameters such as `animal`.
+
+    Returns:
+        list[str] or None: URLs for pages 2..N, or None if the pagination could not be understood.
+    """
+    next_parts = urlsplit(next_url)
+    next_query = parse_qsl(next_parts.query, keep_blank_values=True)
+    # The page parameter is the numeric one that differs from the first page's URL
+    # (dogcat.com.ua's is ?animal=2&page=2); 'page' wins if that is still ambiguous
+    base_query = dict(parse_qsl(urlsplit(base_url).query)) if base_url else {}
+    page_params = [key for key, value in next_query if value.isdigit() and base_query.get(key) != value]
+    if len(page_params) > 1 and 'page' in page_params:
+        page_params = ['page']
+    if len(page_params) != 1:
+        return None
+    page_param = page_params[0]
+
+    page_count = 0
+    for href in hrefs:
+        parts = urlsplit(href)
+        if parts.path != next_parts.path:
+            continue
+        for key, value in parse_qsl(parts.query, keep_blank_values=True):
+            if key == page_param and value.isdigit():
+                page_count = max(page_count, int(value))
+    if page_count < 2:
+        return None
+
+    page_urls = []
+    for page in range(2, page_count + 1):
+        query = [(key, str(page) if key == page_param else value) for key, value in next_query]
+        page_urls.append(urlunsplit(next_parts._replace(query=urlencode(query))))
+    return page_urls
+
+
+def fetch_page_text(session, url, cache=None, retry=None, rate_limiter=None, timeouts=None):
+    """
+    Fetches the HTML of a page with requests, serving it from the page cache if possible.
+
+    Args:
+        session (requests.Session): The HTTP session to use.
+        url (str): URL of the page.
+        cache (PageCache, optional): Raw page cache.
+        retry (RetryPolicy, optional): Retry policy for transient failures (default: a single attempt).
+        rate_limiter (RateLimiter, optional): Per-host request rate limit.
+        timeouts (Timeouts, optional): Request timeouts (default: timeouts.DEFAULT_TIMEOUTS).
+
+    Returns:
+        str: The page's HTML.
+
+    Raises:
+        requests.RequestException: If the request still fails after all attempts.
+        PageNotCached: If the cache is offline and does not hold the page.
+    """
+    if cache is not None:
+        cached = cache.get(url)
+        if cached is not None:
+            return cached.text
+        if cache.offline:
+            raise PageNotCached(url)
+
+    def attempt():
+        if rate_limiter is not None:
+            rate_limiter.acquire(url)
+        with track_request('listing') as tracker:
+            response = session.get(url, timeout=requests_timeout(timeouts))
+            tracker.status = response.status_code
+            tracker.bytes = len(response.content)
+            response.raise_for_status()
+        return response
+
+    response = (retry or NO_RETRY).run(attempt, url)
+    if cache is not None:
+        cache.put(url, response.text, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+    return response.text
+
+
+def next_page_after_failure(page_urls, failed_url):
+    """
+    Returns the listing page to continue with after `failed_url` could not be processed.
+
+    Args:
+        page_urls (list[str] or None): URLs for pages 2..N as returned by build_page_urls().
+        failed_url (str): URL of the page that failed.
+
+    Returns:
+        str or None: URL of the following page, or None if the crawl cannot continue.
+    """
+    def page_key(url):
+        parts = urlsplit(url)
+        return parts.path, sorted(parse_qsl(parts.query, keep_blank_values=True))
+
+    keys = [page_key(url) for url in page_urls or []]
+    if page_key(failed_url) not in keys:
+        logger.error("The listing is incomplete: entries on this and any later pages are missing.")
+        return None
+    logger.error("The listing is incomplete: entries on this page are missing, continuing with the next page.")
+    position = keys.index(page_key(failed_url)) + 1
+    return page_urls[position] if position < len(page_urls) else None
+
+
+def extract_animal_data(base_url, parser=DEFAULT_PARSER, cache=None, retry=None, dead_letter=None,
+                        rate_limiter=None, timeouts=None):
     """
     Crawls the paginated animal listing starting from `base_url`, extracting
     pet_id, link, name, sex, age, and photo_url from each animal card.
 
+    Pages are followed through their "Next" links. A page that still fails after
+    all retries is logged and recorded in the dead-letter file; once the first
+    page has given the page count the crawl continues with the following page,
+    otherwise it ends there.
+
     Args:
         base_url (str): URL to the first listing page to begin scraping from.
+        parser (str): HTML parser backend (see html_parsers.PARSERS).
+        cache (PageCache, optional): Raw page cache.
+        retry (RetryPolicy, optional): Retry policy for transient failures.
+        dead_letter (DeadLetterFile, optional): Record of pages that could not be fetched.
+        rate_limiter (RateLimiter, optional): Per-host request rate limit.
+        timeouts (Timeouts, optional): Request timeouts (default: timeouts.DEFAULT_TIMEOUTS).
 
     Returns:
         list[dict]: List of unique animal entries with required fields.
     """
     animal_data = {}  # Dictionary keyed by profile URL to deduplicate
-    session = requests.Session()
-    headers = {
-        'User-Agent': (
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-            'AppleWebKit/537.36 (KHTML, like Gecko) '
-            'Chrome/91.0.4472.124 Safari/537.36'
-        )
-    }
+    session = create_session(pool_size=1)
 
     current_url = base_url
+    page_urls = None  # pages 2..N, from the first page's pagination
 
     while current_url:
         try:
-            response = session.get(current_url, headers=headers)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            cards = soup.select('div.animalCard')  # Select all animal cards on the page
-
-            for card in cards:
-                # Attempt to extract pet_id from onclick attribute
-                pet_id = None
-                adopt_btn = card.select_one('button[onclick*="setPopupData"]')
-                if adopt_btn:
-                    onclick_str = adopt_btn.get('onclick', '')
-                    match = re.search(r'setPopupData\((\d+)', onclick_str)
-                    if match:
-                        pet_id = match.group(1)
-
-                # Extract profile link
-                link_tag = card.select_one('a.animalCard__link')
-                link = link_tag['href'] if link_tag and link_tag.get('href') else None
-
-                # Extract pet name
-                name_tag = card.select_one('h5')
-                name = name_tag.get_text(strip=True) if name_tag else None
-
-                # Extract sex and age from <p> tag
-                sex, age = "", ""
-                p_tag = card.select_one('p')
-                if p_tag:
-                    parts = [part.strip() for part in p_tag.get_text(strip=True).split(',')]
-                    if parts:
-                        sex = parts[0]
-                        if len(parts) > 1:
-                            age = parts[1]
-
-                # Extract photo thumbnail URL
-                img_tag = card.select_one('img.animalCard__photo')
-                photo_url = img_tag['data-src'] if img_tag and img_tag.get('data-src') else None
-
-                # Skip entries with missing required fields
-                if not all([pet_id, link, name, sex, age, photo_url]):
-                    logger.warning(
-                        f"Skipping animal due to missing data: pet_id={pet_id}, link={link}, "
-                        f"name={name}, sex={sex}, age={age}, photo_url={photo_url}"
-                    )
-                    continue
-
-                # Deduplicate based on profile URL
-                if link in animal_data:
-                    continue
-
-                animal_data[link] = {
-                    'pet_id': pet_id,
-                    'link': link,
-                    'name': name,
-                    'sex': sex,
-                    'age': age,
-                    'photo_url': photo_url
-                }
-
-            # Look for the "Next" page button
-            next_button = soup.select_one('a.next:not(.disabled)')
-            current_url = next_button['href'] if next_button and next_button.get('href') else None
+            html = fetch_page_text(session, current_url, cache, retry, rate_limiter, timeouts)
+            with PARSE_SECONDS.time(stage='listing'):
+                page = parse_listing_page(html, parser)
+
+            add_animal_entries(animal_data, page.cards)
+            if current_url == base_url and page.next_url:
+                page_urls = build_page_urls(page.hrefs, page.next_url, base_url)
+
+            # Follow the "Next" page button
+            current_url = page.next_url
             logger.info(f"Processed page: {current_url or '(no more pages)'}")
 
         except requests.RequestException as e:
             logger.error(f"Error fetching page {current_url}: {e}")
-            break
+            if dead_letter is not None:
+                dead_letter.add({'url': current_url})
+            current_url = next_page_after_failure(page_urls, current_url)
+        except PageNotCached:
+            logger.error(f"Page not in cache (offline): {current_url}")
+            current_url = next_page_after_failure(page_urls, current_url)
         except Exception as e:
             logger.error(f"Error parsing page {current_url}: {e}")
-            break
+            current_url = next_page_after_failure(page_urls, current_url)
 
     session.close()
     return list(animal_data.values())
 
 
+async def fetch_listing_page(session, url, parser=DEFAULT_PARSER, cache=None, retry=None, rate_limiter=None):
+    """
+    Fetches and parses a single listing page asynchronously.
+
+    Args:
+        session (aiohttp.ClientSession): The HTTP session to use.
+        url (str): URL of the listing page.
+        parser (str): HTML parser backend (see html_parsers.PARSERS).
+        cache (PageCache, optional): Raw page cache.
+        retry (RetryPolicy, optional): Retry policy for transient failures (default: a single attempt).
+        rate_limiter (RateLimiter, optional): Per-host request rate limit.
+
+    Returns:
+        ListingPage: Parsed page.
+
+    Raises:
+        aiohttp.ClientError: If the request still fails after all attempts.
+        asyncio.TimeoutError: If the last attempt timed out.
+        PageNotCached: If the cache is offline and does not hold the page.
+    """
+    cached = cache.get(url) if cache is not None else None
+    if cached is not None:
+        html = cached.text
+    elif cache is not None and cache.offline:
+        raise PageNotCached(url)
+    else:
+        async def attempt():
+            if rate_limiter is not None:
+                await rate_limiter.acquire_async(url)
+            with track_request('listing') as tracker:
+                async with session.get(url) as response:
+                    tracker.status = response.status
+                    response.raise_for_status()
+                    tracker.bytes = len(await response.read())
+                    return await response.text(), response.headers.get('ETag'), response.headers.get('Last-Modified')
+
+        html, etag, last_modified = await (retry or NO_RETRY).run_async(attempt, url)
+        if cache is not None:
+            cache.put(url, html, etag, last_modified)
+    with PARSE_SECONDS.time(stage='listing'):
+        return parse_listing_page(html, parser)
+
+
+async def iter_animal_pages_async(session, base_url, concurrency, parser=DEFAULT_PARSER, cache=None, retry=None,
+                                  dead_letter=None, rate_limiter=None):
+    """
+    Asynchronously crawls the listing, yielding the parsed cards of each page in page order.
+
+    The first page is fetched on its own to read the pagination; the remaining pages
+    are then fetched concurrently (at most `concurrency` at a time). If the page count
+    cannot be determined, the "Next" links are followed one page at a time instead.
+
+    A page that still fails after all retries is logged and recorded in the
+    dead-letter file; the other pages are still yielded when the page count is
+    known, otherwise the error is raised.
+
+    Args:
+        session (aiohttp.ClientSession): The HTTP session to use.
+        base_url (str): URL to the first listing page.
+        concurrency (int): Maximum number of pages fetched at once.
+        parser (str): HTML parser backend (see html_parsers.PARSERS).
+        cache (PageCache, optional): Raw page cache.
+        retry (RetryPolicy, optional): Retry policy for transient failures.
+        dead_letter (DeadLetterFile, optional): Record of pages that could not be fetched.
+        rate_limiter (RateLimiter, optional): Per-host request rate limit.
+
+    Yields:
+        tuple[str, list[dict]]: (page URL, cards as returned by html_parsers.parse_listing_page()).
+    """
+    async def fetch_or_record(url):
+        try:
+            return await fetch_listing_page(session, url, parser, cache, retry, rate_limiter)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if dead_letter is not None:
+                dead_letter.add({'url': url})
+            raise
+
+    page = await fetch_or_record(base_url)
+    yield base_url, page.cards
+
+    next_url = page.next_url
+    if not next_url:
+        return
+
+    page_urls = build_page_urls(page.hrefs, next_url, base_url)
+    if page_urls is None:
+        logger.warning("Could not determine the page count, following pages one at a time.")
+        current_url = next_url
+        while current_url:
+            page = await fetch_or_record(current_url)
+            yield current_url, page.cards
+            current_url = page.next_url
+        return
+
+    logger.info(f"Found {len(page_urls) + 1} listing pages, fetching with concurrency={concurrency}")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_limited(url):
+        async with semaphore:
+            return await fetch_or_record(url)
+
+    tasks = [asyncio.create_task(fetch_limited(url)) for url in page_urls]
+    try:
+        for url, task in zip(page_urls, tasks):
+            try:
+                page = await task
+            except (aiohttp.ClientError, asyncio.TimeoutError, PageNotCached) as e:
+                logger.error(f"Error fetching page {url}: {e or type(e).__name__}")
+                continue
+            yield url, page.cards
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def extract_animal_data_async(base_url, concurrency, parser=DEFAULT_PARSER, cache=None, retry=None,
+                                    dead_letter=None, rate_limiter=None, timeouts=None, client_options=None):
+    """
+    Asynchronous counterpart of extract_animal_data(): fetches all listing pages
+    concurrently and returns the same unique animal entries in the same order.
+
+    Args:
+        base_url (str): URL to the first listing page to begin scraping from.
+        concurrency (int): Maximum number of pages fetched at once.
+        parser (str): HTML parser backend (see html_parsers.PARSERS).
+        cache (PageCache, optional): Raw page cache.
+        retry (RetryPolicy, optional): Retry policy for transient failures.
+        dead_letter (DeadLetterFile, optional): Record of pages that could not be fetched.
+        rate_limiter (RateLimiter, optional): Per-host request rate limit.
+        timeouts (Timeouts, optional): Request timeouts (default: timeouts.DEFAULT_TIMEOUTS).
+        client_options (ClientOptions, optional): Connection options (see http_client.py).
+
+    Returns:
+        list[dict]: List of unique animal entries with required fields.
+    """
+    animal_data = {}  # Dictionary keyed by profile URL to deduplicate
+    async with create_async_session(concurrency, timeouts, client_options) as session:
+        try:
+            async for page_url, cards in iter_animal_pages_async(
+                session, base_url, concurrency, parser, cache, retry, dead_letter, rate_limiter
+            ):
+                add_animal_entries(animal_data, cards)
+                logger.info(f"Processed page: {page_url}")
+        except (aiohttp.ClientError, asyncio.TimeoutError, PageNotCached) as e:
+            logger.error(f"Error fetching page {base_url}: {e or type(e).__name__}")
+    return list(animal_data.values())
+
+
+def write_csv(data, output_path):
+    """
+    Writes animal entries to a CSV file, creating its directory if needed.
+
+    Args:
+        data (list[dict]): Animal entries to write.
+        output_path (str): Path to the output CSV file.
+    """
+    # Ensure the output directory exists
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    try:
+        # Write extracted data to CSV
+        with open(output_path, mode='w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(FIELDS)
+            for item in data:
+                writer.writerow([item[field] for field in FIELDS])
+        logger.info(f"Successfully wrote {len(data)} entries to {output_path}")
+    except IOError as e:
+        logger.error(f"Error writing to CSV file {output_path}: {e}")
+
+
 def main():
     """
     Entry point of the script. Parses arguments, initiates scraping, and writes results to CSV.
@@ -180,37 +505,80 @@ def main():
         default='./data/cats/data.csv',
         help="Path to the output CSV file (default: ./data/cats/data.csv)"
     )
+    parser.add_argument(
+        '--async',
+        dest='use_async',
+        action='store_true',
+        help="Fetch listing pages concurrently with aiohttp instead of one at a time"
+    )
+    parser.add_argument(
+        '-n', '--concurrency',
+        type=int,
+        default=10,
+        help="Number of listing pages fetched at once in --async mode (default: 10)"
+    )
+    parser.add_argument(
+        '--parser',
+        choices=PARSERS,
+        default=DEFAULT_PARSER,
+        help=f"HTML parser backend (default: {DEFAULT_PARSER})"
+    )
+    parser.add_argument(
+        '--dead-letter',
+        help="File to record listing pages that still failed after all retries "
+             "(default: failed_pages.csv next to the output)"
+    )
+    add_retry_arguments(parser)
+    add_rate_arguments(parser)
+    add_timeout_arguments(parser)
+    add_client_arguments(parser)
+    add_metrics_arguments(parser)
+    add_cache_arguments(parser)
+    add_sqlite_arguments(parser)
     args = parser.parse_args()
+    cache = open_cache(args)
+    retry = policy_from_args(args)
+    rate_limiter = rate_limiter_from_args(args)
+    timeouts = timeouts_from_args(args)
+    client_options = client_options_from_args(args)
+    if client_options.http2 and not args.use_async:
+        logger.warning("--http2 only applies in --async mode; listing pages are fetched over HTTP/1.1.")
+    dead_letter = DeadLetterFile(
+        args.dead_letter or os.path.join(os.path.dirname(args.output), 'failed_pages.csv'), DEAD_LETTER_FIELDS
+    )
 
     logger.info(f"Starting to scrape animal data from: {args.base_url}")
-    data = extract_animal_data(args.base_url)
+    with metrics_from_args(args):
+        try:
+            if args.use_async:
+                data = asyncio.run(extract_animal_data_async(
+                    args.base_url, args.concurrency, args.parser, cache, retry, dead_letter, rate_limiter, timeouts,
+                    client_options
+                ))
+            else:
+                data = extract_animal_data(
+                    args.base_url, args.parser, cache, retry, dead_letter, rate_limiter, timeouts
+                )
+        finally:
+            dead_letter.close()
+            if cache is not None:
+                cache.close()
 
     if not data:
         logger.warning("No animal data found. Exiting.")
+        if dead_letter.count:
+            sys.exit(1)
         return
 
-    # Ensure the output directory exists
-    output_dir = os.path.dirname(args.output)
-    if output_dir:
-        os.makedirs(output_dir, exist_ok=True)
+    write_csv(data, args.output)
+    sink = sqlite_sink_from_args(args, args.base_url)
+    if sink is not None:
+        sink.add_listings(data)
+        sink.close()
 
-    try:
-        # Write extracted data to CSV
-        with open(args.output, mode='w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(['pet_id', 'link', 'name', 'sex', 'age', 'photo_url'])
-            for item in data:
-                writer.writerow([
-                    item['pet_id'],
-                    item['link'],
-                    item['name'],
-                    item['sex'],
-                    item['age'],
-                    item['photo_url']
-                ])
-        logger.info(f"Successfully wrote {len(data)} entries to {args.output}")
-    except IOError as e:
-        logger.error(f"Error writing to CSV file {args.output}: {e}")
+    if dead_letter.count:
+        # Pages that still failed after all retries are missing from the CSV
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,287 @@
+"""
+Mock dogcat.com.ua Server
+
+A local aiohttp server that serves a synthetic adoption site with the same
+markup as dogcat.com.ua, for benchmarking the scrapers without touching the
+real site. Pages are generated on request, so any number of animals costs no
+memory.
+
+Routes:
+    /adoption?animal=N&page=P   Listing pages of div.animalCard cards with pagination
+                                and a "Next" button (disabled on the last page).
+    /pet/pet-<id>               Adoption profile (div.adoptionProfilePage) with photo
+                                and video slides, skills and history.
+    /fm/pet-<id>/<n>.jpg        Photo of --image-size bytes (a small JPEG padded to that
+                                size if Pillow is installed, so --verify-images accepts it).
+
+Features:
+- Configurable number of animals, cards per page and photos per animal.
+- Simulated latency with random jitter on every response.
+- Error injection: a fraction of responses are 503s.
+- Server-side rate limit: requests beyond --rate per second get a 429 with Retry-After.
+
+Command-line arguments:
+    --host, --port     Address to listen on (default: 127.0.0.1:8080).
+    --animals          Number of animals in the listing (default: 1000).
+    --page-size        Cards per listing page (default: 24).
+    --photos           Photos per animal (default: 2).
+    --image-size       Bytes per photo (default: 16384).
+    --latency          Seconds added to every response (default: 0).
+    --jitter           Extra random seconds of latency, up to this value (default: 0).
+    --error-rate       Fraction of responses that are 503 errors (default: 0).
+    --rate             Requests per second served before answering 429 (default: unlimited).
+    --seed             Random seed for jitter and error injection.
+
+Example usage:
+    python benchmarks/mock_server.py --animals 10000 --latency 0.02 --jitter 0.05
+    python animal_list_scraper.py "http://127.0.0.1:8080/adoption?animal=2" -o ./bench/data.csv
+"""
+
+import argparse
+import asyncio
+import io
+import math
+import random
+import sys
+from pathlib import Path
+
+from aiohttp import web
+
+try:
+    from PIL import Image
+except ImportError:  # optional dependency
+    Image = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rate_limiter import TokenBucket  # noqa: E402
+
+NAMES = ['Піксель', 'Цімба', 'Марта', 'Рудий', 'Барсик', 'Мурка', 'Сірко', 'Лапка']
+SEXES = ['Хлопчик', 'Дівчинка']
+AGES = ['1 місяць', '4 місяці', '8 місяців', '1 рік', '2 роки', '5 років']
+SKILLS = ['Вакцинований', 'Чіпований', 'Стерилізований', 'Привчений до лотка']
+
+
+def listing_page(base, animal, page, page_count, first_id, last_id):
+    """
+    Return the HTML of listing page `page` with the cards of animals `first_id`..`last_id`.
+    """
+    cards = []
+    for pet_id in range(first_id, last_id + 1):
+        name = NAMES[pet_id % len(NAMES)]
+        cards.append(f'''        <div class="animalCard">
+            <a class="animalCard__link" href="{base}/pet/pet-{pet_id}">
+                <img class="animalCard__photo lazy" data-src="{base}/fm/pet-{pet_id}/1.jpg" alt="">
+            </a>
+            <div class="animalCard__body">
+                <h5>{name} {pet_id}</h5>
+                <p>{SEXES[pet_id % 2]}, {AGES[pet_id % len(AGES)]}</p>
+                <button class="btn btn-primary" onclick="setPopupData({pet_id}, '{name}')">Забрати додому</button>
+            </div>
+        </div>''')
+
+    def page_url(number):
+        return f'{base}/adoption?animal={animal}&amp;page={number}'
+
+    links = [f'<a class="page{" active" if number == page else ""}" href="{page_url(number)}">{number}</a>'
+             for number in sorted({1, max(1, page - 1), page, min(page_count, page + 1), page_count})]
+    if page < page_count:
+        links.append(f'<a class="next" href="{page_url(page + 1)}">&raquo;</a>')
+    else:
+        links.append('<a class="next disabled">&raquo;</a>')
+
+    cards_html = '\n'.join(cards)
+    links_html = '\n        '.join(links)
+    return f'''<!DOCTYPE html>
+<html lang="uk">
+<head>
+    <meta charset="utf-8">
+    <title>Прилаштування тварин — DogCat</title>
+</head>
+<body>
+<header class="header">
+    <a class="header__logo" href="{base}/"><img src="/img/logo.svg" alt="DogCat"></a>
+</header>
+<main class="adoptionPage">
+    <div class="animalsList">
+{cards_html}
+    </div>
+    <div class="pagination">
+        {links_html}
+    </div>
+</main>
+<footer class="footer"><script src="/js/app.js"></script></footer>
+</body>
+</html>
+'''
+
+
+def profile_page(base, pet_id, photo_count):
+    """
+    Return the HTML of the adoption profile of animal `pet_id`.
+    """
+    name = NAMES[pet_id % len(NAMES)]
+    slides = [f'''                    <div class="swiper-slide">
+                        <div class="img"><img class="lazy" data-src="{base}/fm/pet-{pet_id}/{n}.jpg" alt=""></div>
+                    </div>''' for n in range(1, photo_count + 1)]
+    slides.append(f'''                    <div class="swiper-slide">
+                        <div class="videoBlock img" data-link="https://www.youtube.com/embed/pet{pet_id}"></div>
+                    </div>''')
+    skills = [f'<div class="item"><img src="/img/icons/skill.svg" alt=""><span>{skill}</span></div>'
+              for skill in SKILLS[:1 + pet_id % len(SKILLS)]]
+    slides_html = '\n'.join(slides)
+    skills_html = '\n                    '.join(skills)
+    return f'''<!DOCTYPE html>
+<html lang="uk">
+<head>
+    <meta charset="utf-8">
+    <title>{name} — DogCat</title>
+</head>
+<body>
+<div class="adoptionProfilePage container">
+    <div class="row">
+        <div class="col-lg-6">
+            <div class="swiper slider-profile">
+                <div class="swiper-wrapper">
+{slides_html}
+                </div>
+            </div>
+        </div>
+        <div class="col-lg-6">
+            <div class="profile-head">
+                <h3>{name} {pet_id}</h3>
+                <p class="body-secondary">{AGES[pet_id % len(AGES)]}, {SEXES[pet_id % 2]}</p>
+            </div>
+            <div class="profile-skills">
+                <h4>Про мене</h4>
+                <div class="items">
+                    {skills_html}
+                </div>
+            </div>
+            <div class="profile-history">
+                <h4>Історія</h4>
+                <p class="body-secondary">
+                    {name} потрапив до нас зовсім малим.<br>
+                    Зараз шукає люблячу родину!
+                </p>
+            </div>
+        </div>
+    </div>
+</div>
+</body>
+</html>
+'''
+
+
+def photo_bytes(size):
+    """
+    Return the body of a mock photo of `size` bytes.
+    """
+    if Image is not None:
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 48), (180, 120, 60)).save(buffer, 'JPEG')
+        header = buffer.getvalue()  # decoders ignore the padding after the end-of-image marker
+    else:
+        header = b'\xff\xd8\xff\xe0'
+    return (header + bytes(range(256)) * (size // 256 + 1))[:max(size, len(header))]
+
+
+def create_app(animals=1000, page_size=24, photos=2, image_size=16384, latency=0.0, jitter=0.0,
+               error_rate=0.0, rate=None, seed=None):
+    """
+    Create the mock site.
+
+    Args:
+        animals (int): Number of animals in the listing.
+        page_size (int): Cards per listing page.
+        photos (int): Photos per animal.
+        image_size (int): Bytes per photo.
+        latency (float): Seconds added to every response.
+        jitter (float): Extra random seconds of latency, up to this value.
+        error_rate (float): Fraction of responses that are 503 errors.
+        rate (float, optional): Requests per second served before answering 429.
+        seed (int, optional): Random seed for jitter and error injection.
+
+    Returns:
+        aiohttp.web.Application: The application.
+    """
+    rng = random.Random(seed)
+    page_count = max(1, math.ceil(animals / page_size))
+    image = photo_bytes(image_size)
+    bucket = TokenBucket(rate, max(1, int(rate))) if rate else None
+
+    @web.middleware
+    async def simulate(request, handler):
+        if bucket is not None:
+            wait = bucket.reserve()
+            if wait > 0:
+                bucket.tokens += 1  # rejected requests do not use up the budget
+                return web.Response(status=429, headers={'Retry-After': str(math.ceil(wait))})
+        delay = latency + (rng.uniform(0, jitter) if jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        if error_rate and rng.random() < error_rate:
+            return web.Response(status=503, text='Service Unavailable')
+        return await handler(request)
+
+    def base_url(request):
+        return f'{request.scheme}://{request.host}'
+
+    async def listing(request):
+        try:
+            page = int(request.query.get('page', 1))
+        except ValueError:
+            raise web.HTTPNotFound()
+        if not 1 <= page <= page_count:
+            raise web.HTTPNotFound()
+        first_id = (page - 1) * page_size + 1
+        last_id = min(animals, page * page_size)
+        html = listing_page(base_url(request), request.query.get('animal', '2'), page, page_count,
+                            first_id, last_id)
+        return web.Response(text=html, content_type='text/html')
+
+    async def profile(request):
+        pet_id = int(request.match_info['pet_id'])
+        if not 1 <= pet_id <= animals:
+            raise web.HTTPNotFound()
+        return web.Response(text=profile_page(base_url(request), pet_id, photos), content_type='text/html')
+
+    async def photo(request):
+        return web.Response(body=image, content_type='image/jpeg')
+
+    app = web.Application(middlewares=[simulate])
+    app.router.add_get('/adoption', listing)
+    app.router.add_get(r'/pet/pet-{pet_id:\d+}', profile)
+    app.router.add_get(r'/fm/pet-{pet_id:\d+}/{name}', photo)
+    return app
+
+
+def main():
+    """
+    Entry point: parse CLI arguments and serve the mock site until interrupted.
+    """
+    parser = argparse.ArgumentParser(description="Serve a synthetic dogcat.com.ua for benchmarks.")
+    parser.add_argument('--host', default='127.0.0.1', help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8080, help="Port to listen on (default: 8080)")
+    parser.add_argument('--animals', type=int, default=1000, help="Number of animals (default: 1000)")
+    parser.add_argument('--page-size', type=int, default=24, help="Cards per listing page (default: 24)")
+    parser.add_argument('--photos', type=int, default=2, help="Photos per animal (default: 2)")
+    parser.add_argument('--image-size', type=int, default=16384, help="Bytes per photo (default: 16384)")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response (default: 0)")
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help="Extra random seconds of latency, up to this value (default: 0)")
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="Fraction of responses that are 503 errors (default: 0)")
+    parser.add_argument('--rate', type=float,
+                        help="Requests per second served before answering 429 (default: unlimited)")
+    parser.add_argument('--seed', type=int, help="Random seed for jitter and error injection")
+    args = parser.parse_args()
+
+    app = create_app(args.animals, args.page_size, args.photos, args.image_size, args.latency, args.jitter,
+                     args.error_rate, args.rate, args.seed)
+    print(f"Serving {args.animals} animals on http://{args.host}:{args.port}/adoption?animal=2", flush=True)
+    web.run_app(app, host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
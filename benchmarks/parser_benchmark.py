@@ -0,0 +1,236 @@
+"""
+Parser Micro-Benchmark
+
+Measures the extraction cost of every installed HTML parser backend (see
+html_parsers.py) over the saved pages in a corpus directory, and fails when a
+change makes parsing slower than a recorded baseline.
+
+Two workloads are timed per backend:
+    listing   parse_listing_page() and the card loop of extract_animal_data()
+              (add_animal_entries()) over the corpus's listing_*.html pages.
+    profile   parse_profile() over the corpus's profile_*.html pages.
+
+For each workload the report shows pages per second (best of --repeat rounds,
+each round long enough to be timed reliably) and the memory allocated per page
+(tracemalloc peak, averaged over the pages).
+
+A baseline is committed as benchmarks/parser_baseline.json. Timings are
+machine-specific, so record your own with --update-baseline on the machine that
+runs the check, then rerun without it after a change. The script exits with
+status 1 if there is no baseline, or if any workload's throughput dropped by
+more than --max-slowdown or its allocations grew by more than --max-alloc-growth.
+
+Command-line arguments:
+    corpus_dir          Directory with the saved pages (default: ./corpus).
+    --parser            Backends to benchmark (default: every installed one).
+    --repeat            Timed rounds per workload; the best is reported (default: 5).
+    --min-round-time    Seconds each round runs at least (default: 0.2).
+    --baseline          Baseline JSON file (default: benchmarks/parser_baseline.json).
+    --update-baseline   Write the results as the new baseline instead of comparing.
+    --max-slowdown      Allowed throughput drop as a fraction (default: 0.2).
+    --max-alloc-growth  Allowed growth of allocations per page as a fraction (default: 0.25).
+
+Example usage:
+    python benchmarks/parser_benchmark.py --update-baseline
+    python benchmarks/parser_benchmark.py ./corpus --max-slowdown 0.1
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from animal_list_scraper import add_animal_entries  # noqa: E402
+from compare_parsers import corpus_pages  # noqa: E402
+from html_parsers import PARSERS, available_parsers, parse_listing_page, parse_profile  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASELINE = Path(__file__).with_name('parser_baseline.json')
+
+
+def extract_listing(html, parser):
+    """
+    Parse a listing page and run its cards through the card loop of extract_animal_data().
+    """
+    return add_animal_entries({}, parse_listing_page(html, parser).cards)
+
+
+def extract_profile(html, parser):
+    """
+    Parse an adoption profile page.
+    """
+    return parse_profile(html, parser)
+
+
+WORKLOADS = {
+    'listing': ('listing_', extract_listing),
+    'profile': ('profile_', extract_profile),
+}
+
+
+def time_pages(extract, pages, parser, repeat, min_round_time):
+    """
+    Time extraction of `pages` and return the best throughput in pages per second.
+
+    The number of passes over the pages per round is doubled until a round takes
+    at least `min_round_time` seconds; the best of `repeat` rounds is used.
+    """
+    passes = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(passes):
+            for html in pages:
+                extract(html, parser)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_round_time:
+            break
+        passes *= 2
+
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(passes):
+            for html in pages:
+                extract(html, parser)
+        best = min(best, time.perf_counter() - start)
+    return passes * len(pages) / best
+
+
+def allocations_per_page(extract, pages, parser):
+    """
+    Return the average tracemalloc peak, in KiB, of extracting one page.
+    """
+    total = 0
+    tracemalloc.start()
+    try:
+        for html in pages:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            extract(html, parser)
+            _, peak = tracemalloc.get_traced_memory()
+            total += peak - before
+    finally:
+        tracemalloc.stop()
+    return total / len(pages) / 1024
+
+
+def run_benchmarks(corpus_dir, parsers, repeat, min_round_time):
+    """
+    Benchmark every workload with every backend.
+
+    Returns:
+        dict: {parser: {workload: {'pages': n, 'pages_per_second': x, 'alloc_kib_per_page': y}}}
+    """
+    pages = {
+        workload: [path.read_text(encoding='utf-8') for path in corpus_pages(corpus_dir) if path.name.startswith(prefix)]
+        for workload, (prefix, _) in WORKLOADS.items()
+    }
+    results = {}
+    for parser in parsers:
+        results[parser] = {}
+        for workload, (_, extract) in WORKLOADS.items():
+            if not pages[workload]:
+                logger.warning(f"No {workload} pages in {corpus_dir}, skipping.")
+                continue
+            pages_per_second = time_pages(extract, pages[workload], parser, repeat, min_round_time)
+            alloc = allocations_per_page(extract, pages[workload], parser)
+            results[parser][workload] = {
+                'pages': len(pages[workload]),
+                'pages_per_second': round(pages_per_second, 1),
+                'alloc_kib_per_page': round(alloc, 1),
+            }
+            logger.info(f"{parser:<12} {workload:<8} {pages_per_second:10.1f} pages/s {alloc:10.1f} KiB/page")
+    return results
+
+
+def compare_with_baseline(results, baseline, max_slowdown, max_alloc_growth):
+    """
+    Compare results with the baseline.
+
+    Returns:
+        int: Number of workloads that regressed.
+    """
+    regressions = 0
+    for parser, workloads in results.items():
+        for workload, result in workloads.items():
+            expected = baseline.get(parser, {}).get(workload)
+            if expected is None:
+                logger.warning(f"{parser} {workload}: no baseline (run with --update-baseline)")
+                continue
+            change = result['pages_per_second'] / expected['pages_per_second'] - 1
+            if change < -max_slowdown:
+                regressions += 1
+                logger.error(
+                    f"{parser} {workload}: {result['pages_per_second']} pages/s is {-change:.0%} slower "
+                    f"than the baseline {expected['pages_per_second']} pages/s"
+                )
+            growth = result['alloc_kib_per_page'] / expected['alloc_kib_per_page'] - 1
+            if growth > max_alloc_growth:
+                regressions += 1
+                logger.error(
+                    f"{parser} {workload}: {result['alloc_kib_per_page']} KiB/page is {growth:.0%} more "
+                    f"than the baseline {expected['alloc_kib_per_page']} KiB/page"
+                )
+            if change >= -max_slowdown and growth <= max_alloc_growth:
+                logger.info(f"{parser} {workload}: OK ({change:+.0%} throughput, {growth:+.0%} allocations)")
+    return regressions
+
+
+def main():
+    """
+    Entry point: parse command-line arguments, run the benchmark and check for regressions.
+    """
+    logging.basicConfig(level=logging.INFO, format="%(levelname)-8s %(message)s")
+    # The corpus has cards with missing fields on purpose; their warnings are not interesting here
+    logging.getLogger('animal_list_scraper').setLevel(logging.ERROR)
+
+    parser = argparse.ArgumentParser(description="Benchmark the HTML parser backends and check for regressions")
+    parser.add_argument('corpus_dir', nargs='?', default='./corpus', help='Directory with saved pages')
+    parser.add_argument('--parser', nargs='+', choices=PARSERS, help='Backends to benchmark (default: all installed)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed rounds per workload (default: 5)')
+    parser.add_argument('--min-round-time', type=float, default=0.2,
+                        help='Seconds each round runs at least (default: 0.2)')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE),
+                        help='Baseline JSON file (default: benchmarks/parser_baseline.json)')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='Write the results as the new baseline instead of comparing')
+    parser.add_argument('--max-slowdown', type=float, default=0.2,
+                        help='Allowed throughput drop as a fraction of the baseline (default: 0.2)')
+    parser.add_argument('--max-alloc-growth', type=float, default=0.25,
+                        help='Allowed growth of allocations per page as a fraction (default: 0.25)')
+    args = parser.parse_args()
+
+    installed = available_parsers()
+    parsers = [name for name in (args.parser or PARSERS) if name in installed]
+    for name in set(args.parser or PARSERS) - set(parsers):
+        logger.warning(f"Parser {name} is not installed, skipping.")
+
+    results = run_benchmarks(args.corpus_dir, parsers, args.repeat, args.min_round_time)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+            f.write('\n')
+        logger.info(f"Wrote baseline to {args.baseline}")
+        return
+
+    if not Path(args.baseline).exists():
+        logger.error(f"No baseline at {args.baseline}; run with --update-baseline to record one.")
+        sys.exit(1)
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare_with_baseline(results, baseline, args.max_slowdown, args.max_alloc_growth)
+    if regressions:
+        logger.error(f"{regressions} regressions found.")
+        sys.exit(1)
+    logger.info("No parser regressions against the baseline.")
+
+
+if __name__ == '__main__':
+    main()
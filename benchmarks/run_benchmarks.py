@@ -0,0 +1,289 @@
+"""
+Scraper Benchmarks
+
+Runs the listing, profile and photo stages against the local mock site
+(benchmarks/mock_server.py) at several sizes and reports, for each stage:
+
+- throughput: items and requests per second,
+- per-stage request latency (p50/p95/p99) and parse time (p50/p95), taken from
+  the stage's metrics (see metrics.py),
+- peak memory: the highest resident set size of the process running the stage.
+
+Each size gets a fresh mock server and working directory, and each stage runs in
+a fresh process, so the peak memory of one stage does not include the others.
+The stages run the scripts' own functions: extract_animal_data() writes the CSV
+read by main_async(), whose JSON is read by download_all_photos().
+
+Note that 100k animals means 100k profile pages and (with the default 2 photos of
+16 KiB each) about 3 GB of photos in the working directory.
+
+Command-line arguments:
+    --sizes            Numbers of animals to benchmark (default: 1000 10000 100000).
+    --stages           Stages to run: listing, profiles, photos (default: all three).
+    -n, --concurrency  Concurrency of the profile and photo stages (default: 10).
+    --parser           HTML parser backend (default: html.parser).
+    --format           Profile output format: json or ndjson (default: json).
+    --port             Port of the mock server (default: 8089).
+    --page-size, --photos, --image-size, --latency, --jitter, --error-rate, --rate
+                       Mock site options (see mock_server.py).
+    --attempts, --backoff-base, --backoff-max
+                       Retry options (see retry_policy.py).
+    --work-dir         Directory for the stage outputs (default: a temporary directory,
+                       removed afterwards).
+    -o, --output       JSON file to write the results to.
+
+Example usage:
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 --latency 0.01 -n 20 -o bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from html_parsers import DEFAULT_PARSER, PARSERS  # noqa: E402
+from retry_policy import add_retry_arguments, policy_from_args  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('listing', 'profiles', 'photos')
+
+# Metric stage label of each benchmark stage
+METRIC_STAGES = {'listing': 'listing', 'profiles': 'profile', 'photos': 'photo'}
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+
+def setup_logging():
+    """
+    Configure logging to the console only; the stages' own progress logs are left out.
+    """
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+
+
+def peak_rss_mb():
+    """
+    Return the peak resident set size of this process in MiB, or None where it is not available.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, KiB elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_stage(stage, base_url, work_dir, options):
+    """
+    Run one stage in this process and measure it. Called in a fresh process per stage.
+
+    Args:
+        stage (str): One of STAGES.
+        base_url (str): First listing page of the mock site.
+        work_dir (str): Directory with the outputs of the previous stages.
+        options (dict): concurrency, parser, format and retry settings.
+
+    Returns:
+        dict: Items, requests, seconds, throughput, latency, parse time and peak memory of the stage.
+    """
+    # Retry warnings would flood the console with --error-rate; only errors are shown
+    logging.basicConfig(level=logging.ERROR, format='%(asctime)s [%(levelname)s] %(message)s')
+    from metrics import ITEMS, PARSE_SECONDS, REGISTRY, REQUEST_SECONDS, REQUESTS
+    from retry_policy import RetryPolicy
+
+    retry = RetryPolicy(options['attempts'], options['backoff_base'], options['backoff_max'])
+    csv_path = os.path.join(work_dir, 'data.csv')
+    json_path = os.path.join(work_dir, 'adoption_profiles.' + options['format'])
+    memory_before = peak_rss_mb()
+
+    start = time.perf_counter()
+    if stage == 'listing':
+        from animal_list_scraper import extract_animal_data, write_csv
+        data = extract_animal_data(base_url, options['parser'], retry=retry)
+        write_csv(data, csv_path)
+        items = len(data)
+    elif stage == 'profiles':
+        from adoption_profiles_scraper import main_async
+        asyncio.run(main_async(
+            csv_path, json_path, options['concurrency'], parser=options['parser'],
+            output_format=options['format'], retry=retry
+        ))
+        items = None
+    else:
+        from adoption_photos_downloader import download_all_photos
+        asyncio.run(download_all_photos(json_path, options['concurrency'], retry=retry))
+        items = None
+    seconds = time.perf_counter() - start
+
+    metric_stage = METRIC_STAGES[stage]
+    REGISTRY.summary()  # runs the collectors that copy the scripts' counters into ITEMS
+    if items is None:
+        result_counts = {dict(key).get('result'): value for key, value in ITEMS.values.items()
+                         if dict(key).get('stage') == metric_stage}
+        items = result_counts.get('success', 0) + result_counts.get('downloaded', 0)
+    requests = sum(value for key, value in REQUESTS.values.items() if dict(key).get('stage') == metric_stage)
+    latency = REQUEST_SECONDS.summary().get(f'stage={metric_stage}', {})
+    parse = PARSE_SECONDS.summary().get(f'stage={metric_stage}', {})
+
+    return {
+        'items': items,
+        'requests': requests,
+        'seconds': round(seconds, 3),
+        'items_per_second': round(items / seconds, 1) if seconds else 0.0,
+        'requests_per_second': round(requests / seconds, 1) if seconds else 0.0,
+        'latency': {q: latency.get(q) for q in ('p50', 'p95', 'p99')},
+        'parse': {q: parse.get(q) for q in ('p50', 'p95')},
+        'baseline_rss_mb': memory_before,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def port_is_free(port):
+    """
+    Return True if nothing is listening on 127.0.0.1:`port`.
+    """
+    with socket.socket() as sock:
+        return sock.connect_ex(('127.0.0.1', port)) != 0
+
+
+def start_mock_server(size, args):
+    """
+    Start mock_server.py for `size` animals and wait until it accepts connections.
+
+    Returns:
+        subprocess.Popen: The server process.
+    """
+    if not port_is_free(args.port):
+        raise RuntimeError(f"Port {args.port} is already in use; choose another one with --port")
+    command = [
+        sys.executable, str(Path(__file__).with_name('mock_server.py')),
+        '--port', str(args.port), '--animals', str(size), '--page-size', str(args.page_size),
+        '--photos', str(args.photos), '--image-size', str(args.image_size),
+        '--latency', str(args.latency), '--jitter', str(args.jitter), '--error-rate', str(args.error_rate),
+        '--seed', '0',
+    ]
+    if args.rate:
+        command += ['--rate', str(args.rate)]
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while port_is_free(args.port):
+        if server.poll() is not None or time.monotonic() > deadline:
+            server.kill()
+            raise RuntimeError("Mock server did not start")
+        time.sleep(0.1)
+    return server
+
+
+def benchmark_size(size, args, work_root):
+    """
+    Run the selected stages for `size` animals and return their results by stage.
+    """
+    work_dir = os.path.join(work_root, str(size))
+    os.makedirs(work_dir, exist_ok=True)
+    base_url = f'http://127.0.0.1:{args.port}/adoption?animal=2'
+    retry = policy_from_args(args)
+    options = {
+        'concurrency': args.concurrency,
+        'parser': args.parser,
+        'format': args.format,
+        'attempts': retry.attempts,
+        'backoff_base': retry.base_delay,
+        'backoff_max': retry.max_delay,
+    }
+
+    results = {}
+    server = start_mock_server(size, args)
+    try:
+        context = multiprocessing.get_context('spawn')
+        for stage in args.stages:
+            logger.info(f"{size} animals: running {stage}")
+            with context.Pool(1) as pool:
+                results[stage] = pool.apply(run_stage, (stage, base_url, work_dir, options))
+            log_result(size, stage, results[stage])
+    finally:
+        server.terminate()
+        server.wait()
+    return results
+
+
+def log_result(size, stage, result):
+    """
+    Log one stage's measurements.
+    """
+    latency = result['latency']
+    logger.info(
+        f"{size} animals, {stage}: {result['items']} items in {result['seconds']}s "
+        f"({result['items_per_second']} items/s, {result['requests_per_second']} requests/s), "
+        f"latency p50/p95/p99 {latency['p50']}/{latency['p95']}/{latency['p99']}s, "
+        f"peak RSS {result['peak_rss_mb']} MiB"
+    )
+
+
+def main():
+    """
+    Entry point: parse CLI arguments, run the benchmarks and report the results.
+    """
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers against a local mock site.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help="Numbers of animals to benchmark (default: 1000 10000 100000)")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES),
+                        help="Stages to run (default: listing profiles photos)")
+    parser.add_argument('-n', '--concurrency', type=int, default=10,
+                        help="Concurrency of the profile and photo stages (default: 10)")
+    parser.add_argument('--parser', choices=PARSERS, default=DEFAULT_PARSER,
+                        help=f"HTML parser backend (default: {DEFAULT_PARSER})")
+    parser.add_argument('--format', choices=('json', 'ndjson'), default='json',
+                        help="Profile output format (default: json)")
+    parser.add_argument('--port', type=int, default=8089, help="Port of the mock server (default: 8089)")
+    parser.add_argument('--page-size', type=int, default=24, help="Cards per listing page (default: 24)")
+    parser.add_argument('--photos', type=int, default=2, help="Photos per animal (default: 2)")
+    parser.add_argument('--image-size', type=int, default=16384, help="Bytes per photo (default: 16384)")
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="Seconds the mock server adds to every response (default: 0)")
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help="Extra random seconds of latency, up to this value (default: 0)")
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="Fraction of mock responses that are 503 errors (default: 0)")
+    parser.add_argument('--rate', type=float,
+                        help="Requests per second the mock server serves before answering 429")
+    parser.add_argument('--work-dir', help="Directory for the stage outputs (default: a temporary directory)")
+    parser.add_argument('-o', '--output', help="JSON file to write the results to")
+    add_retry_arguments(parser)
+    args = parser.parse_args()
+
+    stages = [stage for stage in STAGES if stage in args.stages]
+    args.stages = stages
+    work_root = args.work_dir or tempfile.mkdtemp(prefix='dogcat-bench-')
+    results = {}
+    try:
+        for size in args.sizes:
+            results[str(size)] = benchmark_size(size, args, work_root)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_root, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        logger.info(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Parser Backend Golden Check
+
+This script runs every installed HTML parser backend (see html_parsers.py) over
+the saved pages in a corpus directory and compares the extracted data with the
+golden output stored in `<corpus>/golden.json`. It exits with status 1 if any
+backend differs from the golden output, so it can gate changes to the extraction
+code or a switch of the default backend.
+
+Pages are recognized by file name:
+    listing_*.html   Listing pages (cards, "Next" URL and link hrefs are compared).
+    profile_*.html   Adoption profile pages.
+
+Command-line arguments:
+    corpus_dir        Directory with the saved pages (default: ./corpus).
+    --update-golden   Regenerate golden.json with the html.parser backend.
+
+Example usage:
+    python compare_parsers.py ./corpus
+"""
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+from html_parsers import DEFAULT_PARSER, PARSERS, available_parsers, parse_listing_page, parse_profile
+
+logger = logging.getLogger(__name__)
+
+GOLDEN_NAME = 'golden.json'
+
+
+def extract_page(path, parser):
+    """
+    Extract the data of a saved page with the given backend.
+
+    Args:
+        path (Path): Saved listing_*.html or profile_*.html page.
+        parser (str): HTML parser backend.
+
+    Returns:
+        dict or None: JSON-compatible extraction result.
+    """
+    html = path.read_text(encoding='utf-8')
+    if path.name.startswith('listing_'):
+        return parse_listing_page(html, parser)._asdict()
+    return parse_profile(html, parser)
+
+
+def corpus_pages(corpus_dir):
+    """
+    Return the listing and profile pages of a corpus directory, sorted by name.
+    """
+    return sorted(
+        path for path in Path(corpus_dir).glob('*.html')
+        if path.name.startswith(('listing_', 'profile_'))
+    )
+
+
+def update_golden(corpus_dir):
+    """
+    Regenerate golden.json from the reference (html.parser) backend.
+    """
+    golden = {path.name: extract_page(path, DEFAULT_PARSER) for path in corpus_pages(corpus_dir)}
+    golden_path = Path(corpus_dir) / GOLDEN_NAME
+    with open(golden_path, 'w', encoding='utf-8') as f:
+        json.dump(golden, f, ensure_ascii=False, indent=4)
+        f.write('\n')
+    logger.info(f"Wrote golden output for {len(golden)} pages to {golden_path}")
+
+
+def compare(corpus_dir):
+    """
+    Compare every installed backend with the golden output.
+
+    Returns:
+        int: Number of (page, backend) pairs that differ.
+    """
+    with open(Path(corpus_dir) / GOLDEN_NAME, 'r', encoding='utf-8') as f:
+        golden = json.load(f)
+
+    parsers = available_parsers()
+    for name in PARSERS:
+        if name not in parsers:
+            logger.warning(f"Parser {name} is not installed, skipping.")
+
+    mismatches = 0
+    for path in corpus_pages(corpus_dir):
+        if path.name not in golden:
+            logger.error(f"{path.name}: no golden output (run with --update-golden)")
+            mismatches += 1
+            continue
+        for parser in parsers:
+            # Round-trip through JSON so tuples and lists compare equal
+            result = json.loads(json.dumps(extract_page(path, parser), ensure_ascii=False))
+            if result == golden[path.name]:
+                logger.info(f"{path.name}: {parser} OK")
+                continue
+            mismatches += 1
+            logger.error(f"{path.name}: {parser} differs from golden output")
+            expected = golden[path.name] or {}
+            for key in sorted(set(expected) | set(result or {})):
+                if expected.get(key) != (result or {}).get(key):
+                    logger.error(f"    {key}: expected {expected.get(key)!r}, got {(result or {}).get(key)!r}")
+    return mismatches
+
+
+def main():
+    """
+    Entry point: parse command-line arguments and run the check.
+    """
+    logging.basicConfig(level=logging.INFO, format="%(levelname)-8s %(message)s")
+
+    parser = argparse.ArgumentParser(description="Check every HTML parser backend against golden output")
+    parser.add_argument('corpus_dir', nargs='?', default='./corpus', help='Directory with saved pages')
+    parser.add_argument(
+        '--update-golden',
+        action='store_true',
+        help='Regenerate golden.json with the html.parser backend'
+    )
+    args = parser.parse_args()
+
+    if args.update_golden:
+        update_golden(args.corpus_dir)
+        return
+
+    mismatches = compare(args.corpus_dir)
+    if mismatches:
+        logger.error(f"{mismatches} mismatches found.")
+        sys.exit(1)
+    logger.info("All parser backends match the golden output.")
+
+
+if __name__ == '__main__':
+    main()
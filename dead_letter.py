@@ -0,0 +1,82 @@
+"""
+Dead-Letter Files
+
+A dead-letter file records the URLs that still failed after all retries, in a
+format the corresponding script accepts as input, so a rerun can target only them:
+
+    failed_profiles.csv    pet_id,link rows for adoption_profiles_scraper.py
+    failed_photos.ndjson   {"pet_id": ..., "photos": [...]} lines for adoption_photos_downloader.py
+    failed_pages.csv       url rows of listing pages (for reference)
+
+Items are written to a temporary file that replaces the dead-letter file on
+close(), so a dead-letter file can itself be the input of the run that rewrites
+it. If nothing failed, a dead-letter file left by a previous run is removed, so
+it always reflects the latest run.
+"""
+
+import csv
+import json
+import logging
+import os
+
+from ndjson_io import is_ndjson_path
+
+logger = logging.getLogger(__name__)
+
+
+class DeadLetterFile:
+    """
+    Append-only record of failed items, written as CSV or (for .ndjson/.jsonl paths) NDJSON.
+
+    Args:
+        path (str): Path of the dead-letter file.
+        fieldnames (list[str]): CSV columns (ignored for NDJSON).
+    """
+
+    def __init__(self, path, fieldnames=None):
+        self.path = str(path)
+        self.fieldnames = fieldnames
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def add(self, row):
+        """
+        Record one failed item.
+
+        Args:
+            row (dict): The item, with the CSV columns as keys.
+        """
+        if self._file is None:
+            self._open()
+        if self._writer is not None:
+            self._writer.writerow(row)
+        else:
+            self._file.write(json.dumps(row, ensure_ascii=False) + '\n')
+        self._file.flush()
+        self.count += 1
+
+    def close(self):
+        """
+        Move the recorded items into place and log how many there are.
+        """
+        if self._file is None:
+            if self.count == 0 and os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        self._file.close()
+        self._file = None
+        os.replace(self.path + '.tmp', self.path)
+        logger.warning(f"{self.count} items still failed after all retries, recorded in {self.path}")
+
+    def _open(self):
+        output_dir = os.path.dirname(self.path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        if is_ndjson_path(self.path):
+            self._file = open(tmp_path, 'w', encoding='utf-8')
+        else:
+            self._file = open(tmp_path, 'w', newline='', encoding='utf-8')
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+            self._writer.writeheader()
@@ -0,0 +1,152 @@
+"""
+Hedged Requests
+
+Cuts tail latency by sending a duplicate of a slow request: once a request has
+been running for longer than the running p95 latency of recent requests, the
+same request is started again and whichever finishes first is used; the other
+one is cancelled. Only about 5% of requests are duplicated.
+
+Hedging starts after `min_samples` requests have completed, so there is a
+latency distribution to compare with. Only idempotent GETs should be hedged.
+
+Latency is measured from the moment an attempt starts its request (see
+AttemptClock), not from the call: time spent waiting for a rate-limit token or
+a concurrency slot is neither hedged nor counted in the percentile.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class AttemptClock:
+    """
+    Marks when a request attempt stops queueing and goes to the network.
+
+    The attempt calls start() once it holds its rate-limit token and concurrency
+    slot, right before sending the request.
+    """
+
+    def __init__(self):
+        self.started_at = None
+        self._started = asyncio.Event()
+
+    def start(self):
+        """
+        Record that the request is being sent; later calls are ignored.
+        """
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+            self._started.set()
+
+    async def wait(self):
+        """
+        Wait until start() has been called.
+        """
+        await self._started.wait()
+
+    def elapsed(self):
+        """
+        Return the seconds since start(), or None if the request was never sent.
+        """
+        return None if self.started_at is None else time.monotonic() - self.started_at
+
+
+class Hedger:
+    """
+    Runs request attempts, hedging those slower than the running latency percentile.
+
+    Args:
+        name (str): Name used in log messages.
+        percentile (float): Latency percentile after which a duplicate is sent.
+        min_samples (int): Completed requests needed before hedging starts.
+        window (int): Number of recent latencies the percentile is computed over.
+    """
+
+    def __init__(self, name='requests', percentile=0.95, min_samples=20, window=500):
+        self.name = name
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.hedged = 0
+        self.won = 0
+        self._latencies = deque(maxlen=window)
+
+    def threshold(self):
+        """
+        Return the latency after which a request is hedged, or None while there are too few samples.
+        """
+        if len(self._latencies) < self.min_samples:
+            return None
+        latencies = sorted(self._latencies)
+        return latencies[int(self.percentile * (len(latencies) - 1))]
+
+    async def run(self, attempt):
+        """
+        Await `attempt(clock)`, starting a second attempt if the first is slower than the threshold.
+
+        The hedge timer runs from `clock.start()`, so an attempt still waiting on
+        the rate limiter or for a slot is not hedged.
+
+        Args:
+            attempt (callable): Coroutine function performing one request; it is passed
+                an AttemptClock and calls its start() right before sending the request.
+
+        Returns:
+            The result of the first attempt to succeed.
+
+        Raises:
+            Exception: The failure of the original attempt if both attempts fail.
+        """
+        delay = self.threshold()
+        clocks = [AttemptClock()]
+        first = asyncio.ensure_future(attempt(clocks[0]))
+        tasks = [first]
+        try:
+            if delay is not None:
+                started = asyncio.ensure_future(clocks[0].wait())
+                try:
+                    await asyncio.wait([first, started], return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    started.cancel()
+                if not first.done():
+                    done, _ = await asyncio.wait(tasks, timeout=delay)
+                    if not done:
+                        self.hedged += 1
+                        clocks.append(AttemptClock())
+                        tasks.append(asyncio.ensure_future(attempt(clocks[1])))
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.won += 1
+                        latency = clocks[tasks.index(task)].elapsed()
+                        if latency is not None:
+                            self._latencies.append(latency)
+                        return task.result()
+            return first.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def log_summary(self):
+        """
+        Log how many requests were hedged and how often the duplicate won.
+        """
+        logger.info(f"{self.name}: hedged {self.hedged} slow requests, the duplicate finished first {self.won} times")
+
+
+def add_hedge_arguments(parser):
+    """
+    Add the --hedge option to an argument parser.
+    """
+    parser.add_argument(
+        '--hedge',
+        action='store_true',
+        help='Send a duplicate request when a fetch is slower than the running p95 latency '
+             'and use whichever response arrives first'
+    )
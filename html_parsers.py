@@ -0,0 +1,610 @@
+"""
+HTML Parser Backends
+
+Implementations of the listing-card and adoption-profile extraction for several
+HTML parsers. All backends return exactly the same data; they only differ in speed.
+
+Backends:
+    html.parser   BeautifulSoup with Python's built-in html.parser (default, no extra dependency),
+                  extracting with precompiled rules (see Rules). Only the cards and links of
+                  a listing page and the profile container of a profile page are parsed
+                  into a tree.
+    lxml          lxml.html with precompiled XPath expressions (`pip install lxml`).
+    selectolax    selectolax's lexbor engine with CSS selectors (`pip install selectolax`).
+
+Use compare_parsers.py to check that every backend matches the golden output for
+the pages in corpus/.
+"""
+
+import re
+from collections import namedtuple
+
+import soupsieve
+from bs4 import BeautifulSoup, Tag
+from bs4.filter import ElementFilter
+
+try:
+    from lxml import etree
+    import lxml.html
+except ImportError:  # optional dependency
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # optional dependency
+    LexborHTMLParser = None
+
+DEFAULT_PARSER = 'html.parser'
+PARSERS = ('html.parser', 'lxml', 'selectolax')
+
+# Cards, "Next" URL and every link href of a listing page
+ListingPage = namedtuple('ListingPage', ['cards', 'next_url', 'hrefs'])
+
+SET_POPUP_RE = re.compile(r'setPopupData\((\d+)')
+
+
+def parse_listing_page(html, parser=DEFAULT_PARSER):
+    """
+    Parse a listing page.
+
+    Args:
+        html (str): Raw HTML of a listing page.
+        parser (str): One of PARSERS.
+
+    Returns:
+        ListingPage: Raw card fields (see make_card()), the URL behind the enabled
+                     "Next" button or None, and the hrefs of all links on the page.
+    """
+    return _backend(parser)[0](html)
+
+
+def parse_profile(html, parser=DEFAULT_PARSER):
+    """
+    Extract detailed adoption profile information from a profile page's HTML.
+
+    Args:
+        html (str): Raw HTML content of an adoption profile page.
+        parser (str): One of PARSERS.
+
+    Returns:
+        dict or None: Dictionary containing profile fields (name, age, gender,
+                      photos, videos, about, history) or None if profile not found.
+    """
+    return _backend(parser)[1](html)
+
+
+def available_parsers():
+    """
+    Return the backends whose dependencies are installed.
+    """
+    return [name for name in PARSERS if _is_available(name)]
+
+
+def parse_age_gender(text):
+    """
+    Parse a comma-separated age and gender string into separate fields.
+
+    Args:
+        text (str): A string like "1 місяць, Хлопчик".
+
+    Returns:
+        tuple: (age, gender) or (None, None) if text is empty.
+    """
+    if not text:
+        return None, None
+    parts = [p.strip() for p in text.split(',')]
+    age = parts[0] if len(parts) > 0 else None
+    gender = parts[1] if len(parts) > 1 else None
+    return age, gender
+
+
+def make_card(onclick, link, name, sex_age, photo_url):
+    """
+    Build a card dict from the raw values found in an animal card.
+
+    Args:
+        onclick (str or None): onclick attribute of the adopt button.
+        link (str or None): Profile URL.
+        name (str or None): Pet name.
+        sex_age (str or None): Text like "Хлопчик, 1 місяць".
+        photo_url (str or None): Thumbnail URL.
+
+    Returns:
+        dict: pet_id, link, name, sex, age, photo_url (None, or "" for sex/age, when missing).
+    """
+    pet_id = None
+    if onclick:
+        match = SET_POPUP_RE.search(onclick)
+        if match:
+            pet_id = match.group(1)
+
+    sex, age = "", ""
+    if sex_age is not None:
+        parts = [part.strip() for part in sex_age.split(',')]
+        sex = parts[0]
+        if len(parts) > 1:
+            age = parts[1]
+
+    return {
+        'pet_id': pet_id,
+        'link': link or None,
+        'name': name,
+        'sex': sex,
+        'age': age,
+        'photo_url': photo_url or None
+    }
+
+
+def profile_region(html):
+    """
+    Return the part of a profile page from the profile container on, or the whole
+    page if the container's opening tag is not found. The <head>, header and
+    their scripts before the container are not parsed at all.
+    """
+    position = html.find('adoptionProfilePage')
+    if position == -1:
+        return html
+    # The class name must be inside a <div ...> opening tag
+    start = html.rfind('<', 0, position)
+    if start == -1 or not html.startswith('<div', start) or html.find('>', start, position) != -1:
+        return html
+    return html[start:]
+
+
+def clean_history(text):
+    """
+    Normalize history text joined with newlines: strip it and remove line breaks.
+    """
+    return text.strip().replace('\n', '').replace('\r', '')
+
+
+# BeautifulSoup replaces every whitespace-only string with a single "\n" (if it
+# contains a newline) or " ". The other backends apply the same rule to their text
+# nodes so that text joined from several nodes comes out identical.
+_ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+
+# Elements whose text BeautifulSoup leaves out of get_text()
+_SKIPPED_TEXT_PARENTS = ('script', 'style')
+
+
+def _collapse(string):
+    if string.strip(_ASCII_SPACES):
+        return string
+    return '\n' if '\n' in string else ' '
+
+
+def join_text(strings, separator=''):
+    """
+    Join text nodes like BeautifulSoup's get_text(separator).
+    """
+    return separator.join(_collapse(string) for string in strings)
+
+
+def join_stripped_text(strings):
+    """
+    Join text nodes like BeautifulSoup's get_text(strip=True).
+    """
+    return ''.join(string.strip() for string in strings)
+
+
+# --- BeautifulSoup + html.parser -------------------------------------------------
+#
+# Extraction rules: each field is a CSS selector compiled once by soupsieve, and
+# all fields of a page, card or slide are collected in one walk over its elements
+# instead of a select_one() per field. Before the full selector is matched, the
+# tag name and classes of its last compound selector are checked, which rules out
+# almost every element cheaply.
+
+_TYPE_RE = re.compile(r'[a-zA-Z][\w-]*')
+_CLASS_RE = re.compile(r'\.([\w-]+)')
+_ATTRIBUTE_OR_NOT_RE = re.compile(r'\[[^\]]*\]|:not\([^)]*\)')
+
+
+class Rule:
+    """
+    One extracted field: the value of the first element matching a selector, or
+    with many=True the values of all matching elements in document order.
+
+    Args:
+        name (str): Field name.
+        selector (str): CSS selector (compound selectors separated by spaces).
+        value (callable): Function returning the field value of a matching Tag.
+        many (bool): Collect every match into a list instead of only the first.
+    """
+
+    __slots__ = ('name', 'value', 'many', '_match', '_tag_name', '_classes')
+
+    def __init__(self, name, selector, value, many=False):
+        self.name = name
+        self.value = value
+        self.many = many
+        self._match = soupsieve.compile(selector).match
+        last = _ATTRIBUTE_OR_NOT_RE.sub('', selector.split()[-1])
+        tag_name = _TYPE_RE.match(last)
+        self._tag_name = tag_name.group(0) if tag_name else None
+        self._classes = _CLASS_RE.findall(last)
+
+    def matches(self, tag):
+        """
+        Return True if `tag` matches the rule's selector.
+        """
+        if self._tag_name is not None and tag.name != self._tag_name:
+            return False
+        if self._classes:
+            classes = tag.get('class')
+            if not classes or any(name not in classes for name in self._classes):
+                return False
+        return self._match(tag)
+
+
+class Rules:
+    """
+    A set of Rule fields extracted together in one walk over an element's descendants.
+    """
+
+    def __init__(self, *rules):
+        self.rules = rules
+        self._stop_early = not any(rule.many for rule in rules)
+
+    def extract(self, root):
+        """
+        Extract every field from the descendants of `root`.
+
+        Returns:
+            dict: Field name to value; None (or [] for many=True fields) when nothing matched.
+        """
+        values = {rule.name: [] if rule.many else None for rule in self.rules}
+        pending = self.rules
+        for element in root.descendants:
+            if not isinstance(element, Tag):
+                continue
+            for rule in pending:
+                if not rule.matches(element):
+                    continue
+                if rule.many:
+                    values[rule.name].append(rule.value(element))
+                else:
+                    values[rule.name] = rule.value(element)
+                    pending = tuple(other for other in pending if other is not rule)
+            if not pending and self._stop_early:
+                break
+        return values
+
+
+def _attribute(name, default=None):
+    return lambda tag: tag.get(name, default)
+
+
+def _element(tag):
+    return tag
+
+
+def _stripped_text(tag):
+    return tag.get_text(strip=True)
+
+
+def _text(tag):
+    return tag.text.strip()
+
+
+_CARD_RULES = Rules(
+    Rule('onclick', 'button[onclick*="setPopupData"]', _attribute('onclick', '')),
+    Rule('link', 'a.animalCard__link', _attribute('href')),
+    Rule('name', 'h5', _stripped_text),
+    Rule('sex_age', 'p', _stripped_text),
+    Rule('photo_url', 'img.animalCard__photo', _attribute('data-src')),
+)
+
+_LISTING_RULES = Rules(
+    Rule('cards', 'div.animalCard', _CARD_RULES.extract, many=True),
+    Rule('next_url', 'a.next:not(.disabled)', lambda tag: tag.get('href') or None),
+    Rule('hrefs', 'a[href]', lambda tag: tag['href'], many=True),
+)
+
+_SLIDE_RULES = Rules(
+    Rule('video_block', '.videoBlock.img', _element),
+    Rule('img', '.img img', _element),
+)
+
+_SKILL_RULES = Rules(
+    Rule('spans', '.items .item span', _text, many=True),
+)
+
+_HISTORY_RULES = Rules(
+    Rule('text', 'p.body-secondary', lambda tag: clean_history(tag.get_text(separator='\n'))),
+)
+
+_PROFILE_RULES = Rules(
+    Rule('name', '.profile-head h3', _text),
+    Rule('age_gender', '.profile-head .body-secondary', _text),
+    Rule('slides', '.swiper.slider-profile .swiper-slide', _SLIDE_RULES.extract, many=True),
+    Rule('about', '.profile-skills', lambda tag: _SKILL_RULES.extract(tag)['spans']),
+    Rule('history', 'div.profile-history', lambda tag: _HISTORY_RULES.extract(tag)['text']),
+)
+
+_PROFILE_PAGE_RULES = Rules(
+    Rule('profile', 'div.adoptionProfilePage', _PROFILE_RULES.extract),
+)
+
+
+class _TopLevelFilter(ElementFilter):
+    # Builds only the elements accepted by `allow(name, classes)` (with everything
+    # inside them); the rest of the page is dropped while parsing.
+
+    def __init__(self, allow):
+        super().__init__()
+        self.allow = allow
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return self.allow(name, (attrs.get('class') or '').split())
+
+    def allow_string_creation(self, string):
+        return False
+
+
+# Listing pages: the animal cards and every link (for the "Next" URL and hrefs)
+_LISTING_FILTER = _TopLevelFilter(lambda name, classes: name == 'a' or (name == 'div' and 'animalCard' in classes))
+
+# Profile pages: the profile container
+_PROFILE_FILTER = _TopLevelFilter(lambda name, classes: name == 'div' and 'adoptionProfilePage' in classes)
+
+
+def _bs4_listing(html):
+    page = _LISTING_RULES.extract(BeautifulSoup(html, 'html.parser', parse_only=_LISTING_FILTER))
+    cards = [
+        make_card(card['onclick'], card['link'], card['name'], card['sex_age'], card['photo_url'])
+        for card in page['cards']
+    ]
+    return ListingPage(cards, page['next_url'], page['hrefs'])
+
+
+def _bs4_profile(html):
+    soup = BeautifulSoup(profile_region(html), 'html.parser', parse_only=_PROFILE_FILTER)
+    profile = _PROFILE_PAGE_RULES.extract(soup)['profile']
+    if profile is None:
+        return None
+
+    info = {'name': profile['name']}
+    info['age'], info['gender'] = parse_age_gender(profile['age_gender'])
+
+    # Collect image and video URLs from the slider
+    photo_urls = []
+    video_urls = []
+    for slide in profile['slides']:
+        # A slide is either a video block or an image
+        if slide['video_block'] is not None:
+            video_link = slide['video_block'].get('data-link')
+            if video_link:
+                video_urls.append(video_link)
+        elif slide['img'] is not None:
+            url = slide['img'].get('data-src')
+            if url:
+                photo_urls.append(url)
+    info['photos'] = photo_urls
+    info['videos'] = video_urls
+
+    info['about'] = profile['about'] or []
+    info['history'] = profile['history']
+    return info
+
+
+# --- lxml ------------------------------------------------------------------------
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+if lxml is not None:
+    _X_CARDS = etree.XPath(f"//div[{_has_class('animalCard')}]")
+    _X_ADOPT_BTN = etree.XPath(".//button[contains(@onclick, 'setPopupData')]")
+    _X_LINK = etree.XPath(f".//a[{_has_class('animalCard__link')}]")
+    _X_H5 = etree.XPath('.//h5')
+    _X_P = etree.XPath('.//p')
+    _X_PHOTO = etree.XPath(f".//img[{_has_class('animalCard__photo')}]")
+    _X_NEXT = etree.XPath(f"//a[{_has_class('next')} and not({_has_class('disabled')})]")
+    _X_HREFS = etree.XPath('//a/@href')
+    _X_PROFILE = etree.XPath(f"//div[{_has_class('adoptionProfilePage')}]")
+    _X_NAME = etree.XPath(f".//*[{_has_class('profile-head')}]//h3")
+    _X_AGE_GENDER = etree.XPath(f".//*[{_has_class('profile-head')}]//*[{_has_class('body-secondary')}]")
+    _X_SLIDES = etree.XPath(
+        f".//*[{_has_class('swiper')} and {_has_class('slider-profile')}]//*[{_has_class('swiper-slide')}]"
+    )
+    _X_VIDEO_BLOCK = etree.XPath(f".//*[{_has_class('videoBlock')} and {_has_class('img')}]")
+    _X_SLIDE_IMG = etree.XPath(f".//*[{_has_class('img')}]//img")
+    _X_SKILLS = etree.XPath(f".//*[{_has_class('profile-skills')}]")
+    _X_SKILL_SPANS = etree.XPath(f".//*[{_has_class('items')}]//*[{_has_class('item')}]//span")
+    _X_HISTORY = etree.XPath(f".//div[{_has_class('profile-history')}]")
+    _X_HISTORY_P = etree.XPath(f".//p[{_has_class('body-secondary')}]")
+
+
+def _first(xpath, element):
+    found = xpath(element)
+    return found[0] if found else None
+
+
+def _lxml_strings(element):
+    # Like itertext(), but without comments and script/style contents
+    if element.text and element.tag not in _SKIPPED_TEXT_PARENTS:
+        yield element.text
+    for child in element:
+        if isinstance(child.tag, str):
+            yield from _lxml_strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def _lxml_listing(html):
+    root = lxml.html.fromstring(html)
+    cards = []
+    for card in _X_CARDS(root):
+        adopt_btn = _first(_X_ADOPT_BTN, card)
+        link_tag = _first(_X_LINK, card)
+        name_tag = _first(_X_H5, card)
+        p_tag = _first(_X_P, card)
+        img_tag = _first(_X_PHOTO, card)
+        cards.append(make_card(
+            adopt_btn.get('onclick', '') if adopt_btn is not None else None,
+            link_tag.get('href') if link_tag is not None else None,
+            join_stripped_text(_lxml_strings(name_tag)) if name_tag is not None else None,
+            join_stripped_text(_lxml_strings(p_tag)) if p_tag is not None else None,
+            img_tag.get('data-src') if img_tag is not None else None
+        ))
+
+    next_button = _first(_X_NEXT, root)
+    next_url = next_button.get('href') or None if next_button is not None else None
+    hrefs = [str(href) for href in _X_HREFS(root)]
+    return ListingPage(cards, next_url, hrefs)
+
+
+def _lxml_profile(html):
+    root = lxml.html.fromstring(html)
+    profile = _first(_X_PROFILE, root)
+    if profile is None:
+        return None
+
+    info = {}
+
+    name_tag = _first(_X_NAME, profile)
+    info['name'] = join_text(_lxml_strings(name_tag)).strip() if name_tag is not None else None
+
+    age_gender_tag = _first(_X_AGE_GENDER, profile)
+    age_gender_text = join_text(_lxml_strings(age_gender_tag)).strip() if age_gender_tag is not None else None
+    info['age'], info['gender'] = parse_age_gender(age_gender_text)
+
+    photo_urls = []
+    video_urls = []
+    for slide in _X_SLIDES(profile):
+        video_block = _first(_X_VIDEO_BLOCK, slide)
+        if video_block is not None:
+            video_link = video_block.get('data-link')
+            if video_link:
+                video_urls.append(video_link)
+        else:
+            img_tag = _first(_X_SLIDE_IMG, slide)
+            if img_tag is not None:
+                url = img_tag.get('data-src')
+                if url:
+                    photo_urls.append(url)
+    info['photos'] = photo_urls
+    info['videos'] = video_urls
+
+    about_section = _first(_X_SKILLS, profile)
+    about_texts = []
+    if about_section is not None:
+        for span in _X_SKILL_SPANS(about_section):
+            about_texts.append(join_text(_lxml_strings(span)).strip())
+    info['about'] = about_texts
+
+    history_div = _first(_X_HISTORY, profile)
+    history_text = None
+    if history_div is not None:
+        p_tag = _first(_X_HISTORY_P, history_div)
+        if p_tag is not None:
+            history_text = clean_history(join_text(_lxml_strings(p_tag), '\n'))
+    info['history'] = history_text
+
+    return info
+
+
+# --- selectolax (lexbor) ---------------------------------------------------------
+
+def _selectolax_strings(node):
+    for child in node.traverse(include_text=True):
+        if child.tag == '-text' and child.parent.tag not in _SKIPPED_TEXT_PARENTS:
+            yield child.text_content
+
+
+def _selectolax_listing(html):
+    tree = LexborHTMLParser(html)
+    cards = []
+    for card in tree.css('div.animalCard'):
+        adopt_btn = card.css_first('button[onclick*="setPopupData"]')
+        link_tag = card.css_first('a.animalCard__link')
+        name_tag = card.css_first('h5')
+        p_tag = card.css_first('p')
+        img_tag = card.css_first('img.animalCard__photo')
+        cards.append(make_card(
+            adopt_btn.attributes.get('onclick') or '' if adopt_btn is not None else None,
+            link_tag.attributes.get('href') if link_tag is not None else None,
+            join_stripped_text(_selectolax_strings(name_tag)) if name_tag is not None else None,
+            join_stripped_text(_selectolax_strings(p_tag)) if p_tag is not None else None,
+            img_tag.attributes.get('data-src') if img_tag is not None else None
+        ))
+
+    next_button = tree.css_first('a.next:not(.disabled)')
+    next_url = next_button.attributes.get('href') or None if next_button is not None else None
+    hrefs = [a_tag.attributes['href'] or '' for a_tag in tree.css('a[href]')]
+    return ListingPage(cards, next_url, hrefs)
+
+
+def _selectolax_profile(html):
+    tree = LexborHTMLParser(html)
+    profile = tree.css_first('div.adoptionProfilePage')
+    if profile is None:
+        return None
+
+    info = {}
+
+    name_tag = profile.css_first('.profile-head h3')
+    info['name'] = join_text(_selectolax_strings(name_tag)).strip() if name_tag is not None else None
+
+    age_gender_tag = profile.css_first('.profile-head .body-secondary')
+    age_gender_text = join_text(_selectolax_strings(age_gender_tag)).strip() if age_gender_tag is not None else None
+    info['age'], info['gender'] = parse_age_gender(age_gender_text)
+
+    photo_urls = []
+    video_urls = []
+    for slide in profile.css('.swiper.slider-profile .swiper-slide'):
+        video_block = slide.css_first('.videoBlock.img')
+        if video_block is not None:
+            video_link = video_block.attributes.get('data-link')
+            if video_link:
+                video_urls.append(video_link)
+        else:
+            img_tag = slide.css_first('.img img')
+            if img_tag is not None:
+                url = img_tag.attributes.get('data-src')
+                if url:
+                    photo_urls.append(url)
+    info['photos'] = photo_urls
+    info['videos'] = video_urls
+
+    about_section = profile.css_first('.profile-skills')
+    about_texts = []
+    if about_section is not None:
+        for span in about_section.css('.items .item span'):
+            about_texts.append(join_text(_selectolax_strings(span)).strip())
+    info['about'] = about_texts
+
+    history_div = profile.css_first('div.profile-history')
+    history_text = None
+    if history_div is not None:
+        p_tag = history_div.css_first('p.body-secondary')
+        if p_tag is not None:
+            history_text = clean_history(join_text(_selectolax_strings(p_tag), '\n'))
+    info['history'] = history_text
+
+    return info
+
+
+_BACKENDS = {
+    'html.parser': (_bs4_listing, _bs4_profile),
+    'lxml': (_lxml_listing, _lxml_profile),
+    'selectolax': (_selectolax_listing, _selectolax_profile),
+}
+
+
+def _is_available(name):
+    if name == 'lxml':
+        return lxml is not None
+    if name == 'selectolax':
+        return LexborHTMLParser is not None
+    return name in _BACKENDS
+
+
+def _backend(name):
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown parser {name!r}, expected one of {', '.join(PARSERS)}")
+    if not _is_available(name):
+        raise ImportError(f"Parser {name!r} is not installed (pip install {name})")
+    return _BACKENDS[name]
@@ -0,0 +1,245 @@
+"""
+HTTP Client Layer
+
+Creates the HTTP sessions used by the listing, profile and photo scripts and the
+pipeline, so connection handling is configured in one place:
+
+- Connection pools sized to the callers' concurrency (aiohttp per host; requests
+  per host through an HTTPAdapter), with idle connections kept alive for
+  --keepalive seconds so repeated requests skip the TCP and TLS handshakes.
+- A DNS cache with a --dns-ttl lifetime instead of aiohttp's 10 seconds.
+- One SSL context shared by every session, so CA certificates are loaded once.
+- An optional HTTP/2 transport (--http2, needs `pip install httpx[http2]`) for the
+  aiohttp-based fetchers: all requests to a host are multiplexed over one
+  connection. It is wrapped in the small part of the aiohttp session API the
+  scripts use, and its errors are raised as the equivalent aiohttp errors, so
+  retries, metrics and limiters work unchanged.
+"""
+
+import asyncio
+import ssl
+from collections import namedtuple
+
+import aiohttp
+import requests
+from multidict import CIMultiDict, CIMultiDictProxy
+from requests.adapters import HTTPAdapter
+from yarl import URL
+
+from timeouts import DEFAULT_TIMEOUTS, client_timeout
+
+try:
+    import httpx
+except ImportError:  # optional dependency
+    httpx = None
+
+HEADERS = {
+    'User-Agent': (
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+        'AppleWebKit/537.36 (KHTML, like Gecko) '
+        'Chrome/91.0.4472.124 Safari/537.36'
+    )
+}
+
+ClientOptions = namedtuple('ClientOptions', ['keepalive', 'dns_ttl', 'http2'])
+
+DEFAULT_CLIENT_OPTIONS = ClientOptions(keepalive=30.0, dns_ttl=300, http2=False)
+
+_ssl_context = None
+
+
+def shared_ssl_context():
+    """
+    Return the SSL context shared by all sessions, creating it on first use.
+    """
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = ssl.create_default_context()
+    return _ssl_context
+
+
+def create_session(pool_size=10):
+    """
+    Create a requests session with a keep-alive pool of `pool_size` connections per host.
+
+    Requests sessions speak HTTP/1.1 only and resolve names on every new
+    connection; kept-alive connections make both rare.
+
+    Args:
+        pool_size (int): Connections kept per host.
+
+    Returns:
+        requests.Session: The session, sending HEADERS with every request.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(HEADERS)
+    return session
+
+
+def create_async_session(limit_per_host, timeouts=None, options=None):
+    """
+    Create the session for the aiohttp-based fetchers.
+
+    Args:
+        limit_per_host (int): Most connections open to one host at a time.
+        timeouts (Timeouts, optional): Request timeouts (default: timeouts.DEFAULT_TIMEOUTS).
+        options (ClientOptions, optional): Client options (default: DEFAULT_CLIENT_OPTIONS).
+
+    Returns:
+        aiohttp.ClientSession or Http2Session: The session, sending HEADERS with every request.
+
+    Raises:
+        ImportError: If HTTP/2 is requested and httpx is not installed.
+    """
+    options = options or DEFAULT_CLIENT_OPTIONS
+    if options.http2:
+        return Http2Session(limit_per_host, timeouts, options)
+    connector = aiohttp.TCPConnector(
+        limit=0,  # bounded per host instead
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=options.dns_ttl,
+        keepalive_timeout=options.keepalive,
+        ssl=shared_ssl_context(),
+    )
+    return aiohttp.ClientSession(headers=HEADERS, connector=connector, timeout=client_timeout(timeouts))
+
+
+class Http2Session:
+    """
+    HTTP/2 session on httpx with the subset of the aiohttp.ClientSession API used by the scripts:
+    `async with session.get(url, headers=...) as response` and `async with session`.
+
+    Args:
+        limit_per_host (int): Most concurrent requests (HTTP/2 streams share the connections).
+        timeouts (Timeouts, optional): Request timeouts; httpx has no total timeout, so it is not applied.
+        options (ClientOptions): Client options.
+    """
+
+    def __init__(self, limit_per_host, timeouts, options):
+        if httpx is None:
+            raise ImportError("HTTP/2 needs httpx (pip install httpx[http2])")
+        timeouts = timeouts or DEFAULT_TIMEOUTS
+        self._client = httpx.AsyncClient(
+            http2=True,
+            headers=HEADERS,
+            verify=shared_ssl_context(),
+            timeout=httpx.Timeout(timeouts.read, connect=timeouts.connect),
+            limits=httpx.Limits(
+                max_connections=limit_per_host,
+                max_keepalive_connections=limit_per_host,
+                keepalive_expiry=options.keepalive,
+            ),
+        )
+
+    def get(self, url, headers=None):
+        """
+        Return an async context manager yielding the response to a GET of `url`.
+        """
+        return _Http2Request(self._client, url, headers)
+
+    async def close(self):
+        await self._client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+def _aiohttp_error(exc):
+    # The aiohttp error the retry policy and metrics expect for an httpx error
+    if isinstance(exc, httpx.TimeoutException):
+        return asyncio.TimeoutError()
+    return aiohttp.ClientConnectionError(str(exc) or type(exc).__name__)
+
+
+class _Http2Request:
+    def __init__(self, client, url, headers):
+        self._client = client
+        self._url = url
+        self._headers = headers
+        self._stream = None
+
+    async def __aenter__(self):
+        self._stream = self._client.stream('GET', self._url, headers=self._headers)
+        try:
+            return _Http2Response(self._url, await self._stream.__aenter__())
+        except httpx.TransportError as e:
+            raise _aiohttp_error(e) from e
+
+    async def __aexit__(self, *exc_info):
+        await self._stream.__aexit__(*exc_info)
+
+
+class _Http2Response:
+    def __init__(self, url, response):
+        self._url = url
+        self._response = response
+        self.status = response.status_code
+        self.headers = response.headers
+        self.content = _Http2Content(response)
+
+    async def read(self):
+        try:
+            return await self._response.aread()
+        except httpx.TransportError as e:
+            raise _aiohttp_error(e) from e
+
+    async def text(self):
+        await self.read()
+        return self._response.text
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            url = URL(self._url)
+            request_info = aiohttp.RequestInfo(url, 'GET', CIMultiDictProxy(CIMultiDict()), url)
+            raise aiohttp.ClientResponseError(
+                request_info, (), status=self.status, message=self._response.reason_phrase,
+                headers=CIMultiDictProxy(CIMultiDict(self.headers.multi_items()))
+            )
+
+
+class _Http2Content:
+    def __init__(self, response):
+        self._response = response
+
+    async def iter_chunked(self, size):
+        try:
+            async for chunk in self._response.aiter_bytes(size):
+                yield chunk
+        except httpx.TransportError as e:
+            raise _aiohttp_error(e) from e
+
+
+def add_client_arguments(parser):
+    """
+    Add the --keepalive, --dns-ttl and --http2 options to an argument parser.
+    """
+    parser.add_argument(
+        '--keepalive',
+        type=float,
+        default=DEFAULT_CLIENT_OPTIONS.keepalive,
+        help=f'Seconds an idle connection is kept open for reuse (default: {DEFAULT_CLIENT_OPTIONS.keepalive:g})'
+    )
+    parser.add_argument(
+        '--dns-ttl',
+        type=int,
+        default=DEFAULT_CLIENT_OPTIONS.dns_ttl,
+        help=f'Seconds resolved host names are cached (default: {DEFAULT_CLIENT_OPTIONS.dns_ttl})'
+    )
+    parser.add_argument(
+        '--http2',
+        action='store_true',
+        help='Use HTTP/2 for the aiohttp-based fetchers (needs pip install httpx[http2])'
+    )
+
+
+def client_options_from_args(args):
+    """
+    Return the ClientOptions configured by the add_client_arguments() options.
+    """
+    return ClientOptions(args.keepalive, args.dns_ttl, args.http2)
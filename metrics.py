@@ -0,0 +1,416 @@
+"""
+Run Metrics
+
+A small metrics registry shared by the listing, profile and photo scripts and
+the pipeline: counters, gauges and histograms with labels, exported in the
+Prometheus text format (over HTTP with --metrics-port, or to a file with
+--metrics-file, e.g. for the node_exporter textfile collector) and as a JSON
+summary at exit (--metrics-json).
+
+Metrics:
+    dogcat_requests_total{stage,status}              HTTP requests by status code or error class.
+    dogcat_request_errors_total{stage,error}         Failed requests by error class (http_503, TimeoutError, ...).
+    dogcat_request_duration_seconds{stage}           Request latency histogram (headers and body).
+    dogcat_downloaded_bytes_total{stage}             Response body bytes.
+    dogcat_parse_duration_seconds{stage}             Page parse time histogram (including the wait
+                                                     for a free worker with --parse-workers).
+    dogcat_queue_depth{queue}                        Items waiting in a work queue.
+    dogcat_items_total{stage,result}                 Processed items by result (the scripts' counters).
+
+Stages are 'listing', 'profile' and 'photo'.
+"""
+
+import asyncio
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PARSE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key, extra=()):
+    # Prometheus label set, e.g. {stage="profile",status="200"}
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _summary_key(key):
+    # JSON summary key, e.g. stage=profile,status=200
+    return ','.join(f'{name}={value}' for name, value in key) or 'total'
+
+
+class Counter:
+    """
+    Monotonically increasing value per label set.
+
+    Updates take `lock`, which the registry also holds while exporting, so the
+    HTTP exporter thread never sees the values change mid-render.
+    """
+
+    type = 'counter'
+
+    def __init__(self, name, help_text, lock=None):
+        self.name = name
+        self.help = help_text
+        self.values = {}
+        self._lock = lock or threading.Lock()
+
+    def inc(self, value=1, **labels):
+        """
+        Add `value` to the counter for `labels`.
+        """
+        key = _label_key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def render(self):
+        return [f'{self.name}{_format_labels(key)} {value}' for key, value in sorted(self.values.items())]
+
+    def summary(self):
+        return {_summary_key(key): value for key, value in sorted(self.values.items())}
+
+
+class Gauge(Counter):
+    """
+    Value per label set that can go up and down.
+    """
+
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        """
+        Set the gauge for `labels` to `value`.
+        """
+        key = _label_key(labels)
+        with self._lock:
+            self.values[key] = value
+
+
+class Histogram:
+    """
+    Distribution of observed values per label set, counted in cumulative buckets.
+    """
+
+    type = 'histogram'
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS, lock=None):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.values = {}
+        self._lock = lock or threading.Lock()
+
+    def observe(self, value, **labels):
+        """
+        Record one observation for `labels`.
+        """
+        key = _label_key(labels)
+        bucket = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self.values.get(key)
+            if entry is None:
+                # Per-bucket (non-cumulative) counts, the last one for +Inf; then count and sum
+                entry = self.values[key] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+            entry[0][bucket] += 1
+            entry[1] += 1
+            entry[2] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Observe the duration of the `with` block.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def quantile(self, key, q):
+        """
+        Estimate the `q` quantile for a label key by interpolating within its bucket.
+        """
+        counts, count, _ = self.values[key]
+        rank = q * count
+        cumulative = 0
+        for i, bucket_count in enumerate(counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return 0.0
+
+    def render(self):
+        lines = []
+        for key, (counts, count, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{_format_labels(key, [("le", le)])} {cumulative}')
+            lines.append(f'{self.name}_count{_format_labels(key)} {count}')
+            lines.append(f'{self.name}_sum{_format_labels(key)} {total}')
+        return lines
+
+    def summary(self):
+        result = {}
+        for key, (_, count, total) in sorted(self.values.items()):
+            result[_summary_key(key)] = {
+                'count': count,
+                'sum': round(total, 6),
+                'mean': round(total / count, 6) if count else 0.0,
+                'p50': round(self.quantile(key, 0.5), 6),
+                'p95': round(self.quantile(key, 0.95), 6),
+                'p99': round(self.quantile(key, 0.99), 6),
+            }
+        return result
+
+
+class Registry:
+    """
+    Collection of metrics with Prometheus text and JSON export.
+
+    Collectors registered with add_collector() are called before each export,
+    to copy values kept elsewhere (such as the scripts' counters) into metrics.
+    The metrics share the registry's lock, so exports may run on another thread.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def counter(self, name, help_text):
+        return self._add(Counter(name, help_text, self._lock))
+
+    def gauge(self, name, help_text):
+        return self._add(Gauge(name, help_text, self._lock))
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help_text, buckets, self._lock))
+
+    def add_collector(self, collect):
+        """
+        Call `collect()` before each export.
+        """
+        self._collectors.append(collect)
+
+    def render_prometheus(self):
+        """
+        Return all metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            self._collect()
+            lines = []
+            for metric in self.metrics:
+                lines.append(f'# HELP {metric.name} {metric.help}')
+                lines.append(f'# TYPE {metric.name} {metric.type}')
+                lines.extend(metric.render())
+            return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """
+        Return a JSON-compatible summary: run time, requests per second per stage and every metric.
+        """
+        with self._lock:
+            self._collect()
+            elapsed = time.time() - self.started
+            per_stage = {}
+            for key, value in REQUESTS.values.items():
+                stage = dict(key).get('stage')
+                per_stage[stage] = per_stage.get(stage, 0) + value
+            return {
+                'elapsed_seconds': round(elapsed, 3),
+                'requests_per_second': {
+                    stage: round(count / elapsed, 3) if elapsed else 0.0 for stage, count in sorted(per_stage.items())
+                },
+                'metrics': {metric.name: metric.summary() for metric in self.metrics if metric.values},
+            }
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def _collect(self):
+        for collect in self._collectors:
+            collect()
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.counter('dogcat_requests_total', 'HTTP requests by stage and status code or error class.')
+REQUEST_ERRORS = REGISTRY.counter('dogcat_request_errors_total', 'Failed HTTP requests by stage and error class.')
+REQUEST_SECONDS = REGISTRY.histogram('dogcat_request_duration_seconds', 'HTTP request latency in seconds.')
+DOWNLOADED_BYTES = REGISTRY.counter('dogcat_downloaded_bytes_total', 'Response body bytes downloaded.')
+PARSE_SECONDS = REGISTRY.histogram('dogcat_parse_duration_seconds', 'Page parse time in seconds.', PARSE_BUCKETS)
+QUEUE_DEPTH = REGISTRY.gauge('dogcat_queue_depth', 'Items waiting in a work queue.')
+ITEMS = REGISTRY.counter('dogcat_items_total', 'Processed items by stage and result.')
+
+
+class RequestTracker:
+    """
+    Filled in by the caller inside track_request(): the response status and body size.
+    """
+
+    def __init__(self):
+        self.status = None
+        self.bytes = 0
+
+
+@contextmanager
+def track_request(stage):
+    """
+    Record latency, status or error class, and body size of the request made in the `with` block.
+
+    A cancelled request (e.g. the losing half of a hedged pair) is not recorded.
+    """
+    tracker = RequestTracker()
+    start = time.perf_counter()
+    try:
+        yield tracker
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        _record_request(stage, tracker, time.perf_counter() - start, e)
+        raise
+    else:
+        _record_request(stage, tracker, time.perf_counter() - start, None)
+
+
+def _record_request(stage, tracker, latency, error):
+    REQUEST_SECONDS.observe(latency, stage=stage)
+    if tracker.status is not None and tracker.status >= 400:
+        error_class = f'http_{tracker.status}'
+    elif error is not None:
+        error_class = type(error).__name__
+    else:
+        error_class = None
+    REQUESTS.inc(stage=stage, status=str(tracker.status) if tracker.status is not None else error_class)
+    if error_class is not None:
+        REQUEST_ERRORS.inc(stage=stage, error=error_class)
+    if tracker.bytes:
+        DOWNLOADED_BYTES.inc(tracker.bytes, stage=stage)
+
+
+def collect_counters(stage, counters):
+    """
+    Export a script's counters dict as dogcat_items_total{stage, result}.
+    """
+    def collect():
+        for result, value in counters.items():
+            ITEMS.values[_label_key({'stage': stage, 'result': result})] = value
+    REGISTRY.add_collector(collect)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = REGISTRY.render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port):
+    """
+    Serve the metrics in the Prometheus text format on `port` from a background thread.
+
+    Returns:
+        ThreadingHTTPServer: The server; call shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer(('', port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Serving metrics on http://localhost:{port}/metrics")
+    return server
+
+
+def _write_atomic(path, text):
+    output_dir = os.path.dirname(path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def log_summary():
+    """
+    Log requests, request rate, p95 latency and bytes per stage.
+    """
+    summary = REGISTRY.summary()
+    latencies = summary['metrics'].get(REQUEST_SECONDS.name, {})
+    downloaded = summary['metrics'].get(DOWNLOADED_BYTES.name, {})
+    for stage, rate in summary['requests_per_second'].items():
+        labels = _summary_key(_label_key({'stage': stage}))
+        latency = latencies.get(labels, {})
+        megabytes = downloaded.get(labels, 0) / (1024 * 1024)
+        logger.info(
+            f"Metrics: {stage}: {latency.get('count', 0)} requests ({rate:.1f}/s), "
+            f"p95 latency {latency.get('p95', 0.0):.3f}s, {megabytes:.1f} MB downloaded"
+        )
+
+
+def add_metrics_arguments(parser):
+    """
+    Add the --metrics-port, --metrics-file and --metrics-json options to an argument parser.
+    """
+    parser.add_argument(
+        '--metrics-port',
+        type=int,
+        help='Serve Prometheus metrics over HTTP on this port while running (default: disabled)'
+    )
+    parser.add_argument(
+        '--metrics-file',
+        help='Write Prometheus metrics in the text format to this file at exit (default: disabled)'
+    )
+    parser.add_argument(
+        '--metrics-json',
+        help='Write a JSON summary of the metrics to this file at exit (default: disabled)'
+    )
+
+
+@contextmanager
+def metrics_from_args(args):
+    """
+    Serve metrics during the `with` block as configured by the add_metrics_arguments()
+    options, then log a summary and write the metrics files.
+    """
+    server = start_http_server(args.metrics_port) if args.metrics_port else None
+    try:
+        yield REGISTRY
+    finally:
+        if server is not None:
+            server.shutdown()
+        log_summary()
+        if args.metrics_file:
+            _write_atomic(args.metrics_file, REGISTRY.render_prometheus())
+            logger.info(f"Wrote Prometheus metrics to {args.metrics_file}")
+        if args.metrics_json:
+            _write_atomic(args.metrics_json, json.dumps(REGISTRY.summary(), indent=4) + '\n')
+            logger.info(f"Wrote metrics summary to {args.metrics_json}")
@@ -0,0 +1,99 @@
+"""
+NDJSON (JSON Lines) Profile I/O
+
+Streaming counterparts of the JSON array written by adoption_profiles_scraper.py:
+NdjsonWriter appends one profile per line as soon as it is extracted, and
+iter_profiles() reads profiles one at a time from either format, so no stage has
+to hold the whole dataset in memory.
+"""
+
+import json
+import os
+import time
+
+NDJSON_EXTENSIONS = ('.ndjson', '.jsonl')
+
+
+def is_ndjson_path(path):
+    """
+    Return True if `path` has an NDJSON / JSON Lines extension.
+    """
+    return str(path).lower().endswith(NDJSON_EXTENSIONS)
+
+
+class NdjsonWriter:
+    """
+    Appends records to an NDJSON file, one JSON object per line.
+
+    Each line is flushed as it is written; the file is fsynced every `fsync_every`
+    records or `fsync_interval` seconds (whichever comes first) and on close(),
+    so a crash loses at most the last few records.
+
+    It has an append() method so it can be passed wherever a results list is expected.
+    """
+
+    def __init__(self, path, fsync_every=100, fsync_interval=5.0):
+        output_dir = os.path.dirname(str(path))
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        self.path = str(path)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.count = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._file = open(self.path, 'w', encoding='utf-8')
+
+    def append(self, record):
+        """
+        Write one record as a line.
+        """
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        self.count += 1
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self._sync()
+
+    def close(self):
+        """
+        Fsync and close the file.
+        """
+        self._sync()
+        self._file.close()
+
+    def __len__(self):
+        return self.count
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+
+def iter_profiles(path):
+    """
+    Yield the profiles stored in a JSON array file or an NDJSON file.
+
+    NDJSON files (detected by extension or by content not starting with '[')
+    are read line by line; JSON arrays are loaded with json.load().
+
+    Args:
+        path (str): Path to the profiles file.
+
+    Yields:
+        dict: One profile record at a time.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if not is_ndjson_path(path):
+            first = f.read(1)
+            while first.isspace():
+                first = f.read(1)
+            f.seek(0)
+            if first == '[':
+                yield from json.load(f)
+                return
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
@@ -0,0 +1,241 @@
+"""
+Raw Page Cache
+
+An on-disk, content-addressed cache of raw HTML responses, shared by the listing
+and profile scrapers. It lets extraction be rerun (and benchmarked) at disk speed
+without hitting dogcat.com.ua, and with --offline replays a previous run entirely
+from disk.
+
+Layout:
+    <cache_dir>/index.db                  SQLite index: URL -> content hash, fetch/access
+                                          times and ETag/Last-Modified.
+    <cache_dir>/objects/ab/abcdef....gz   Gzip-compressed page bodies named by the
+                                          sha256 of the body. Identical pages are stored once.
+
+Entries older than the TTL (one hour by default, so new listings show up on
+the next run) are not served (except in offline mode) and are removed on
+close(); if the compressed size exceeds the size limit, the least recently used
+entries are removed until it fits. Access times are written in batches rather
+than on every hit.
+"""
+
+import gzip
+import hashlib
+import os
+import sqlite3
+import time
+from collections import namedtuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url           TEXT PRIMARY KEY,
+    hash          TEXT NOT NULL,
+    fetched_at    REAL NOT NULL,
+    accessed_at   REAL NOT NULL,
+    etag          TEXT,
+    last_modified TEXT
+);
+CREATE INDEX IF NOT EXISTS pages_hash ON pages (hash);
+CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at);
+CREATE TABLE IF NOT EXISTS objects (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+);
+"""
+
+# Seconds after which a cached page is refetched
+DEFAULT_TTL = 3600
+
+# Access times are written once this many are pending or this many seconds have passed
+_ACCESS_BATCH_SIZE = 500
+_ACCESS_FLUSH_INTERVAL = 30.0
+
+# A cached response body with the validators it was served with
+CachedPage = namedtuple('CachedPage', ['text', 'etag', 'last_modified', 'fetched_at'])
+
+
+class PageNotCached(LookupError):
+    """
+    Raised in offline mode when a page is not in the cache.
+    """
+
+
+class PageCache:
+    """
+    Content-addressed cache of raw page bodies keyed by URL.
+
+    Args:
+        cache_dir (str): Directory holding the index and the objects.
+        ttl (float, optional): Seconds after which an entry is stale (default: DEFAULT_TTL;
+            None for never).
+        max_bytes (int, optional): Limit on the compressed size of all objects.
+        offline (bool): Serve only from the cache; stale entries are served too.
+    """
+
+    def __init__(self, cache_dir, ttl=DEFAULT_TTL, max_bytes=None, offline=False):
+        self.cache_dir = str(cache_dir)
+        self.objects_dir = os.path.join(self.cache_dir, 'objects')
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self._accessed = {}  # url -> access time not yet written to the index
+        self._accessed_flushed = time.monotonic()
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(self.cache_dir, 'index.db'))
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, url):
+        """
+        Return the cached page for `url`, or None if it is missing or stale.
+        """
+        row = self._conn.execute(
+            'SELECT hash, fetched_at, etag, last_modified FROM pages WHERE url = ?', (url,)
+        ).fetchone()
+        if row is None or (not self.offline and self._is_stale(row[1])):
+            self.misses += 1
+            return None
+        page_hash, fetched_at, etag, last_modified = row
+        try:
+            with gzip.open(self._object_path(page_hash), 'rb') as f:
+                text = f.read().decode('utf-8')
+        except OSError:
+            self.misses += 1
+            return None
+        self._accessed[url] = time.time()
+        if len(self._accessed) >= _ACCESS_BATCH_SIZE \
+                or time.monotonic() - self._accessed_flushed >= _ACCESS_FLUSH_INTERVAL:
+            self.flush_access_times()
+        self.hits += 1
+        return CachedPage(text, etag, last_modified, fetched_at)
+
+    def put(self, url, text, etag=None, last_modified=None):
+        """
+        Store the body of a freshly fetched page.
+        """
+        data = text.encode('utf-8')
+        page_hash = hashlib.sha256(data).hexdigest()
+        if self._conn.execute('SELECT 1 FROM objects WHERE hash = ?', (page_hash,)).fetchone() is None:
+            object_path = self._object_path(page_hash)
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            compressed = gzip.compress(data)
+            tmp_path = object_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(compressed)
+            os.replace(tmp_path, object_path)
+            self._conn.execute('INSERT INTO objects (hash, size) VALUES (?, ?)', (page_hash, len(compressed)))
+        now = time.time()
+        self._accessed.pop(url, None)
+        self._conn.execute(
+            'INSERT OR REPLACE INTO pages (url, hash, fetched_at, accessed_at, etag, last_modified) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (url, page_hash, now, now, etag, last_modified)
+        )
+        self._conn.commit()
+
+    def flush_access_times(self):
+        """
+        Write the pending access times of cache hits to the index in one transaction.
+        """
+        if self._accessed:
+            with self._conn:
+                self._conn.executemany(
+                    'UPDATE pages SET accessed_at = ? WHERE url = ?',
+                    [(accessed_at, url) for url, accessed_at in self._accessed.items()]
+                )
+            self._accessed = {}
+        self._accessed_flushed = time.monotonic()
+
+    def evict(self):
+        """
+        Remove stale entries, then least recently used ones while over the size limit,
+        and delete objects no longer referenced by any URL.
+        """
+        self.flush_access_times()
+        if self.offline:
+            # Never throw away the data an offline run replays from
+            return
+        if self.ttl is not None:
+            self._conn.execute('DELETE FROM pages WHERE fetched_at < ?', (time.time() - self.ttl,))
+        self._delete_unreferenced()
+        if self.max_bytes is not None:
+            total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM objects').fetchone()[0]
+            if total > self.max_bytes:
+                urls = self._conn.execute('SELECT url FROM pages ORDER BY accessed_at').fetchall()
+                for (url,) in urls:
+                    self._conn.execute('DELETE FROM pages WHERE url = ?', (url,))
+                    total -= self._delete_unreferenced()
+                    if total <= self.max_bytes:
+                        break
+        self._conn.commit()
+
+    def close(self):
+        """
+        Evict expired and excess entries and close the index.
+        """
+        self.evict()
+        self._conn.close()
+
+    def _is_stale(self, fetched_at):
+        return self.ttl is not None and time.time() - fetched_at > self.ttl
+
+    def _object_path(self, page_hash):
+        return os.path.join(self.objects_dir, page_hash[:2], page_hash + '.gz')
+
+    def _delete_unreferenced(self):
+        # Returns the number of bytes freed
+        rows = self._conn.execute(
+            'SELECT hash, size FROM objects WHERE hash NOT IN (SELECT hash FROM pages)'
+        ).fetchall()
+        freed = 0
+        for page_hash, size in rows:
+            try:
+                os.remove(self._object_path(page_hash))
+            except OSError:
+                pass
+            self._conn.execute('DELETE FROM objects WHERE hash = ?', (page_hash,))
+            freed += size
+        return freed
+
+
+def add_cache_arguments(parser):
+    """
+    Add the --cache-dir, --cache-ttl, --cache-max-mb and --offline options to an argument parser.
+    """
+    parser.add_argument(
+        '--cache-dir',
+        help='Directory for the raw page cache (default: disabled)'
+    )
+    parser.add_argument(
+        '--cache-ttl',
+        type=float,
+        default=DEFAULT_TTL,
+        help=f'Seconds after which cached pages are refetched (default: {DEFAULT_TTL})'
+    )
+    parser.add_argument(
+        '--cache-max-mb',
+        type=float,
+        help='Limit on the compressed cache size in MB; least recently used pages are evicted '
+             '(default: unlimited)'
+    )
+    parser.add_argument(
+        '--offline',
+        action='store_true',
+        help='Replay pages from --cache-dir only, without network requests'
+    )
+
+
+def open_cache(args):
+    """
+    Open the page cache configured by the add_cache_arguments() options.
+
+    Returns:
+        PageCache or None: The cache, or None if --cache-dir was not given.
+    """
+    if args.offline and not args.cache_dir:
+        raise SystemExit('--offline requires --cache-dir')
+    if not args.cache_dir:
+        return None
+    max_bytes = int(args.cache_max_mb * 1024 * 1024) if args.cache_max_mb is not None else None
+    return PageCache(args.cache_dir, args.cache_ttl, max_bytes, args.offline)
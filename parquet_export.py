@@ -0,0 +1,242 @@
+"""
+Parquet Export
+
+Writes the listing rows (data.csv) and the adoption profiles (adoption_profiles.json
+or .ndjson) of a data directory as Parquet files next to them:
+
+    data.parquet                 pet_id, link, name, sex, age, photo_url
+    adoption_profiles.parquet    pet_id, link, name, age, gender, photos, videos,
+                                 about, history
+
+Analytics jobs can then read only the columns they need, and the files are
+compressed (zstd by default), instead of parsing the whole CSV or JSON array.
+Each column has a single type:
+- `photos`, `videos` and `about` are list<string> columns.
+- The low-cardinality `sex`, `gender` and `age` columns are dictionary encoded,
+  both in the file and when read back (as Arrow dictionary / pandas category
+  columns).
+- `pet_id` is kept as a string, as in the CSV and JSON, so both files join on it
+  directly.
+
+Records are written in row groups of --row-group-size rows, so NDJSON profiles
+are converted without loading the whole file. The Parquet statistics of each row
+group let readers skip groups when filtering by pet_id.
+
+Used by pipeline.py --parquet, or run on its own to convert an existing data
+directory. Needs pyarrow (pip install pyarrow).
+
+Command-line arguments:
+    data_dir            Directory with data.csv and adoption_profiles.json/.ndjson
+                        (default: ./data/cats).
+    --compression       Parquet compression codec: zstd, snappy, gzip or none (default: zstd).
+    --row-group-size    Rows per row group (default: 65536).
+
+Example usage:
+    python parquet_export.py ./data/cats
+"""
+
+import argparse
+import csv
+import itertools
+import logging
+import os
+
+from ndjson_io import iter_profiles
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+LISTING_PARQUET_NAME = 'data.parquet'
+PROFILES_PARQUET_NAME = 'adoption_profiles.parquet'
+
+COMPRESSIONS = ('zstd', 'snappy', 'gzip', 'none')
+DEFAULT_COMPRESSION = 'zstd'
+DEFAULT_ROW_GROUP_SIZE = 65536
+
+# Columns with few distinct values, dictionary encoded; every other column is stored plain
+DICTIONARY_COLUMNS = ('sex', 'gender', 'age')
+
+
+def require_pyarrow():
+    """
+    Raise ImportError if pyarrow is not installed.
+    """
+    if pa is None:
+        raise ImportError("Parquet export needs pyarrow (pip install pyarrow)")
+
+
+def _column_type(name, value_type):
+    if name in DICTIONARY_COLUMNS:
+        return pa.dictionary(pa.int32(), pa.string())
+    return value_type
+
+
+def listing_schema():
+    """
+    Return the Arrow schema of the listing rows.
+    """
+    return pa.schema([
+        (name, _column_type(name, pa.string()))
+        for name in ('pet_id', 'link', 'name', 'sex', 'age', 'photo_url')
+    ])
+
+
+def profile_schema():
+    """
+    Return the Arrow schema of the profile records (see build_profile_record()).
+    """
+    return pa.schema([
+        ('pet_id', pa.string()),
+        ('link', pa.string()),
+        ('name', pa.string()),
+        ('age', _column_type('age', pa.string())),
+        ('gender', _column_type('gender', pa.string())),
+        ('photos', pa.list_(pa.string())),
+        ('videos', pa.list_(pa.string())),
+        ('about', pa.list_(pa.string())),
+        ('history', pa.string()),
+    ])
+
+
+def write_parquet(records, output_path, schema, compression=DEFAULT_COMPRESSION,
+                  row_group_size=DEFAULT_ROW_GROUP_SIZE):
+    """
+    Write `records` to a Parquet file with `schema`, one row group at a time.
+
+    The file is written under a temporary name and renamed once complete.
+
+    Args:
+        records (iterable[dict]): Rows to write; keys missing from a row are written as nulls.
+        output_path (str): Path of the Parquet file.
+        schema (pyarrow.Schema): Columns of the file.
+        compression (str): Compression codec (see COMPRESSIONS).
+        row_group_size (int): Rows per row group.
+
+    Returns:
+        int: Number of rows written.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+    """
+    require_pyarrow()
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    names = schema.names
+    tmp_path = output_path + '.part'
+    count = 0
+    records = iter(records)
+    with pq.ParquetWriter(
+        tmp_path, schema, compression=compression,
+        use_dictionary=[name for name in names if name in DICTIONARY_COLUMNS],
+    ) as writer:
+        while True:
+            batch = list(itertools.islice(records, row_group_size))
+            if not batch:
+                break
+            table = pa.Table.from_pylist([{name: row.get(name) for name in names} for row in batch], schema)
+            writer.write_table(table, row_group_size=row_group_size)
+            count += len(batch)
+    os.replace(tmp_path, output_path)
+    logger.info(f"Successfully wrote {count} rows to {output_path}")
+    return count
+
+
+def iter_listing_rows(csv_path):
+    """
+    Yield the rows of a listing CSV written by animal_list_scraper.write_csv().
+    """
+    with open(csv_path, newline='', encoding='utf-8') as csvfile:
+        yield from csv.DictReader(csvfile)
+
+
+def find_profiles_path(data_dir):
+    """
+    Return the profiles file of a data directory (adoption_profiles.json or .ndjson,
+    the newer one if both exist), or None.
+    """
+    paths = [os.path.join(data_dir, name) for name in ('adoption_profiles.json', 'adoption_profiles.ndjson')]
+    paths = [path for path in paths if os.path.exists(path)]
+    return max(paths, key=os.path.getmtime, default=None)
+
+
+def export_data_dir(data_dir, listings=None, profiles=None, compression=DEFAULT_COMPRESSION,
+                    row_group_size=DEFAULT_ROW_GROUP_SIZE):
+    """
+    Write data.parquet and adoption_profiles.parquet in `data_dir`.
+
+    Args:
+        data_dir (str): The data directory.
+        listings (iterable[dict], optional): Listing rows (default: read from data.csv).
+        profiles (iterable[dict], optional): Profile records (default: read from the
+            profiles JSON or NDJSON file).
+        compression (str): Compression codec (see COMPRESSIONS).
+        row_group_size (int): Rows per row group.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+    """
+    require_pyarrow()
+    compression = None if compression == 'none' else compression
+    if listings is None:
+        csv_path = os.path.join(data_dir, 'data.csv')
+        if os.path.exists(csv_path):
+            listings = iter_listing_rows(csv_path)
+        else:
+            logger.warning(f"No listing CSV at {csv_path}, skipping.")
+    if listings is not None:
+        write_parquet(listings, os.path.join(data_dir, LISTING_PARQUET_NAME), listing_schema(), compression,
+                      row_group_size)
+
+    if profiles is None:
+        profiles_path = find_profiles_path(data_dir)
+        if profiles_path is not None:
+            profiles = iter_profiles(profiles_path)
+        else:
+            logger.warning(f"No profiles file in {data_dir}, skipping.")
+    if profiles is not None:
+        write_parquet(profiles, os.path.join(data_dir, PROFILES_PARQUET_NAME), profile_schema(), compression,
+                      row_group_size)
+
+
+def add_parquet_arguments(parser):
+    """
+    Add the --compression and --row-group-size options to an argument parser.
+    """
+    parser.add_argument(
+        '--compression',
+        choices=COMPRESSIONS,
+        default=DEFAULT_COMPRESSION,
+        help=f'Parquet compression codec (default: {DEFAULT_COMPRESSION})'
+    )
+    parser.add_argument(
+        '--row-group-size',
+        type=int,
+        default=DEFAULT_ROW_GROUP_SIZE,
+        help=f'Rows per Parquet row group (default: {DEFAULT_ROW_GROUP_SIZE})'
+    )
+
+
+def main():
+    """
+    Entry point: parse command-line arguments and export the data directory.
+    """
+    logging.basicConfig(level=logging.INFO, format="%(levelname)-8s %(message)s")
+
+    parser = argparse.ArgumentParser(description="Export listing rows and adoption profiles to Parquet")
+    parser.add_argument('data_dir', nargs='?', default='./data/cats',
+                        help='Directory with data.csv and the profiles file')
+    add_parquet_arguments(parser)
+    args = parser.parse_args()
+
+    export_data_dir(args.data_dir, compression=args.compression, row_group_size=args.row_group_size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Photo Manifest
+
+Keeps track of the photos that have been completely downloaded into a `photos/`
+directory, so reruns of adoption_photos_downloader.py can skip them.
+
+The manifest is an append-only JSON Lines file (`photos/manifest.jsonl`). Each
+line describes one saved file:
+
+    {"path": "1728/photo1.jpg", "url": "https://...", "size": 48213,
+     "etag": "\"5f1c-...\"", "last_modified": "...", "sha256": "..."}
+
+Photos checked by photo_processing.py also have "valid", "format", "width",
+"height" and "thumbnail" (or "error" if they did not decode).
+
+A line is only appended after the file has been fully written, so a file left
+behind by a crashed run has no entry and is downloaded again. When a path
+appears more than once, the last line wins; close() compacts the file.
+"""
+
+import json
+import os
+
+MANIFEST_NAME = 'manifest.jsonl'
+
+
+class PhotoManifest:
+    """
+    Record of completely downloaded photos in one `photos/` directory.
+    """
+
+    def __init__(self, photos_dir):
+        self.photos_dir = str(photos_dir)
+        self.path = os.path.join(self.photos_dir, MANIFEST_NAME)
+        self.entries = {}
+        self.by_url = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Last line of a crashed run may be cut short
+                        continue
+                    self.entries[entry['path']] = entry
+                    self.by_url[entry['url']] = entry
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def relative_path(self, output_path):
+        """
+        Return the manifest key (path relative to the photos directory) of `output_path`.
+        """
+        return os.path.relpath(output_path, self.photos_dir).replace(os.sep, '/')
+
+    def get(self, output_path):
+        """
+        Return the manifest entry for `output_path`, or None.
+        """
+        return self.entries.get(self.relative_path(output_path))
+
+    def find_url(self, url):
+        """
+        Return the latest entry of a file downloaded from `url` (for any path), or None.
+        """
+        return self.by_url.get(url)
+
+    def is_complete(self, url, output_path):
+        """
+        Return True if `output_path` was completely downloaded from `url`, is
+        still on disk with the recorded size and was not found to be an invalid image.
+        """
+        entry = self.get(output_path)
+        if not entry or entry['url'] != url or entry.get('valid') is False:
+            return False
+        try:
+            return os.path.getsize(output_path) == entry['size']
+        except OSError:
+            return False
+
+    def add(self, url, output_path, size, sha256, etag=None, last_modified=None):
+        """
+        Record a completely downloaded file.
+        """
+        entry = {
+            'path': self.relative_path(output_path),
+            'url': url,
+            'size': size,
+            'etag': etag,
+            'last_modified': last_modified,
+            'sha256': sha256,
+        }
+        self.entries[entry['path']] = entry
+        self.by_url[url] = entry
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def update(self, output_path, **fields):
+        """
+        Add `fields` (e.g. image dimensions) to the entry of a recorded file.
+        """
+        entry = self.get(output_path)
+        if entry is None:
+            return
+        entry.update(fields)
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def close(self):
+        """
+        Close the manifest, rewriting it with one line per file.
+        """
+        self._file.close()
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        os.replace(tmp_path, self.path)
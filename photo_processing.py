@@ -0,0 +1,234 @@
+"""
+Photo Verification and Thumbnails
+
+A post-download stage that checks every downloaded photo in a process pool:
+
+- The image is fully decoded, so a truncated download or an HTML error page
+  saved as .jpg is caught. Its format, width and height are recorded in
+  photos/manifest.jsonl.
+- A WebP thumbnail, at most --thumbnail-size pixels on its longer side, is
+  written to thumbnails/<pet_id>/<name>.webp next to the photos directory, so
+  frontends do not have to resize the originals.
+
+Photos are handed to the stage as soon as they are downloaded and decoded in
+worker processes, so the downloads carry on while earlier photos are checked.
+The stage only holds the downloads back when more photos are waiting than it
+can queue. A photo that does not decode is deleted and marked invalid in the
+manifest, so the next run downloads it again.
+
+Needs Pillow (pip install Pillow), with WebP support for thumbnails.
+"""
+
+import asyncio
+import logging
+import os
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional dependency
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+THUMBNAILS_NAME = 'thumbnails'
+
+ImageOptions = namedtuple('ImageOptions', ['workers', 'thumbnail_size'])
+
+DEFAULT_IMAGE_OPTIONS = ImageOptions(workers=None, thumbnail_size=320)
+
+# Photos queued for the pool per worker before downloads wait for it
+_PENDING_PER_WORKER = 16
+
+
+def inspect_photo(path, thumbnail_path=None, thumbnail_size=DEFAULT_IMAGE_OPTIONS.thumbnail_size):
+    """
+    Decode a photo and optionally write its WebP thumbnail. Runs in a worker process.
+
+    Args:
+        path (str): The photo.
+        thumbnail_path (str, optional): Where to write the thumbnail (default: no thumbnail).
+        thumbnail_size (int): Longest side of the thumbnail in pixels.
+
+    Returns:
+        dict: {'valid': True, 'format', 'width', 'height'} or {'valid': False, 'error'}.
+    """
+    try:
+        with Image.open(path) as image:
+            image.load()  # decodes the whole image, so truncated files fail here
+            info = {'valid': True, 'format': image.format, 'width': image.width, 'height': image.height}
+            if thumbnail_path:
+                thumbnail = ImageOps.exif_transpose(image)
+                thumbnail.thumbnail((thumbnail_size, thumbnail_size))
+                if thumbnail.mode not in ('RGB', 'RGBA'):
+                    has_alpha = 'A' in thumbnail.mode or 'transparency' in thumbnail.info
+                    thumbnail = thumbnail.convert('RGBA' if has_alpha else 'RGB')
+                os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+                tmp_path = thumbnail_path + '.part'
+                thumbnail.save(tmp_path, format='WEBP', quality=80)
+                os.replace(tmp_path, thumbnail_path)
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+        return {'valid': False, 'error': str(e) or type(e).__name__}
+    return info
+
+
+class PhotoProcessor:
+    """
+    Verifies downloaded photos and writes their thumbnails in a process pool.
+
+    Args:
+        photos_dir (str): The 'photos' directory; thumbnails go to a sibling 'thumbnails' directory.
+        manifest (PhotoManifest): Record of downloads the results are written to.
+        options (ImageOptions, optional): Pool size and thumbnail size (default: DEFAULT_IMAGE_OPTIONS).
+        dead_letter (DeadLetterFile, optional): Record of photos that did not decode.
+
+    Raises:
+        ImportError: If Pillow is not installed.
+    """
+
+    def __init__(self, photos_dir, manifest, options=None, dead_letter=None):
+        if Image is None:
+            raise ImportError("Photo verification needs Pillow (pip install Pillow)")
+        options = options or DEFAULT_IMAGE_OPTIONS
+        self.photos_dir = str(photos_dir)
+        self.thumbnails_dir = os.path.join(os.path.dirname(os.path.abspath(self.photos_dir)), THUMBNAILS_NAME)
+        self.thumbnail_size = options.thumbnail_size
+        self.manifest = manifest
+        self.dead_letter = dead_letter
+        self.counts = Counter()
+        workers = options.workers or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+        self._slots = asyncio.Semaphore(workers * _PENDING_PER_WORKER)
+        self._tasks = set()
+
+    def thumbnail_path(self, output_path):
+        """
+        Return the path of the thumbnail of `output_path`, or None if thumbnails are disabled.
+        """
+        if not self.thumbnail_size:
+            return None
+        relative = os.path.relpath(output_path, self.photos_dir)
+        return os.path.join(self.thumbnails_dir, os.path.splitext(relative)[0] + '.webp')
+
+    def needs_processing(self, output_path, outcome):
+        """
+        Return True if a photo with download outcome `outcome` should be (re)checked.
+
+        New files always are; photos kept from an earlier run only if they were
+        never checked or their thumbnail is missing.
+        """
+        if outcome == 'failed':
+            return False
+        if outcome != 'skipped':
+            return True
+        entry = self.manifest.get(output_path)
+        if entry is None or 'valid' not in entry:
+            return True
+        thumbnail_path = self.thumbnail_path(output_path)
+        return entry['valid'] and thumbnail_path is not None and not os.path.exists(thumbnail_path)
+
+    async def submit(self, pet_id, url, output_path, outcome):
+        """
+        Queue a photo for checking; returns once it is queued, not when it is checked.
+
+        Args:
+            pet_id (str): ID of the pet the photo belongs to.
+            url (str): URL the photo was downloaded from.
+            output_path (str): The photo.
+            outcome (str): Result of download_photo() for it.
+        """
+        if not self.needs_processing(output_path, outcome):
+            return
+        await self._slots.acquire()
+        task = asyncio.ensure_future(self._process(pet_id, url, output_path))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, pet_id, url, output_path):
+        try:
+            thumbnail_path = self.thumbnail_path(output_path)
+            info = await asyncio.get_running_loop().run_in_executor(
+                self._executor, inspect_photo, output_path, thumbnail_path, self.thumbnail_size
+            )
+            if info['valid']:
+                self.counts['valid'] += 1
+                if thumbnail_path is not None:
+                    self.counts['thumbnails'] += 1
+                    info['thumbnail'] = os.path.relpath(thumbnail_path, self.thumbnails_dir).replace(os.sep, '/')
+                self.manifest.update(output_path, **info)
+                return
+            self.counts['invalid'] += 1
+            logger.warning(f"Not a valid image, removing {output_path} ({url}): {info['error']}")
+            self.manifest.update(output_path, **info)
+            try:
+                os.remove(output_path)
+            except OSError:
+                pass
+            if self.dead_letter is not None:
+                self.dead_letter.add({'pet_id': pet_id, 'photos': [url]})
+        except Exception as e:
+            self.counts['errors'] += 1
+            logger.error(f"Error checking {output_path}: {e or type(e).__name__}")
+        finally:
+            self._slots.release()
+
+    async def join(self):
+        """
+        Wait until every queued photo has been checked.
+        """
+        while self._tasks:
+            await asyncio.gather(*self._tasks)
+
+    def close(self):
+        """
+        Cancel photos still queued and shut the process pool down.
+        """
+        for task in self._tasks:
+            task.cancel()
+        self._executor.shutdown()
+
+    def log_summary(self):
+        """
+        Log how many photos were checked and how many were not valid images.
+        """
+        logger.info(
+            f"Photo check: {self.counts['valid']} valid, {self.counts['invalid']} invalid (removed), "
+            f"{self.counts['thumbnails']} thumbnails written to {self.thumbnails_dir}"
+        )
+
+
+def add_image_arguments(parser):
+    """
+    Add the --verify-images, --thumbnail-size and --image-workers options to an argument parser.
+    """
+    parser.add_argument(
+        '--verify-images',
+        action='store_true',
+        help='Check that every downloaded photo decodes, record its format and size, and write '
+             'WebP thumbnails, in a process pool alongside the downloads (needs pip install Pillow)'
+    )
+    parser.add_argument(
+        '--thumbnail-size',
+        type=int,
+        default=DEFAULT_IMAGE_OPTIONS.thumbnail_size,
+        help=f'Longest side of the thumbnails in pixels, 0 for none '
+             f'(default: {DEFAULT_IMAGE_OPTIONS.thumbnail_size})'
+    )
+    parser.add_argument(
+        '--image-workers',
+        type=int,
+        help='Processes checking photos (default: one per CPU)'
+    )
+
+
+def image_options_from_args(args):
+    """
+    Return the ImageOptions configured by the add_image_arguments() options.
+
+    Returns:
+        ImageOptions or None: The options, or None if --verify-images was not given.
+    """
+    if not args.verify_images:
+        return None
+    return ImageOptions(args.image_workers, args.thumbnail_size)
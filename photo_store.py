@@ -0,0 +1,142 @@
+"""
+Content-Addressed Photo Store
+
+Keeps one copy of every distinct photo, named by the sha256 of its content,
+under two-character hash-prefix shard directories:
+
+    <store>/3f/3fa4c2...e91   (the sha256 hex digest of the file)
+
+The per-pet files in `photos/<pet_id>/` are hard links to these blobs, so a photo
+shown on several pets, or re-uploaded under a new URL, takes disk space once.
+photos/manifest.jsonl records the sha256 of every per-pet file and so is the
+index from pet_id to blobs; whether a blob is stored, or a file is intact, is a
+single path lookup.
+
+A photo whose URL was already downloaded (for another pet) is linked from the
+store without a request. Where hard links are not supported (e.g. the store is
+on another file system), blobs are copied instead: the store stays consistent,
+but the disk saving is lost.
+"""
+
+import logging
+import os
+import shutil
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class PhotoStore:
+    """
+    Directory of photos named by the sha256 of their content.
+
+    Args:
+        root (str): Directory of the store, created if needed.
+    """
+
+    def __init__(self, root):
+        self.root = str(root)
+        os.makedirs(self.root, exist_ok=True)
+        self.deduplicated = 0
+        self.saved_bytes = 0
+
+    def blob_path(self, sha256):
+        """
+        Return the path of the blob with digest `sha256`.
+        """
+        return os.path.join(self.root, sha256[:2], sha256)
+
+    def has(self, sha256):
+        """
+        Return True if a blob with digest `sha256` is stored.
+        """
+        return os.path.exists(self.blob_path(sha256))
+
+    def adopt(self, path, sha256):
+        """
+        Move a downloaded file into the store, leaving a link to its blob at `path`.
+
+        If the store already has the content, the downloaded copy is replaced with
+        a link to the existing blob.
+
+        Args:
+            path (str): The downloaded file.
+            sha256 (str): Its sha256 hex digest.
+
+        Returns:
+            bool: True if the content was already stored.
+        """
+        blob = self.blob_path(sha256)
+        if os.path.exists(blob):
+            self.reuse(sha256, path)
+            return True
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        # Two downloads of the same content may race here; both write identical blobs
+        _link_or_copy(path, blob)
+        return False
+
+    def link(self, sha256, path):
+        """
+        Place the blob with digest `sha256` at `path`, replacing any file there.
+
+        Returns:
+            int: Size of the blob in bytes.
+        """
+        blob = self.blob_path(sha256)
+        _link_or_copy(blob, path)
+        return os.path.getsize(blob)
+
+    def reuse(self, sha256, path):
+        """
+        Place the stored blob `sha256` at `path` instead of a download of the same content.
+
+        Returns:
+            int: Size of the blob in bytes.
+        """
+        size = self.link(sha256, path)
+        self.deduplicated += 1
+        self.saved_bytes += size
+        return size
+
+    def log_summary(self):
+        """
+        Log how many downloads were already in the store.
+        """
+        if self.deduplicated:
+            logger.info(
+                f"{self.deduplicated} photos were already in the store {self.root} "
+                f"({self.saved_bytes / 1e6:.1f} MB not stored twice)"
+            )
+
+
+def _link_or_copy(source, destination):
+    # Atomically replace `destination` with a hard link to (or a copy of) `source`
+    tmp_path = f'{destination}.{uuid.uuid4().hex}.tmp'
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, destination)
+
+
+def add_store_arguments(parser):
+    """
+    Add the --store option to an argument parser.
+    """
+    parser.add_argument(
+        '--store',
+        help='Directory of a content-addressed photo store: each distinct photo is kept once, '
+             'and the per-pet files are hard links to it (default: disabled)'
+    )
+
+
+def store_from_args(args):
+    """
+    Open the photo store configured by the add_store_arguments() options.
+
+    Returns:
+        PhotoStore or None: The store, or None if --store was not given.
+    """
+    if not args.store:
+        return None
+    return PhotoStore(args.store)
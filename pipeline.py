@@ -0,0 +1,504 @@
+"""
+Single-Process Scraping Pipeline
+
+This script runs the listing crawl, profile extraction and photo download for one
+animal type in a single asyncio process. The three stages are joined by bounded
+queues, so profile fetches start as soon as the first listing card is parsed and
+photo downloads start as soon as a profile is extracted.
+
+It produces the same files as running animal_list_scraper.py,
+adoption_profiles_scraper.py and adoption_photos_downloader.py one after another:
+
+    <data_dir>/data.csv
+    <data_dir>/adoption_profiles.json   (or adoption_profiles.ndjson with --format ndjson)
+    <data_dir>/photos/<pet_id>/<filename>
+
+Items that still fail after all retries are recorded in dead-letter files in the
+same directory (failed_pages.csv, failed_profiles.csv, failed_photos.ndjson).
+
+Features:
+- Overlaps network latency across all three stages.
+- Listing pages are fetched concurrently (see animal_list_scraper --async).
+- Bounded queues keep memory flat when one stage is slower than the others.
+- One interpreter and one HTTP session for the whole run, with keep-alive
+  connections, DNS caching and optional HTTP/2 (see http_client.py).
+- Optional adaptive concurrency (--adaptive) for the profile and photo stages,
+  each with its own limit.
+- Optional per-host request rate limit (--rate, --burst) shared by all three
+  stages, so together they stay within one budget per host.
+- Connect/read/total timeouts on every request, and optional hedging (--hedge)
+  of profile fetches and photo downloads slower than the running p95.
+- Request, latency, byte, parse-time and queue metrics for all stages (see metrics.py).
+- Profile and photo URLs that are already being fetched are not requested again
+  (see single_flight.py); the number of requests saved is logged.
+- Optional content-addressed photo store (--store, see photo_store.py): each
+  distinct photo is kept once and linked into the per-pet directories.
+- Optional indexed SQLite output (--sqlite, see sqlite_sink.py), written in
+  batches as listing rows and profiles arrive.
+- Optional Parquet export (--parquet) of the listing rows and profiles for
+  analytics (see parquet_export.py).
+- Optional photo check (--verify-images, see photo_processing.py) in a process
+  pool alongside the downloads, with WebP thumbnails in thumbnails/.
+
+Command-line arguments:
+    base_url           Starting listing URL (e.g., https://dogcat.com.ua/adoption?animal=2).
+    -d, --data-dir     Directory for the CSV, JSON and photos (default: ./data/cats).
+    -n, --concurrency  Number of simultaneous requests per stage (default: 10).
+    --adaptive, --min-concurrency, --max-concurrency
+                       Adaptive concurrency options for the profile and photo stages
+                       (see adaptive_limiter.py).
+    --attempts, --backoff-base, --backoff-max
+                       Retry options (see retry_policy.py).
+    --rate, --burst    Requests per second to each host, shared by all stages (default: unlimited).
+    --connect-timeout, --read-timeout, --total-timeout
+                       Request timeouts in seconds (see timeouts.py).
+    --hedge            Hedge profile fetches and photo downloads slower than the running p95.
+    --keepalive, --dns-ttl, --http2
+                       Connection options (see http_client.py).
+    --metrics-port, --metrics-file, --metrics-json
+                       Metrics export options (see metrics.py).
+    --store            Directory of a content-addressed photo store (default: disabled).
+    --verify-images, --thumbnail-size, --image-workers
+                       Photo check and thumbnail options (see photo_processing.py).
+    --state-db         SQLite state store for incremental runs (default: disabled).
+    --parquet          Also write data.parquet and adoption_profiles.parquet (see parquet_export.py).
+    --sqlite, --sqlite-batch
+                       SQLite output options (see sqlite_sink.py).
+    -p, --parse-workers
+                       Number of processes to parse profile pages in (default: 0).
+    --parser           HTML parser backend: html.parser, lxml or selectolax (default: html.parser).
+    --format           Profiles output: json or ndjson (default: json).
+    --cache-dir, --cache-ttl, --cache-max-mb, --offline
+                       Raw page cache options (see page_cache.py).
+
+Example usage:
+    python pipeline.py \
+        "https://dogcat.com.ua/adoption?animal=2" \
+        -d ./data/cats \
+        -n 10
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import aiohttp
+
+from adaptive_limiter import AdaptiveLimiter, add_limiter_arguments, limiter_from_args
+from adoption_photos_downloader import DEAD_LETTER_NAME, download_photo, photo_output_paths
+from adoption_profiles_scraper import (
+    DEAD_LETTER_FIELDS as PROFILE_DEAD_LETTER_FIELDS, fetch_profile, log_summary, new_counters, write_profiles_json
+)
+from animal_list_scraper import (
+    DEAD_LETTER_FIELDS as PAGE_DEAD_LETTER_FIELDS, add_animal_entries, iter_animal_pages_async, write_csv
+)
+from dead_letter import DeadLetterFile
+from hedging import Hedger, add_hedge_arguments
+from html_parsers import DEFAULT_PARSER, PARSERS
+from http_client import add_client_arguments, client_options_from_args, create_async_session
+from metrics import QUEUE_DEPTH, add_metrics_arguments, collect_counters, metrics_from_args
+from ndjson_io import NdjsonWriter
+from page_cache import PageNotCached, add_cache_arguments, open_cache
+from parquet_export import export_data_dir, require_pyarrow
+from photo_manifest import PhotoManifest
+from photo_processing import PhotoProcessor, add_image_arguments, image_options_from_args
+from photo_store import add_store_arguments, store_from_args
+from rate_limiter import add_rate_arguments, rate_limiter_from_args
+from retry_policy import add_retry_arguments, policy_from_args
+from single_flight import SingleFlight
+from sqlite_sink import add_sqlite_arguments, sqlite_sink_from_args
+from state_store import StateStore
+from timeouts import add_timeout_arguments, timeouts_from_args
+
+logger = logging.getLogger(__name__)
+
+# Marker put on a queue once per worker to tell it that no more items will come
+_DONE = object()
+
+
+def setup_logging():
+    """
+    Configure logging to a file and console. Log file is named after the script
+    and stored in a 'logs' subdirectory, using append mode to avoid overwriting.
+    """
+    script_path = Path(__file__).resolve()
+    script_name = script_path.stem
+    logs_dir = script_path.parent / 'logs'
+    logs_dir.mkdir(parents=True, exist_ok=True)
+
+    log_file = logs_dir / f"{script_name}.log"
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)-8s %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+        handlers=[
+            logging.FileHandler(log_file, encoding='utf-8', mode='a'),  # append mode
+            logging.StreamHandler()
+        ]
+    )
+
+
+async def listing_stage(session, base_url, concurrency, animal_data, profile_queue, parser=DEFAULT_PARSER,
+                        cache=None, retry=None, dead_letter=None, rate_limiter=None, sink=None):
+    """
+    Crawl the listing and put every new animal entry on the profile queue.
+
+    Args:
+        session (aiohttp.ClientSession): The shared HTTP session.
+        base_url (str): URL of the first listing page.
+        concurrency (int): Maximum number of listing pages fetched at once.
+        animal_data (dict): Collected entries keyed by profile URL (filled in place).
+        profile_queue (asyncio.Queue): Queue feeding the profile stage.
+        parser (str): HTML parser backend (see html_parsers.PARSERS).
+        cache (PageCache, optional): Raw page cache.
+        retry (RetryPolicy, optional): Retry policy for transient failures.
+        dead_letter (DeadLetterFile, optional): Record of pages that could not be fetched.
+        rate_limiter (RateLimiter, optional): Per-host request rate limit.
+        sink (SqliteSink, optional): SQLite output the entries are also written to.
+    """
+    try:
+        async for page_url, cards in iter_animal_pages_async(
+            session, base_url, concurrency, parser, cache, retry, dead_letter, rate_limiter
+        ):
+            for entry in add_animal_entries(animal_data, cards):
+                if sink is not None:
+                    sink.add_listing(entry)
+                await profile_queue.put(entry)
+            logger.info(f"Processed page: {page_url}")
+    except (aiohttp.ClientError, asyncio.TimeoutError, PageNotCached) as e:
+        logger.error(f"Error fetching page {base_url}: {e or type(e).__name__}")
+
+
+async def profile_worker(session, limiter, profile_queue, photo_queue, photos_dir, results, counters,
+                         state=None, executor=None, parser=DEFAULT_PARSER, cache=None, retry=None,
+                         dead_letter=None, rate_limiter=None, hedger=None, flights=None, sink=None):
+    """
+    Fetch profiles from the profile queue and put their photos on the photo queue.
+
+    Args:
+        session (aiohttp.ClientSession): The shared HTTP session.
+        limiter (AdaptiveLimiter): Limiter for concurrent profile fetches.
+        profile_queue (asyncio.Queue): Animal entries from the listing stage.
+        photo_queue (asyncio.Queue): Queue feeding the photo stage.
+        photos_dir (Path or None): The 'photos' directory, or None to skip photo downloads.
+        results (list): Shared list of extracted profiles.
+        counters (dict): Shared profile counters.
+        state (StateStore, optional): Persistent fetch state for incremental runs.
+        executor (concurrent.futures.Executor, optional): Pool to parse profile pages in.
+        parser (str): HTML parser backend (see html_parsers.PARSERS).
+        cache (PageCache, optional): Raw page cache.
+        retry (RetryPolicy, optional): Retry policy for transient failures.
+        dead_letter (DeadLetterFile, optional): Record of profiles whose fetch failed.
+        rate_limiter (RateLimiter, optional): Per-host request rate limit.
+        hedger (Hedger, optional): Sends a duplicate request when a fetch is slow.
+        flights (SingleFlight, optional): Shares fetches of the same URL that are in flight.
+        sink (SqliteSink, optional): SQLite output the profiles are also written to.
+    """
+    while True:
+        entry = await profile_queue.get()
+        QUEUE_DEPTH.set(profile_queue.qsize(), queue='profiles')
+        if entry is _DONE:
+            return
+        counters['links'] += 1
+        logger.info(f"Fetching ({counters['links']}): {entry['link']}")
+        record = None
+        # An error must not end the worker: the listing stage would block on the full queue
+        try:
+            record = await fetch_profile(
+                session, limiter, entry['pet_id'], entry['link'], results, counters, state, executor, parser, cache,
+                retry, dead_letter, rate_limiter, hedger, flights
+            )
+            if record and sink is not None:
+                sink.add_profile(record)
+            if not record or photos_dir is None:
+                continue
+            for url, output_path in photo_output_paths(photos_dir, record['pet_id'], record['photos']):
+                await photo_queue.put((record['pet_id'], url, str(output_path)))
+        except Exception as e:
+            logger.exception(f"Unhandled error processing {entry['link']}: {e}")
+            if record is None:
+                counters['fail'] += 1
+                if dead_letter is not None:
+                    dead_letter.add({'pet_id': entry['pet_id'], 'link': entry['link']})
+
+
+async def photo_worker(session, limiter, photo_queue, manifest, retry=None, dead_letter=None, rate_limiter=None,
+                       hedger=None, store=None, flights=None, processor=None):
+    """
+    Download photos from the photo queue.
+
+    Args:
+        session (aiohttp.ClientSession): The shared HTTP session.
+        limiter (AdaptiveLimiter): Limiter for concurrent downloads.
+        photo_queue (asyncio.Queue): (pet_id, url, output_path) tuples from the profile stage.
+        manifest (PhotoManifest): Record of completed downloads; present photos are skipped.
+        retry (RetryPolicy, optional): Retry policy for transient failures.
+        dead_letter (DeadLetterFile, optional): Record of photos that could not be downloaded.
+        rate_limiter (RateLimiter, optional): Per-host request rate limit.
+        hedger (Hedger, optional): Sends a duplicate request when a download is slow.
+        store (PhotoStore, optional): Content-addressed store the photos are linked from.
+        flights (SingleFlight, optional): Shares downloads of the same URL that are in flight.
+        processor (PhotoProcessor, optional): Checks the downloaded photos and writes thumbnails.
+    """
+    while True:
+        item = await photo_queue.get()
+        QUEUE_DEPTH.set(photo_queue.qsize(), queue='photos')
+        if item is _DONE:
+            return
+        pet_id, url, output_path = item
+        # An error must not end the worker: the profile stage would block on the full queue
+        try:
+            outcome = await download_photo(
+                session, limiter, url, output_path, manifest, retry=retry, rate_limiter=rate_limiter, hedger=hedger,
+                store=store, flights=flights
+            )
+            if outcome == 'failed':
+                if dead_letter is not None:
+                    dead_letter.add({'pet_id': pet_id, 'photos': [url]})
+            elif processor is not None:
+                await processor.submit(pet_id, url, output_path, outcome)
+        except Exception as e:
+            logger.exception(f"Unhandled error processing {url}: {e}")
+            if dead_letter is not None:
+                dead_letter.add({'pet_id': pet_id, 'photos': [url]})
+
+
+async def run_pipeline(base_url, data_dir, concurrency, state_db=None, parse_workers=0,
+                       parser=DEFAULT_PARSER, cache=None, output_format='json', profile_limiter=None,
+                       photo_limiter=None, retry=None, rate_limiter=None, timeouts=None, hedge=False,
+                       client_options=None, store=None, image_options=None, parquet=False, sink=None):
+    """
+    Run the listing, profile and photo stages concurrently and write the
+    CSV and JSON outputs once all stages have finished (NDJSON profiles are
+    written as they are extracted).
+
+    Args:
+        base_url (str): URL of the first listing page.
+        data_dir (str): Directory for data.csv, the profiles file and photos/.
+        concurrency (int): Number of simultaneous requests per stage.
+        state_db (str, optional): Path to the SQLite state store for incremental runs.
+        parse_workers (int): Number of processes to parse profile pages in (0 parses on the event loop).
+        parser (str): HTML parser backend (see html_parsers.PARSERS).
+        cache (PageCache, optional): Raw page cache for listing and profile pages.
+        output_format (str): 'json' for adoption_profiles.json, 'ndjson' for adoption_profiles.ndjson.
+        profile_limiter (AdaptiveLimiter, optional): Limiter for profile fetches
+            (default: a fixed limit of `concurrency`).
+        photo_limiter (AdaptiveLimiter, optional): Limiter for photo downloads
+            (default: a fixed limit of `concurrency`).
+        retry (RetryPolicy, optional): Retry policy for transient failures of all three stages.
+        rate_limiter (RateLimiter, optional): Per-host request rate limit shared by all three stages.
+        timeouts (Timeouts, optional): Request timeouts (default: timeouts.DEFAULT_TIMEOUTS).
+        hedge (bool): Hedge profile fetches and photo downloads slower than the running p95.
+        client_options (ClientOptions, optional): Connection options (see http_client.py).
+        store (PhotoStore, optional): Content-addressed store the photos are linked from.
+        image_options (ImageOptions, optional): Check the photos and write thumbnails
+            alongside the downloads (default: no check).
+        parquet (bool): Also write the listing rows and profiles as Parquet (see parquet_export.py).
+        sink (SqliteSink, optional): SQLite output the listing rows and profiles are also
+            written to as they are extracted.
+    """
+    if parquet:
+        require_pyarrow()  # fail before the scrape rather than after it
+    photos_dir = Path(data_dir) / 'photos'
+    photos_dir.mkdir(parents=True, exist_ok=True)
+    manifest = PhotoManifest(photos_dir)
+    page_dead_letter = DeadLetterFile(os.path.join(data_dir, 'failed_pages.csv'), PAGE_DEAD_LETTER_FIELDS)
+    profile_dead_letter = DeadLetterFile(
+        os.path.join(data_dir, 'failed_profiles.csv'), PROFILE_DEAD_LETTER_FIELDS
+    )
+    photo_dead_letter = DeadLetterFile(os.path.join(data_dir, DEAD_LETTER_NAME))
+
+    animal_data = {}
+    ndjson = output_format == 'ndjson'
+    results = NdjsonWriter(os.path.join(data_dir, 'adoption_profiles.ndjson')) if ndjson else []
+    counters = new_counters()
+    collect_counters('profile', counters)
+    state = StateStore(state_db) if state_db else None
+    executor = ProcessPoolExecutor(max_workers=parse_workers) if parse_workers > 0 else None
+    profile_hedger = Hedger('Profile fetch') if hedge else None
+    photo_hedger = Hedger('Photo download') if hedge else None
+    profile_flights = SingleFlight('Profile fetch')
+    photo_flights = SingleFlight('Photo download')
+
+    # An offline replay only rebuilds the CSV and JSON from cached pages
+    photo_dest = None if cache is not None and cache.offline else photos_dir
+    if photo_dest is None:
+        logger.info("Offline mode: photos will not be downloaded.")
+    processor = None
+    if photo_dest is not None and image_options:
+        processor = PhotoProcessor(photos_dir, manifest, image_options, photo_dead_letter)
+
+    # Bounded queues apply back-pressure to the faster upstream stages
+    profile_queue = asyncio.Queue(maxsize=concurrency * 2)
+    photo_queue = asyncio.Queue(maxsize=concurrency * 4)
+    if profile_limiter is None:
+        profile_limiter = AdaptiveLimiter(concurrency, concurrency, concurrency, 'Profile fetch')
+    if photo_limiter is None:
+        photo_limiter = AdaptiveLimiter(concurrency, concurrency, concurrency, 'Photo download')
+
+    # Listing, profile and photo requests each get their own share of the pool
+    async with create_async_session(
+        concurrency + profile_limiter.ceiling + photo_limiter.ceiling, timeouts, client_options
+    ) as session:
+        profile_workers = [
+            asyncio.create_task(profile_worker(
+                session, profile_limiter, profile_queue, photo_queue, photo_dest, results, counters, state,
+                executor, parser, cache, retry, profile_dead_letter, rate_limiter, profile_hedger,
+                profile_flights, sink
+            ))
+            for _ in range(profile_limiter.ceiling)
+        ]
+        photo_workers = [
+            asyncio.create_task(photo_worker(
+                session, photo_limiter, photo_queue, manifest, retry, photo_dead_letter, rate_limiter,
+                photo_hedger, store, photo_flights, processor
+            ))
+            for _ in range(photo_limiter.ceiling)
+        ]
+        try:
+            await listing_stage(
+                session, base_url, concurrency, animal_data, profile_queue, parser, cache, retry, page_dead_letter,
+                rate_limiter, sink
+            )
+            for _ in profile_workers:
+                await profile_queue.put(_DONE)
+            await asyncio.gather(*profile_workers)
+            for _ in photo_workers:
+                await photo_queue.put(_DONE)
+            await asyncio.gather(*photo_workers)
+            if processor is not None:
+                await processor.join()
+        finally:
+            for task in profile_workers + photo_workers:
+                task.cancel()
+            if processor is not None:
+                processor.close()
+            manifest.close()
+            for dead_letter in (page_dead_letter, profile_dead_letter, photo_dead_letter):
+                dead_letter.close()
+            if executor is not None:
+                executor.shutdown()
+            if ndjson:
+                results.close()
+
+    if state is not None:
+        if not ndjson:
+            results = state.records(list(animal_data))
+        state.close()
+
+    if not animal_data:
+        logger.warning("No animal data found.")
+        return
+
+    write_csv(list(animal_data.values()), os.path.join(data_dir, 'data.csv'))
+    if ndjson:
+        logger.info(f"Successfully wrote {results.count} profiles to {results.path}")
+    else:
+        write_profiles_json(results, os.path.join(data_dir, 'adoption_profiles.json'))
+    if parquet:
+        # NDJSON profiles are not in memory; they are read back from the file
+        export_data_dir(data_dir, list(animal_data.values()), None if ndjson else results)
+    log_summary(counters)
+    for flights in (profile_flights, photo_flights):
+        flights.log_summary()
+    if processor is not None:
+        processor.log_summary()
+    for hedger in (profile_hedger, photo_hedger):
+        if hedger is not None:
+            hedger.log_summary()
+    if store is not None:
+        store.log_summary()
+    logger.info("Download complete.")
+
+
+def main():
+    """
+    Entry point: parse command-line arguments, configure logging,
+    and run the pipeline.
+    """
+    setup_logging()
+
+    parser = argparse.ArgumentParser(
+        description="Scrape listings, profiles and photos in one streaming pipeline."
+    )
+    parser.add_argument(
+        'base_url',
+        help="The base URL to start scraping from (e.g., https://dogcat.com.ua/adoption?animal=2)"
+    )
+    parser.add_argument(
+        '-d', '--data-dir',
+        default='./data/cats',
+        help="Directory for data.csv, adoption_profiles.json and photos/ (default: ./data/cats)"
+    )
+    parser.add_argument(
+        '-n', '--concurrency',
+        type=int,
+        default=10,
+        help='Number of simultaneous requests per stage (default: 10)'
+    )
+    parser.add_argument(
+        '--state-db',
+        help='SQLite state store for incremental runs (default: disabled)'
+    )
+    parser.add_argument(
+        '--parquet',
+        action='store_true',
+        help='Also write data.parquet and adoption_profiles.parquet (needs pip install pyarrow)'
+    )
+    parser.add_argument(
+        '-p', '--parse-workers',
+        type=int,
+        default=0,
+        help='Number of processes to parse profile pages in (default: 0, parse on the event loop)'
+    )
+    parser.add_argument(
+        '--parser',
+        choices=PARSERS,
+        default=DEFAULT_PARSER,
+        help=f'HTML parser backend (default: {DEFAULT_PARSER})'
+    )
+    parser.add_argument(
+        '--format',
+        choices=('json', 'ndjson'),
+        default='json',
+        help='Profiles output: adoption_profiles.json, or adoption_profiles.ndjson written '
+             'as profiles are extracted (default: json)'
+    )
+    add_limiter_arguments(parser)
+    add_retry_arguments(parser)
+    add_rate_arguments(parser)
+    add_timeout_arguments(parser)
+    add_hedge_arguments(parser)
+    add_client_arguments(parser)
+    add_metrics_arguments(parser)
+    add_cache_arguments(parser)
+    add_store_arguments(parser)
+    add_image_arguments(parser)
+    add_sqlite_arguments(parser)
+    args = parser.parse_args()
+    cache = open_cache(args)
+    sink = sqlite_sink_from_args(args, args.base_url)
+
+    logger.info(f"Starting pipeline for {args.base_url} with concurrency={args.concurrency}")
+    with metrics_from_args(args):
+        try:
+            asyncio.run(run_pipeline(
+                args.base_url, args.data_dir, args.concurrency, args.state_db, args.parse_workers, args.parser,
+                cache, args.format, limiter_from_args(args, 'Profile fetch'),
+                limiter_from_args(args, 'Photo download'), policy_from_args(args), rate_limiter_from_args(args),
+                timeouts_from_args(args), args.hedge, client_options_from_args(args),
+                store_from_args(args), image_options_from_args(args), args.parquet, sink
+            ))
+        finally:
+            if cache is not None:
+                cache.close()
+            if sink is not None:
+                sink.close()
+
+
+if __name__ == '__main__':
+    main()
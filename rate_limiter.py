@@ -0,0 +1,118 @@
+"""
+Per-Host Rate Limiter
+
+A token-bucket limiter on the request rate to each host, used by the listing,
+profile and photo fetchers in addition to their concurrency limits. Each host has
+a bucket that refills at `rate` tokens per second up to `burst` tokens; every
+request (including each retry) takes one token and waits until it is available.
+
+Tokens are reserved at the time of the call, so concurrent callers queue up
+behind each other without a lock on the event loop; the same limiter can be used
+from synchronous code (see acquire()). The pipeline passes one limiter to all
+three stages, so they share each host's budget.
+"""
+
+import asyncio
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """
+    Token bucket refilling at `rate` tokens per second, holding at most `burst` tokens.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def reserve(self):
+        """
+        Take one token, going into debt if none is available.
+
+        Returns:
+            float: Seconds to wait before the token may be used.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter with one bucket per host.
+
+    Args:
+        rate (float): Sustained requests per second allowed to each host.
+        burst (int, optional): Requests a host may get at once after an idle period
+            (default: one second's worth, at least 1).
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, url):
+        """
+        Take a token from the bucket of `url`'s host.
+
+        Returns:
+            float: Seconds to wait before sending the request.
+        """
+        host = urlsplit(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return bucket.reserve()
+
+    def acquire(self, url):
+        """
+        Block until a request to `url` may be sent.
+        """
+        wait = self.reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, url):
+        """
+        Wait without blocking the event loop until a request to `url` may be sent.
+        """
+        wait = self.reserve(url)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def add_rate_arguments(parser):
+    """
+    Add the --rate and --burst options to an argument parser.
+    """
+    parser.add_argument(
+        '--rate',
+        type=float,
+        help='Highest sustained number of requests per second to each host (default: unlimited)'
+    )
+    parser.add_argument(
+        '--burst',
+        type=int,
+        help='Number of requests a host may get at once within --rate (default: one second\'s worth)'
+    )
+
+
+def rate_limiter_from_args(args):
+    """
+    Create the rate limiter configured by the add_rate_arguments() options.
+
+    Returns:
+        RateLimiter or None: The limiter, or None if --rate was not given.
+    """
+    if not args.rate:
+        return None
+    return RateLimiter(args.rate, args.burst)
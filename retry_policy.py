@@ -0,0 +1,186 @@
+"""
+Retry Policy
+
+A retry policy shared by the listing, profile and photo fetchers. Transient
+failures (connection errors, timeouts and 429/5xx responses) are retried up to a
+number of attempts with exponential backoff and full jitter: before retry n the
+fetcher sleeps a random time between 0 and min(max_delay, base_delay * 2 ** n).
+A Retry-After header on the response replaces the backoff (capped at max_delay).
+
+Other failures (e.g. 404 or a parsing error) are raised at once.
+"""
+
+import asyncio
+import email.utils
+import logging
+import random
+import time
+
+import aiohttp
+import requests
+
+logger = logging.getLogger(__name__)
+
+# HTTP status codes worth retrying
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header (delta-seconds or HTTP-date).
+
+    Returns:
+        float or None: Seconds to wait, or None if the value is missing or invalid.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def _status_and_headers(exc):
+    # aiohttp.ClientResponseError carries status/headers, requests.HTTPError a response
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status, exc.headers
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code, exc.response.headers
+    return None, None
+
+
+def is_retryable(exc):
+    """
+    Return True if `exc` is a transient failure worth retrying.
+    """
+    status, _ = _status_and_headers(exc)
+    if status is not None:
+        return status in RETRY_STATUSES
+    return isinstance(exc, (
+        aiohttp.ClientError, asyncio.TimeoutError, requests.ConnectionError, requests.Timeout
+    ))
+
+
+class RetryPolicy:
+    """
+    Retries transient failures with exponential backoff, full jitter and Retry-After.
+
+    Args:
+        attempts (int): Total number of attempts (1 disables retries).
+        base_delay (float): Backoff base in seconds.
+        max_delay (float): Upper bound of any single wait in seconds.
+    """
+
+    def __init__(self, attempts=3, base_delay=0.5, max_delay=30.0):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, retry, exc=None):
+        """
+        Return the number of seconds to wait before retry number `retry` (0-based)
+        after the failure `exc`.
+        """
+        _, headers = _status_and_headers(exc)
+        retry_after = parse_retry_after(headers.get('Retry-After')) if headers is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+
+    def run(self, attempt, description):
+        """
+        Call `attempt()` until it succeeds, retrying transient failures.
+
+        Args:
+            attempt (callable): Performs one attempt and returns its result.
+            description (str): What is being fetched, for log messages (usually the URL).
+
+        Returns:
+            The result of the first successful attempt.
+
+        Raises:
+            Exception: The last failure, once retries are exhausted or it is not transient.
+        """
+        for retry in range(self.attempts):
+            try:
+                return attempt()
+            except Exception as e:
+                wait = self._next_wait(retry, e, description)
+                if wait is None:
+                    raise
+            time.sleep(wait)
+
+    async def run_async(self, attempt, description):
+        """
+        Await `attempt()` until it succeeds, retrying transient failures.
+
+        Args:
+            attempt (callable): Coroutine function that performs one attempt and returns its result.
+            description (str): What is being fetched, for log messages (usually the URL).
+
+        Returns:
+            The result of the first successful attempt.
+
+        Raises:
+            Exception: The last failure, once retries are exhausted or it is not transient.
+        """
+        for retry in range(self.attempts):
+            try:
+                return await attempt()
+            except Exception as e:
+                wait = self._next_wait(retry, e, description)
+                if wait is None:
+                    raise
+            await asyncio.sleep(wait)
+
+    def _next_wait(self, retry, exc, description):
+        # Returns None if the failure should be raised
+        if retry + 1 >= self.attempts or not is_retryable(exc):
+            return None
+        wait = self.delay(retry, exc)
+        logger.warning(
+            f"Attempt {retry + 1}/{self.attempts} for {description} failed ({exc or type(exc).__name__}), "
+            f"retrying in {wait:.1f}s"
+        )
+        return wait
+
+
+# Policy used when a fetcher is given none: a single attempt
+NO_RETRY = RetryPolicy(attempts=1)
+
+
+def add_retry_arguments(parser):
+    """
+    Add the --attempts, --backoff-base and --backoff-max options to an argument parser.
+    """
+    parser.add_argument(
+        '--attempts',
+        type=int,
+        default=3,
+        help='Attempts per request for connection errors, timeouts and 429/5xx responses (default: 3)'
+    )
+    parser.add_argument(
+        '--backoff-base',
+        type=float,
+        default=0.5,
+        help='Base of the exponential backoff between attempts in seconds (default: 0.5)'
+    )
+    parser.add_argument(
+        '--backoff-max',
+        type=float,
+        default=30.0,
+        help='Longest wait between attempts in seconds, also caps Retry-After (default: 30)'
+    )
+
+
+def policy_from_args(args):
+    """
+    Create the retry policy configured by the add_retry_arguments() options.
+    """
+    return RetryPolicy(args.attempts, args.backoff_base, args.backoff_max)
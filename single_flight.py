@@ -0,0 +1,86 @@
+"""
+Single-Flight Request Coalescing
+
+Makes concurrent requests for the same resource share one request: the first
+caller for a key starts the work, and every caller that asks for the same key
+while it is still running awaits the same future instead of sending its own
+request. Results and exceptions are shared alike. Once the work finishes, the
+key is forgotten, so a later call makes a fresh request.
+
+Keys are normalized URLs (see normalize_url()), so spellings of the same URL
+that differ only in host case, a default port, parameter order or a fragment
+are coalesced as well.
+"""
+
+import asyncio
+import logging
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url):
+    """
+    Return `url` in a canonical form for use as a coalescing key.
+
+    The scheme and host are lower-cased, a default port and the fragment are
+    dropped, an empty path becomes '/' and query parameters are sorted.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or '').lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        netloc = f'{netloc}:{parts.port}'
+    if parts.username:
+        userinfo = parts.username + (f':{parts.password}' if parts.password else '')
+        netloc = f'{userinfo}@{netloc}'
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parts.path or '/', query, ''))
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one.
+
+    Args:
+        name (str): Name used in log messages.
+    """
+
+    def __init__(self, name='requests'):
+        self.name = name
+        self.saved = 0
+        self._in_flight = {}
+
+    async def run(self, key, work):
+        """
+        Await `work()`, or the call already in flight for `key`.
+
+        The work runs as its own task, so a caller that is cancelled does not
+        cancel it for the others waiting on it.
+
+        Args:
+            key (str): Identity of the request, e.g. normalize_url(url).
+            work (callable): Coroutine function performing the request.
+
+        Returns:
+            The result of the call for `key`.
+
+        Raises:
+            Exception: Whatever the call for `key` raised.
+        """
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.saved += 1
+        else:
+            future = asyncio.ensure_future(work())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(future)
+
+    def log_summary(self):
+        """
+        Log how many requests were saved by sharing one already in flight.
+        """
+        logger.info(f"{self.name}: {self.saved} duplicate requests shared one already in flight")
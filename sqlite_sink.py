@@ -0,0 +1,260 @@
+"""
+SQLite Output
+
+An indexed SQLite database of the scraped pets, written alongside the CSV and
+JSON outputs, so tools can query the data without re-parsing the JSON:
+
+    SELECT p.* FROM pets p
+    WHERE p.species = 'cat' AND p.sex = 'Дівчинка' AND p.age_months < 12
+      AND EXISTS (SELECT 1 FROM photos ph WHERE ph.pet_id = p.pet_id);
+
+Schema:
+    pets(pet_id PRIMARY KEY, species, link, name, sex, age, age_months,
+         photo_url, history, updated_at)
+    photos(pet_id, position, url)      one row per profile photo
+    videos(pet_id, position, url)      one row per profile video
+    about(pet_id, position, tag)       one row per "About" tag
+
+Listing rows and profile records of the same pet are merged into one `pets` row:
+the listing's `sex` and the profile's `gender` are the same value and share the
+`sex` column, and a field missing from one source keeps the value from the
+other. `age_months` is the age text ("4 місяці", "2 роки") converted to whole
+months, for range queries. `species` is taken from the listing URL (animal=1 for
+dogs, 2 for cats) where it is known.
+
+Rows are buffered and written with executemany() in one transaction per
+--sqlite-batch rows, so the fetchers only append to a list. The database is in
+WAL mode, so it can be queried while a run is writing to it.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import time
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pets (
+    pet_id     TEXT PRIMARY KEY,
+    species    TEXT,
+    link       TEXT,
+    name       TEXT,
+    sex        TEXT,
+    age        TEXT,
+    age_months INTEGER,
+    photo_url  TEXT,
+    history    TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pets_species_sex_age ON pets (species, sex, age_months);
+CREATE INDEX IF NOT EXISTS pets_sex_age ON pets (sex, age_months);
+CREATE INDEX IF NOT EXISTS pets_age ON pets (age_months);
+CREATE TABLE IF NOT EXISTS photos (
+    pet_id   TEXT NOT NULL REFERENCES pets (pet_id),
+    position INTEGER NOT NULL,
+    url      TEXT NOT NULL,
+    PRIMARY KEY (pet_id, position)
+);
+CREATE TABLE IF NOT EXISTS videos (
+    pet_id   TEXT NOT NULL REFERENCES pets (pet_id),
+    position INTEGER NOT NULL,
+    url      TEXT NOT NULL,
+    PRIMARY KEY (pet_id, position)
+);
+CREATE TABLE IF NOT EXISTS about (
+    pet_id   TEXT NOT NULL REFERENCES pets (pet_id),
+    position INTEGER NOT NULL,
+    tag      TEXT NOT NULL,
+    PRIMARY KEY (pet_id, position)
+);
+CREATE INDEX IF NOT EXISTS about_tag ON about (tag);
+"""
+
+# A field that is NULL in the new row keeps its stored value
+_UPSERT_PET = """
+INSERT INTO pets (pet_id, species, link, name, sex, age, age_months, photo_url, history, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (pet_id) DO UPDATE SET
+    species = COALESCE(excluded.species, species),
+    link = COALESCE(excluded.link, link),
+    name = COALESCE(excluded.name, name),
+    sex = COALESCE(excluded.sex, sex),
+    age = COALESCE(excluded.age, age),
+    age_months = COALESCE(excluded.age_months, age_months),
+    photo_url = COALESCE(excluded.photo_url, photo_url),
+    history = COALESCE(excluded.history, history),
+    updated_at = excluded.updated_at
+"""
+
+# Child tables of a profile: (table, value column, profile field)
+_CHILD_TABLES = (('photos', 'url', 'photos'), ('videos', 'url', 'videos'), ('about', 'tag', 'about'))
+
+# Species by the `animal` parameter of the listing URL
+SPECIES = {'1': 'dog', '2': 'cat'}
+
+DEFAULT_BATCH_SIZE = 500
+
+# Months per unit, by the start of the unit word (Ukrainian, then English)
+_AGE_UNITS = (
+    ('міс', 1), ('р', 12), ('тиж', 7 / 30.44), ('д', 1 / 30.44),
+    ('month', 1), ('year', 12), ('week', 7 / 30.44), ('day', 1 / 30.44),
+)
+_AGE_PART = re.compile(r'(\d+(?:[.,]\d+)?)\s*([^\W\d_]+)')
+
+
+def age_in_months(text):
+    """
+    Convert an age like "4 місяці", "2 роки" or "1 рік 6 місяців" to whole months.
+
+    Returns:
+        int or None: The age in months, or None if no age could be read from `text`.
+    """
+    if not text:
+        return None
+    months = None
+    for number, unit in _AGE_PART.findall(text.lower()):
+        for prefix, factor in _AGE_UNITS:
+            if unit.startswith(prefix):
+                months = (months or 0) + float(number.replace(',', '.')) * factor
+                break
+    return int(months) if months is not None else None
+
+
+def species_from_url(url):
+    """
+    Return the species ('dog' or 'cat') of a listing URL, or None if it cannot be told.
+    """
+    animal = parse_qs(urlparse(url).query).get('animal', [None])[0]
+    return SPECIES.get(animal)
+
+
+class SqliteSink:
+    """
+    Buffered writer of listing rows and profile records to the SQLite output.
+
+    Args:
+        path (str): Path of the database, created if needed.
+        species (str, optional): Species of the pets written (see species_from_url()).
+        batch_size (int): Rows buffered before they are written in one transaction.
+    """
+
+    def __init__(self, path, species=None, batch_size=DEFAULT_BATCH_SIZE):
+        self.path = path
+        self.species = species
+        self.batch_size = batch_size
+        self.listings = 0
+        self.profiles = 0
+        self._pets = []
+        self._children = {table: [] for table, _, _ in _CHILD_TABLES}
+        self._replaced = set()  # pet_ids whose child rows are rewritten
+        output_dir = os.path.dirname(str(path))
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+
+    def add_listing(self, entry):
+        """
+        Buffer a listing row (see animal_list_scraper.FIELDS).
+        """
+        self._pets.append((
+            entry['pet_id'], self.species, entry.get('link'), entry.get('name'), entry.get('sex') or None,
+            entry.get('age') or None, age_in_months(entry.get('age')), entry.get('photo_url'), None, time.time()
+        ))
+        self.listings += 1
+        self._maybe_flush()
+
+    def add_listings(self, entries):
+        """
+        Buffer several listing rows.
+        """
+        for entry in entries:
+            self.add_listing(entry)
+
+    def add_profile(self, record):
+        """
+        Buffer a profile record (see build_profile_record()), replacing the pet's photos, videos and tags.
+        """
+        pet_id = record['pet_id']
+        if pet_id in self._replaced:
+            self.flush()  # the earlier child rows must be deleted before these are inserted
+        self._pets.append((
+            pet_id, self.species, record.get('link'), record.get('name'), record.get('gender') or None,
+            record.get('age') or None, age_in_months(record.get('age')), None, record.get('history'), time.time()
+        ))
+        self._replaced.add(pet_id)
+        for table, _, field in _CHILD_TABLES:
+            self._children[table].extend(
+                (pet_id, position, value) for position, value in enumerate(record.get(field) or [])
+            )
+        self.profiles += 1
+        self._maybe_flush()
+
+    def flush(self):
+        """
+        Write the buffered rows in one transaction.
+        """
+        if not self._pets:
+            return
+        with self._conn:
+            self._conn.executemany(_UPSERT_PET, self._pets)
+            for table, column, _ in _CHILD_TABLES:
+                self._conn.executemany(
+                    f'DELETE FROM {table} WHERE pet_id = ?', [(pet_id,) for pet_id in self._replaced]
+                )
+                self._conn.executemany(
+                    f'INSERT OR REPLACE INTO {table} (pet_id, position, {column}) VALUES (?, ?, ?)',
+                    self._children[table]
+                )
+        self._pets = []
+        self._replaced = set()
+        self._children = {table: [] for table in self._children}
+
+    def close(self):
+        """
+        Write the remaining rows and close the database.
+        """
+        self.flush()
+        self._conn.close()
+        logger.info(f"Wrote {self.listings} listing rows and {self.profiles} profiles to {self.path}")
+
+    def _maybe_flush(self):
+        if len(self._pets) >= self.batch_size:
+            self.flush()
+
+
+def add_sqlite_arguments(parser):
+    """
+    Add the --sqlite and --sqlite-batch options to an argument parser.
+    """
+    parser.add_argument(
+        '--sqlite',
+        help='Also write the data to this indexed SQLite database (see sqlite_sink.py)'
+    )
+    parser.add_argument(
+        '--sqlite-batch',
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f'Rows written to the SQLite database per transaction (default: {DEFAULT_BATCH_SIZE})'
+    )
+
+
+def sqlite_sink_from_args(args, base_url=None):
+    """
+    Open the SQLite output configured by the add_sqlite_arguments() options.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments.
+        base_url (str, optional): Listing URL the species is taken from.
+
+    Returns:
+        SqliteSink or None: The sink, or None if --sqlite was not given.
+    """
+    if not args.sqlite:
+        return None
+    return SqliteSink(args.sqlite, species_from_url(base_url) if base_url else None, args.sqlite_batch)
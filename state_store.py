@@ -0,0 +1,148 @@
+"""
+Profile State Store
+
+A small SQLite database that remembers, for every adoption profile URL, when it
+was last fetched, the ETag / Last-Modified validators the server sent, a hash of
+the page content and the profile extracted from it. adoption_profiles_scraper.py
+uses it to send conditional GETs and to skip re-parsing pages that have not
+changed since the previous run.
+
+Schema:
+    profiles(link PRIMARY KEY, pet_id, fetched_at, etag, last_modified,
+             content_hash, record)
+
+`record` holds the extracted profile as JSON, or NULL when the page had no
+profile information.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    link          TEXT PRIMARY KEY,
+    pet_id        TEXT,
+    fetched_at    REAL NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    content_hash  TEXT,
+    record        TEXT
+);
+CREATE INDEX IF NOT EXISTS profiles_pet_id ON profiles (pet_id);
+"""
+
+
+def content_hash(text):
+    """
+    Return the sha256 hex digest of a page's text.
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class StateStore:
+    """
+    Persistent per-profile fetch state keyed by profile URL.
+
+    Writes are committed in batches of `commit_every` and on close().
+    """
+
+    def __init__(self, path, commit_every=100):
+        self.path = path
+        self.commit_every = commit_every
+        self._pending = 0
+        self._conn = sqlite3.connect(path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, link):
+        """
+        Return the stored state for `link` as a dict, or None if it was never fetched.
+        """
+        row = self._conn.execute('SELECT * FROM profiles WHERE link = ?', (link,)).fetchone()
+        return dict(row) if row else None
+
+    def conditional_headers(self, link):
+        """
+        Return the If-None-Match / If-Modified-Since headers for a conditional GET of `link`.
+        """
+        state = self.get(link)
+        headers = {}
+        if state and state['record'] is not None:
+            if state['etag']:
+                headers['If-None-Match'] = state['etag']
+            if state['last_modified']:
+                headers['If-Modified-Since'] = state['last_modified']
+        return headers
+
+    def stored_record(self, link, pet_id):
+        """
+        Return the previously extracted profile for `link` (with the current pet_id),
+        or None if none was stored.
+        """
+        state = self.get(link)
+        if not state or state['record'] is None:
+            return None
+        record = json.loads(state['record'])
+        record['pet_id'] = pet_id
+        return record
+
+    def save(self, link, pet_id, etag, last_modified, page_hash, record):
+        """
+        Store the result of a full fetch of `link`.
+
+        Args:
+            link (str): Profile URL.
+            pet_id (str): Pet ID from the CSV.
+            etag (str or None): ETag response header.
+            last_modified (str or None): Last-Modified response header.
+            page_hash (str): content_hash() of the page.
+            record (dict or None): Extracted profile, or None if the page had none.
+        """
+        self._conn.execute(
+            'INSERT OR REPLACE INTO profiles '
+            '(link, pet_id, fetched_at, etag, last_modified, content_hash, record) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (link, pet_id, time.time(), etag, last_modified, page_hash,
+             json.dumps(record, ensure_ascii=False) if record is not None else None)
+        )
+        self._maybe_commit()
+
+    def touch(self, link, pet_id):
+        """
+        Record that `link` was checked just now and found unchanged.
+        """
+        self._conn.execute(
+            'UPDATE profiles SET fetched_at = ?, pet_id = ? WHERE link = ?',
+            (time.time(), pet_id, link)
+        )
+        self._maybe_commit()
+
+    def records(self, links):
+        """
+        Return the stored profiles for `links`, in the given order, skipping
+        links that have no stored profile.
+        """
+        self._conn.commit()
+        results = []
+        for link in links:
+            state = self.get(link)
+            if state and state['record'] is not None:
+                record = json.loads(state['record'])
+                record['pet_id'] = state['pet_id']
+                results.append(record)
+        return results
+
+    def close(self):
+        """
+        Commit pending writes and close the database.
+        """
+        self._conn.commit()
+        self._conn.close()
+
+    def _maybe_commit(self):
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self._conn.commit()
+            self._pending = 0
@@ -0,0 +1,80 @@
+import asyncio
+
+from adaptive_limiter import AdaptiveLimiter
+
+
+def healthy_window(limiter, latency=0.1):
+    for _ in range(limiter.window):
+        limiter.observe(latency, 200)
+
+
+def test_limit_grows_by_one_per_healthy_window():
+    limiter = AdaptiveLimiter(4, floor=1, ceiling=10, window=5)
+    healthy_window(limiter)
+    assert limiter.limit == 5
+    healthy_window(limiter)
+    assert limiter.limit == 6
+
+
+def test_limit_stops_growing_when_latency_rises():
+    limiter = AdaptiveLimiter(4, floor=1, ceiling=10, window=5)
+    healthy_window(limiter, latency=0.1)
+    healthy_window(limiter, latency=0.5)  # p95 is 5x the best seen
+    assert limiter.limit == 5
+
+
+def test_limit_halves_on_throttling():
+    limiter = AdaptiveLimiter(8, floor=1, ceiling=16, window=100)
+    for _ in range(8):
+        limiter.observe(0.1, 200)
+    limiter.observe(0.1, 429)
+    assert limiter.limit == 4
+
+
+def test_a_burst_of_failures_halves_the_limit_once():
+    limiter = AdaptiveLimiter(8, floor=1, ceiling=16, window=100)
+    for _ in range(8):
+        limiter.observe(0.1, 200)
+    limiter.observe(0.1, 503)
+    # Requests already in flight when the limit dropped fail too; they do not count again
+    for _ in range(3):
+        limiter.observe(0.1, 503)
+    assert limiter.limit == 4
+    limiter.observe(1.0, None, asyncio.TimeoutError())
+    assert limiter.limit == 2
+
+
+def test_limit_stays_within_floor_and_ceiling():
+    limiter = AdaptiveLimiter(4, floor=3, ceiling=5, window=5)
+    for _ in range(3):
+        healthy_window(limiter)
+    assert limiter.limit == 5
+    for _ in range(20):
+        limiter.observe(0.1, 503)
+    assert limiter.limit == 3
+
+
+def test_fixed_limit_does_not_adapt():
+    limiter = AdaptiveLimiter(4, floor=4, ceiling=4)
+    assert not limiter.adaptive
+    for _ in range(50):
+        limiter.observe(0.1, 503)
+    assert limiter.limit == 4
+
+
+def test_at_most_limit_requests_are_in_flight():
+    limiter = AdaptiveLimiter(2, floor=2, ceiling=2)
+    in_flight = []
+
+    async def request():
+        async with limiter.request() as outcome:
+            in_flight.append(limiter.in_flight)
+            await asyncio.sleep(0.01)
+            outcome.status = 200
+
+    async def main():
+        await asyncio.gather(*(request() for _ in range(6)))
+
+    asyncio.run(main())
+    assert max(in_flight) == 2
+    assert limiter.in_flight == 0
@@ -0,0 +1,109 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from adaptive_limiter import AdaptiveLimiter
+from adoption_photos_downloader import download_photo, stream_to_file
+from hedging import Hedger
+
+URL = 'https://dogcat.com.ua/photos/1.jpg'
+
+
+class FakeContent:
+    def __init__(self, chunks, delay):
+        self.chunks = chunks
+        self.delay = delay
+
+    async def iter_chunked(self, size):
+        for chunk in self.chunks:
+            await asyncio.sleep(self.delay)
+            yield chunk
+
+
+class FakeResponse:
+    """
+    Minimal aiohttp response that streams `chunks`, sleeping `delay` seconds before each.
+    """
+
+    def __init__(self, chunks, delay=0, status=200):
+        self.status = status
+        self.headers = {}
+        self.content = FakeContent(chunks, delay)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+
+    def get(self, url, headers=None):
+        return self.responses.pop(0)
+
+
+def make_limiter():
+    return AdaptiveLimiter(2)
+
+
+def test_stream_to_file_writes_only_the_part_file(tmp_path):
+    part_path = tmp_path / '1.jpg.part'
+    size, sha256 = asyncio.run(stream_to_file(FakeResponse([b'abc', b'def']), str(part_path)))
+    assert (size, sha256) == (6, hashlib.sha256(b'abcdef').hexdigest())
+    assert part_path.read_bytes() == b'abcdef'
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['1.jpg.part']
+
+
+def test_cancelled_stream_removes_the_part_file(tmp_path):
+    async def main():
+        task = asyncio.ensure_future(stream_to_file(FakeResponse([b'x' * 1024] * 100, delay=0.01),
+                                                    str(tmp_path / '1.jpg.part')))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_download_photo_renames_the_complete_file_into_place(tmp_path):
+    output_path = tmp_path / '1.jpg'
+    output_path.write_bytes(b'previous photo')
+    session = FakeSession(FakeResponse([b'new ', b'photo']))
+
+    async def main():
+        return await download_photo(session, make_limiter(), URL, str(output_path))
+
+    assert asyncio.run(main()) == 'downloaded'
+    assert output_path.read_bytes() == b'new photo'
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['1.jpg']
+
+
+def test_only_the_winning_hedged_attempt_is_renamed_into_place(tmp_path):
+    output_path = tmp_path / '1.jpg'
+    # The original attempt stalls mid-body, so the hedged duplicate finishes first
+    session = FakeSession(FakeResponse([b'lo', b'ser'], delay=0.5), FakeResponse([b'win', b'ner']))
+
+    async def main():
+        hedger = Hedger(min_samples=5)
+        for _ in range(hedger.min_samples):
+            async def quick(clock):
+                clock.start()
+                await asyncio.sleep(0.01)
+            await hedger.run(quick)
+        outcome = await download_photo(session, make_limiter(), URL, str(output_path), hedger=hedger)
+        return hedger, outcome
+
+    hedger, outcome = asyncio.run(main())
+    assert outcome == 'downloaded'
+    assert (hedger.hedged, hedger.won) == (1, 1)
+    assert output_path.read_bytes() == b'winner'
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['1.jpg']
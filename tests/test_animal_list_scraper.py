@@ -0,0 +1,88 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import requests
+
+import animal_list_scraper
+from animal_list_scraper import build_page_urls, extract_animal_data
+from html_parsers import parse_listing_page
+
+BASE_URL = 'https://dogcat.com.ua/adoption?animal=2'
+CORPUS_DIR = Path(__file__).resolve().parent.parent / 'corpus'
+
+
+def listing_url(page):
+    return f'https://dogcat.com.ua/adoption?animal=2&page={page}'
+
+
+def pagination(*pages):
+    return [listing_url(page) for page in pages]
+
+
+def test_page_urls_with_a_second_numeric_parameter():
+    urls = build_page_urls(pagination(1, 2, 3, 12), listing_url(2), BASE_URL)
+    assert urls == [listing_url(number) for number in range(2, 13)]
+
+
+def test_parameter_named_page_wins_without_base_url():
+    urls = build_page_urls(pagination(1, 2, 3, 4), listing_url(2))
+    assert urls == [listing_url(page) for page in range(2, 5)]
+
+
+def test_page_urls_with_a_single_numeric_parameter():
+    hrefs = [f'/list?p={page}' for page in (2, 3)]
+    assert build_page_urls(hrefs, '/list?p=2', '/list') == ['/list?p=2', '/list?p=3']
+
+
+def test_ambiguous_pagination_is_not_guessed():
+    assert build_page_urls(['/list?a=2&b=3'], '/list?a=2&b=3', '/list') is None
+
+
+def test_without_pagination_links_the_page_count_is_unknown():
+    assert build_page_urls(pagination(), listing_url(2), BASE_URL) is None
+
+
+def test_page_urls_from_the_saved_listing_page():
+    page = parse_listing_page((CORPUS_DIR / 'listing_page.html').read_text(encoding='utf-8'))
+    assert build_page_urls(page.hrefs, page.next_url, BASE_URL) == [listing_url(number) for number in range(2, 13)]
+
+
+def fake_listing(monkeypatch, page_count, failing_page, pagination_links=True):
+    """
+    Serve a listing of `page_count` pages with one card each, where fetching `failing_page` fails.
+    """
+    def fetch_page_text(session, url, *args, **kwargs):
+        if url == listing_url(failing_page):
+            raise requests.ConnectionError('connection reset')
+        return url  # the fake page's HTML is its URL
+
+    def parse_listing_page(html, parser=None):
+        number = 1 if html == BASE_URL else int(html.rsplit('=', 1)[1])
+        card = {
+            'pet_id': str(number), 'link': f'https://dogcat.com.ua/adoption/{number}', 'name': 'Murka',
+            'sex': 'female', 'age': '2', 'photo_url': f'https://dogcat.com.ua/photos/{number}.jpg',
+        }
+        return SimpleNamespace(
+            cards=[card],
+            next_url=listing_url(number + 1) if number < page_count else None,
+            hrefs=pagination(*range(1, page_count + 1)) if pagination_links else [],
+        )
+
+    monkeypatch.setattr(animal_list_scraper, 'fetch_page_text', fetch_page_text)
+    monkeypatch.setattr(animal_list_scraper, 'parse_listing_page', parse_listing_page)
+
+
+def test_sync_crawl_continues_past_a_failed_page(monkeypatch):
+    fake_listing(monkeypatch, page_count=4, failing_page=3)
+    failed = []
+    data = extract_animal_data(BASE_URL, dead_letter=SimpleNamespace(add=failed.append))
+    assert [entry['pet_id'] for entry in data] == ['1', '2', '4']
+    assert failed == [{'url': listing_url(3)}]
+
+
+def test_sync_crawl_stops_at_a_failed_page_when_the_page_count_is_unknown(monkeypatch):
+    fake_listing(monkeypatch, page_count=4, failing_page=3, pagination_links=False)
+    failed = []
+    data = extract_animal_data(BASE_URL, dead_letter=SimpleNamespace(add=failed.append))
+    assert [entry['pet_id'] for entry in data] == ['1', '2']
+    assert failed == [{'url': listing_url(3)}]
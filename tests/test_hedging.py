@@ -0,0 +1,60 @@
+import asyncio
+
+from hedging import Hedger
+from rate_limiter import RateLimiter
+
+URL = 'https://dogcat.com.ua/adoption/1'
+
+
+def make_attempt(network_delay, rate_limiter=None):
+    """
+    Return an attempt that waits on `rate_limiter`, then spends `network_delay` seconds "on the network".
+    """
+    async def attempt(clock=None):
+        if rate_limiter is not None:
+            await rate_limiter.acquire_async(URL)
+        if clock is not None:
+            clock.start()
+        await asyncio.sleep(network_delay)
+        return 'ok'
+    return attempt
+
+
+async def warm_up(hedger, network_delay=0.01):
+    for _ in range(hedger.min_samples):
+        await hedger.run(make_attempt(network_delay))
+
+
+def test_request_waiting_on_rate_limiter_is_not_hedged():
+    async def main():
+        hedger = Hedger(min_samples=5)
+        await warm_up(hedger)
+        rate_limiter = RateLimiter(rate=5, burst=1)
+        rate_limiter.reserve(URL)  # the next request waits 0.2s for a token
+        result = await hedger.run(make_attempt(0.01, rate_limiter))
+        return hedger, result
+
+    hedger, result = asyncio.run(main())
+    assert result == 'ok'
+    assert hedger.hedged == 0
+    assert max(hedger._latencies) < 0.1  # the token wait is not counted as latency
+
+
+def test_slow_request_is_hedged():
+    async def main():
+        hedger = Hedger(min_samples=5)
+        await warm_up(hedger)
+        delays = iter([1.0, 0.01])
+
+        async def attempt(clock):
+            clock.start()
+            await asyncio.sleep(next(delays))
+            return 'ok'
+
+        result = await hedger.run(attempt)
+        return hedger, result
+
+    hedger, result = asyncio.run(main())
+    assert result == 'ok'
+    assert hedger.hedged == 1
+    assert hedger.won == 1
@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import time
+
+import pytest
+
+import page_cache
+from page_cache import DEFAULT_TTL, PageCache
+
+URL = 'https://dogcat.com.ua/adoption?animal=2'
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Freeze the wall clock the cache uses; advance it by adding to clock[0].
+    """
+    now = [time.time()]
+    monkeypatch.setattr(page_cache.time, 'time', lambda: now[0])
+    return now
+
+
+def stored_access_time(cache_dir, url):
+    with sqlite3.connect(os.path.join(cache_dir, 'index.db')) as conn:
+        return conn.execute('SELECT accessed_at FROM pages WHERE url = ?', (url,)).fetchone()[0]
+
+
+def test_fresh_page_is_served(tmp_path):
+    cache = PageCache(tmp_path)
+    cache.put(URL, '<html>cats</html>', etag='"abc"')
+    page = cache.get(URL)
+    assert (page.text, page.etag) == ('<html>cats</html>', '"abc"')
+    assert (cache.hits, cache.misses) == (1, 0)
+    cache.close()
+
+
+def test_pages_expire_after_an_hour_by_default(tmp_path, clock):
+    cache = PageCache(tmp_path)
+    assert cache.ttl == DEFAULT_TTL == 3600
+    cache.put(URL, '<html>cats</html>')
+    clock[0] += DEFAULT_TTL - 1
+    assert cache.get(URL) is not None
+    clock[0] += 2
+    assert cache.get(URL) is None
+    assert cache.misses == 1
+    cache.close()
+
+
+def test_expired_pages_are_deleted_on_close(tmp_path, clock):
+    cache = PageCache(tmp_path, ttl=60)
+    cache.put(URL, '<html>cats</html>')
+    clock[0] += 61
+    cache.close()
+    assert list((tmp_path / 'objects').rglob('*.gz')) == []
+
+
+def test_least_recently_used_pages_are_evicted_over_the_size_limit(tmp_path, clock):
+    cache = PageCache(tmp_path)
+    urls = [f'{URL}&page={page}' for page in (1, 2, 3)]
+    for url in urls:
+        cache.put(url, os.urandom(2000).hex())
+        clock[0] += 1
+    cache.get(urls[0])  # page 2 is now the least recently used
+    sizes = [path.stat().st_size for path in (tmp_path / 'objects').rglob('*.gz')]
+    cache.max_bytes = sum(sizes) - 1
+
+    cache.evict()
+    assert cache.get(urls[1]) is None
+    assert cache.get(urls[0]) is not None
+    assert cache.get(urls[2]) is not None
+    assert len(list((tmp_path / 'objects').rglob('*.gz'))) == 2
+    cache.close()
+
+
+def test_access_times_are_written_in_batches(tmp_path, clock):
+    cache = PageCache(tmp_path)
+    cache.put(URL, '<html>cats</html>')
+    put_at = clock[0]
+    clock[0] += 10
+    cache.get(URL)
+    assert stored_access_time(tmp_path, URL) == put_at
+    cache.flush_access_times()
+    assert stored_access_time(tmp_path, URL) == put_at + 10
+    cache.close()
+
+
+def test_offline_mode_serves_and_keeps_stale_pages(tmp_path, clock):
+    cache = PageCache(tmp_path)
+    cache.put(URL, '<html>cats</html>')
+    cache.close()
+    clock[0] += 10 * DEFAULT_TTL
+
+    offline = PageCache(tmp_path, offline=True)
+    assert offline.get(URL).text == '<html>cats</html>'
+    offline.close()
+
+    online = PageCache(tmp_path)
+    assert online.get(URL) is None
+    online.close()
@@ -0,0 +1,24 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from compare_parsers import GOLDEN_NAME, corpus_pages, extract_page
+from html_parsers import PARSERS, available_parsers
+
+CORPUS_DIR = Path(__file__).resolve().parent.parent / 'corpus'
+GOLDEN = json.loads((CORPUS_DIR / GOLDEN_NAME).read_text(encoding='utf-8'))
+
+
+def test_every_corpus_page_has_golden_output():
+    assert sorted(GOLDEN) == [path.name for path in corpus_pages(CORPUS_DIR)]
+
+
+@pytest.mark.parametrize('page', corpus_pages(CORPUS_DIR), ids=lambda path: path.name)
+@pytest.mark.parametrize('parser', PARSERS)
+def test_parser_matches_golden_output(parser, page):
+    if parser not in available_parsers():
+        pytest.skip(f'{parser} is not installed')
+    # Round-trip through JSON so tuples and lists compare equal
+    result = json.loads(json.dumps(extract_page(page, parser), ensure_ascii=False))
+    assert result == GOLDEN[page.name]
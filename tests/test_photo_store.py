@@ -0,0 +1,56 @@
+import hashlib
+import os
+
+from adoption_photos_downloader import photo_output_paths
+from photo_store import PhotoStore
+
+PHOTO = b'\xff\xd8 a cat photo'
+SHA256 = hashlib.sha256(PHOTO).hexdigest()
+
+
+def write_photo(path, data=PHOTO):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_adopt_moves_new_content_into_the_store(tmp_path):
+    store = PhotoStore(tmp_path / 'store')
+    photo = write_photo(tmp_path / 'photos' / '1' / 'a.jpg')
+    assert store.adopt(photo, SHA256) is False
+    assert store.has(SHA256)
+    assert os.path.samefile(photo, store.blob_path(SHA256))
+    assert store.deduplicated == 0
+
+
+def test_adopt_links_known_content_to_the_stored_blob(tmp_path):
+    store = PhotoStore(tmp_path / 'store')
+    store.adopt(write_photo(tmp_path / 'photos' / '1' / 'a.jpg'), SHA256)
+    duplicate = write_photo(tmp_path / 'photos' / '2' / 'b.jpg')
+    assert store.adopt(duplicate, SHA256) is True
+    assert os.path.samefile(duplicate, store.blob_path(SHA256))
+    assert (store.deduplicated, store.saved_bytes) == (1, len(PHOTO))
+
+
+def test_reuse_places_the_blob_at_a_new_path(tmp_path):
+    store = PhotoStore(tmp_path / 'store')
+    store.adopt(write_photo(tmp_path / 'photos' / '1' / 'a.jpg'), SHA256)
+    target = tmp_path / 'photos' / '3' / 'c.jpg'
+    target.parent.mkdir(parents=True)
+    assert store.reuse(SHA256, str(target)) == len(PHOTO)
+    assert target.read_bytes() == PHOTO
+
+
+def test_photo_output_paths_add_a_url_hash_on_a_basename_collision(tmp_path):
+    first = 'https://dogcat.com.ua/uploads/2024/photo.jpg'
+    second = 'https://dogcat.com.ua/uploads/2025/photo.jpg'
+    paths = photo_output_paths(tmp_path, '7', [first, second, first])
+    url_hash = hashlib.sha256(second.encode('utf-8')).hexdigest()[:8]
+    assert paths == [
+        (first, tmp_path / '7' / 'photo.jpg'),
+        (second, tmp_path / '7' / f'photo-{url_hash}.jpg'),
+    ]
+
+
+def test_photo_output_paths_skip_urls_without_a_filename(tmp_path):
+    assert photo_output_paths(tmp_path, '7', ['https://dogcat.com.ua/']) == []
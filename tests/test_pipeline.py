@@ -0,0 +1,71 @@
+import asyncio
+
+import pipeline
+from adoption_profiles_scraper import new_counters
+
+PET_IDS = ['1', '2', '3', '4', '5']
+
+
+def photo_url(pet_id):
+    return f'https://dogcat.com.ua/photos/{pet_id}.jpg'
+
+
+def photo_url_of(item):
+    pet_id, url, output_path = item
+    return url
+
+
+def run_worker(worker, queue, items, *args):
+    """
+    Feed `items` and the end marker to `queue` and run one worker until it returns.
+    """
+    async def main():
+        for item in items:
+            queue.put_nowait(item)
+        queue.put_nowait(pipeline._DONE)
+        await asyncio.wait_for(worker(*args), timeout=5)
+
+    asyncio.run(main())
+
+
+def test_profile_worker_survives_an_item_that_raises(monkeypatch, tmp_path):
+    async def fake_fetch_profile(session, limiter, pet_id, url, results, counters, *args):
+        if pet_id == '3':
+            raise RuntimeError('unexpected markup')
+        counters['success'] += 1
+        record = {'pet_id': pet_id, 'link': url, 'photos': [photo_url(pet_id)]}
+        results.append(record)
+        return record
+
+    monkeypatch.setattr(pipeline, 'fetch_profile', fake_fetch_profile)
+    entries = [{'pet_id': pet_id, 'link': f'https://dogcat.com.ua/adoption/{pet_id}'} for pet_id in PET_IDS]
+    profile_queue, photo_queue = asyncio.Queue(), asyncio.Queue()
+    results, counters = [], new_counters()
+
+    run_worker(pipeline.profile_worker, profile_queue, entries,
+               None, None, profile_queue, photo_queue, tmp_path, results, counters)
+
+    assert [record['pet_id'] for record in results] == ['1', '2', '4', '5']
+    assert counters['success'] == 4
+    assert counters['fail'] == 1
+    photos = [photo_queue.get_nowait() for _ in range(photo_queue.qsize())]
+    assert [photo_url_of(item) for item in photos] == [photo_url(pet_id) for pet_id in ['1', '2', '4', '5']]
+
+
+
+def test_photo_worker_survives_an_item_that_raises(monkeypatch, tmp_path):
+    downloaded = []
+
+    async def fake_download_photo(session, limiter, url, output_path, *args, **kwargs):
+        if url == photo_url('3'):
+            raise RuntimeError('disk full')
+        downloaded.append(url)
+        return 'downloaded'
+
+    monkeypatch.setattr(pipeline, 'download_photo', fake_download_photo)
+    items = [(pet_id, photo_url(pet_id), str(tmp_path / f'{pet_id}.jpg')) for pet_id in PET_IDS]
+    photo_queue = asyncio.Queue()
+
+    run_worker(pipeline.photo_worker, photo_queue, items, None, None, photo_queue, None)
+
+    assert downloaded == [photo_url(pet_id) for pet_id in ['1', '2', '4', '5']]
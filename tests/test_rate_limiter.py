@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import pytest
+
+import rate_limiter
+from rate_limiter import RateLimiter, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Freeze the monotonic clock the limiter uses; advance it by adding to clock[0].
+    """
+    now = [1000.0]
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_burst_is_free_then_tokens_come_at_the_rate(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Later requests queue behind each other, one token every 1/rate seconds
+    assert [bucket.reserve() for _ in range(3)] == [0.5, 1.0, 1.5]
+
+
+def test_tokens_refill_over_time_up_to_the_burst(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    for _ in range(3):
+        bucket.reserve()
+    clock[0] += 1.0
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.5]
+    clock[0] += 60.0
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.0, 0.5]
+
+
+def test_each_host_has_its_own_bucket(clock):
+    limiter = RateLimiter(rate=1, burst=1)
+    assert limiter.reserve('https://dogcat.com.ua/adoption/1') == 0.0
+    assert limiter.reserve('https://cdn.dogcat.com.ua/photos/1.jpg') == 0.0
+    assert limiter.reserve('https://dogcat.com.ua/adoption/2') == 1.0
+
+
+def test_default_burst_is_one_second_of_requests():
+    assert RateLimiter(rate=5).burst == 5
+    assert RateLimiter(rate=0.5).burst == 1
+
+
+def test_acquire_async_waits_for_a_token():
+    limiter = RateLimiter(rate=20, burst=1)
+
+    async def main():
+        start = time.monotonic()
+        for _ in range(3):
+            await limiter.acquire_async('https://dogcat.com.ua/adoption/1')
+        return time.monotonic() - start
+
+    assert asyncio.run(main()) >= 0.09
@@ -0,0 +1,79 @@
+import email.utils
+import random
+import time
+
+import pytest
+import requests
+
+from retry_policy import RetryPolicy, is_retryable, parse_retry_after
+
+
+def http_error(status, retry_after=None):
+    response = requests.Response()
+    response.status_code = status
+    if retry_after is not None:
+        response.headers['Retry-After'] = retry_after
+    return requests.HTTPError(f'{status} error', response=response)
+
+
+@pytest.mark.parametrize('retry, cap', [(0, 0.5), (1, 1.0), (2, 2.0), (3, 3.0), (10, 3.0)])
+def test_full_jitter_stays_within_the_exponential_cap(retry, cap):
+    random.seed(retry)
+    policy = RetryPolicy(attempts=5, base_delay=0.5, max_delay=3.0)
+    delays = [policy.delay(retry) for _ in range(500)]
+    assert all(0 <= delay <= cap for delay in delays)
+    # Full jitter spreads the waits over the whole range
+    assert min(delays) < cap * 0.1
+    assert max(delays) > cap * 0.9
+
+
+def test_retry_after_seconds():
+    assert parse_retry_after('7') == 7.0
+    assert parse_retry_after(' 120 ') == 120.0
+
+
+def test_retry_after_http_date():
+    value = email.utils.formatdate(time.time() + 30, usegmt=True)
+    assert 28 <= parse_retry_after(value) <= 30
+    assert parse_retry_after(email.utils.formatdate(time.time() - 60, usegmt=True)) == 0.0
+
+
+@pytest.mark.parametrize('value', [None, '', 'soon', '-5'])
+def test_invalid_retry_after_is_ignored(value):
+    assert parse_retry_after(value) is None
+
+
+def test_retry_after_replaces_the_backoff_up_to_max_delay():
+    policy = RetryPolicy(base_delay=0.5, max_delay=30.0)
+    assert policy.delay(0, http_error(503, retry_after='2')) == 2.0
+    assert policy.delay(0, http_error(429, retry_after='120')) == 30.0
+
+
+def test_only_transient_failures_are_retryable():
+    assert is_retryable(http_error(503))
+    assert is_retryable(requests.ConnectionError())
+    assert not is_retryable(http_error(404))
+    assert not is_retryable(ValueError())
+
+
+def test_run_retries_transient_failures():
+    failures = [http_error(503), requests.ConnectionError()]
+
+    def attempt():
+        if failures:
+            raise failures.pop(0)
+        return 'ok'
+
+    assert RetryPolicy(attempts=3, base_delay=0).run(attempt, 'page') == 'ok'
+
+
+def test_run_raises_a_permanent_failure_at_once():
+    calls = []
+
+    def attempt():
+        calls.append(1)
+        raise http_error(404)
+
+    with pytest.raises(requests.HTTPError):
+        RetryPolicy(attempts=3, base_delay=0).run(attempt, 'page')
+    assert len(calls) == 1
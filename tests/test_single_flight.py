@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight, normalize_url
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('HTTPS://DogCat.com.ua:443/adoption?page=2&animal=2#top', 'https://dogcat.com.ua/adoption?animal=2&page=2'),
+    ('http://dogcat.com.ua', 'http://dogcat.com.ua/'),
+    ('http://dogcat.com.ua:8080/photos/1.jpg', 'http://dogcat.com.ua:8080/photos/1.jpg'),
+    (' https://dogcat.com.ua/adoption/1 ', 'https://dogcat.com.ua/adoption/1'),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_concurrent_calls_share_one_request():
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 'photo'
+
+    async def main():
+        return await asyncio.gather(*(flights.run('key', work) for _ in range(5)))
+
+    assert asyncio.run(main()) == ['photo'] * 5
+    assert len(calls) == 1
+    assert flights.saved == 4
+
+
+def test_failure_is_shared_and_the_next_call_runs_again():
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ConnectionError('reset')
+
+    async def main():
+        results = await asyncio.gather(flights.run('key', work), flights.run('key', work), return_exceptions=True)
+        with pytest.raises(ConnectionError):
+            await flights.run('key', work)
+        return results
+
+    results = asyncio.run(main())
+    assert [type(result) for result in results] == [ConnectionError, ConnectionError]
+    assert len(calls) == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_request():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return 'photo'
+
+    async def main():
+        first = asyncio.ensure_future(flights.run('key', work))
+        second = asyncio.ensure_future(flights.run('key', work))
+        await asyncio.sleep(0.005)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == 'photo'
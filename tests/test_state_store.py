@@ -0,0 +1,52 @@
+from state_store import StateStore, content_hash
+
+URL = 'https://dogcat.com.ua/adoption/1'
+HTML = '<html><body><h1>Murka</h1></body></html>'
+RECORD = {'pet_id': '1', 'link': URL, 'name': 'Murka', 'photos': []}
+LAST_MODIFIED = 'Wed, 01 Jan 2025 00:00:00 GMT'
+
+
+def test_conditional_headers_carry_both_validators(tmp_path):
+    store = StateStore(str(tmp_path / 'state.db'))
+    assert store.conditional_headers(URL) == {}
+    store.save(URL, '1', '"abc"', LAST_MODIFIED, content_hash(HTML), RECORD)
+    assert store.conditional_headers(URL) == {'If-None-Match': '"abc"', 'If-Modified-Since': LAST_MODIFIED}
+    store.close()
+
+
+def test_conditional_headers_with_only_last_modified(tmp_path):
+    store = StateStore(str(tmp_path / 'state.db'))
+    store.save(URL, '1', None, LAST_MODIFIED, content_hash(HTML), RECORD)
+    assert store.conditional_headers(URL) == {'If-Modified-Since': LAST_MODIFIED}
+    store.close()
+
+
+def test_page_without_a_profile_is_fetched_in_full(tmp_path):
+    store = StateStore(str(tmp_path / 'state.db'))
+    store.save(URL, '1', '"abc"', LAST_MODIFIED, content_hash(HTML), None)
+    assert store.conditional_headers(URL) == {}
+    assert store.stored_record(URL, '1') is None
+    store.close()
+
+
+def test_unchanged_content_hash_reuses_the_stored_profile(tmp_path):
+    store = StateStore(str(tmp_path / 'state.db'))
+    store.save(URL, '1', '"abc"', None, content_hash(HTML), RECORD)
+    previous = store.get(URL)
+    assert previous['content_hash'] == content_hash(HTML)
+    assert previous['content_hash'] != content_hash(HTML.replace('Murka', 'Barsik'))
+    # The pet_id comes from the current CSV, the rest from the stored profile
+    assert store.stored_record(URL, '7') == {**RECORD, 'pet_id': '7'}
+    store.close()
+
+
+def test_state_persists_across_runs(tmp_path):
+    store = StateStore(str(tmp_path / 'state.db'), commit_every=1000)
+    store.save(URL, '1', '"abc"', LAST_MODIFIED, content_hash(HTML), RECORD)
+    store.close()
+
+    store = StateStore(str(tmp_path / 'state.db'))
+    store.touch(URL, '2')
+    assert store.records([URL, 'https://dogcat.com.ua/adoption/unknown']) == [{**RECORD, 'pet_id': '2'}]
+    assert store.conditional_headers(URL) == {'If-None-Match': '"abc"', 'If-Modified-Since': LAST_MODIFIED}
+    store.close()
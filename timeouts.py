@@ -0,0 +1,68 @@
+"""
+Request Timeouts
+
+Connect, read and total timeouts for every HTTP request, so a stalled connection
+fails (and is retried, see retry_policy.py) instead of holding a concurrency slot
+or blocking the listing crawl forever.
+
+    connect   Seconds to establish a connection (including waiting for a pooled one).
+    read      Seconds to wait for the next chunk of the response.
+    total     Seconds for the whole request including the body (aiohttp only;
+              None for no limit).
+"""
+
+from collections import namedtuple
+
+import aiohttp
+
+Timeouts = namedtuple('Timeouts', ['connect', 'read', 'total'])
+
+DEFAULT_TIMEOUTS = Timeouts(connect=10.0, read=30.0, total=300.0)
+
+
+def client_timeout(timeouts):
+    """
+    Return the aiohttp.ClientTimeout for `timeouts` (default: DEFAULT_TIMEOUTS).
+    """
+    timeouts = timeouts or DEFAULT_TIMEOUTS
+    return aiohttp.ClientTimeout(total=timeouts.total, sock_connect=timeouts.connect, sock_read=timeouts.read)
+
+
+def requests_timeout(timeouts):
+    """
+    Return the (connect, read) timeout tuple for requests (default: DEFAULT_TIMEOUTS).
+    """
+    timeouts = timeouts or DEFAULT_TIMEOUTS
+    return timeouts.connect, timeouts.read
+
+
+def add_timeout_arguments(parser):
+    """
+    Add the --connect-timeout, --read-timeout and --total-timeout options to an argument parser.
+    """
+    parser.add_argument(
+        '--connect-timeout',
+        type=float,
+        default=DEFAULT_TIMEOUTS.connect,
+        help=f'Seconds to establish a connection (default: {DEFAULT_TIMEOUTS.connect:g})'
+    )
+    parser.add_argument(
+        '--read-timeout',
+        type=float,
+        default=DEFAULT_TIMEOUTS.read,
+        help=f'Seconds to wait for the next chunk of a response (default: {DEFAULT_TIMEOUTS.read:g})'
+    )
+    parser.add_argument(
+        '--total-timeout',
+        type=float,
+        default=DEFAULT_TIMEOUTS.total,
+        help=f'Seconds for a whole request including the body; 0 for no limit '
+             f'(default: {DEFAULT_TIMEOUTS.total:g})'
+    )
+
+
+def timeouts_from_args(args):
+    """
+    Return the Timeouts configured by the add_timeout_arguments() options.
+    """
+    return Timeouts(args.connect_timeout, args.read_timeout, args.total_timeout or None)
@@ -0,0 +1,72 @@
+"""
+Bounded Worker Pool
+
+Runs an async handler over a stream of items with a fixed number of worker tasks
+pulling from a bounded asyncio.Queue. Items are produced lazily, so memory and
+scheduler overhead stay proportional to the concurrency, not to the number of
+items (unlike creating one task per item and passing them all to asyncio.gather).
+
+Used by adoption_profiles_scraper.py and adoption_photos_downloader.py.
+"""
+
+import asyncio
+import logging
+
+from metrics import QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+# Marker put on the queue once per worker to tell it that no more items will come
+_DONE = object()
+
+
+async def run_worker_pool(items, handle, concurrency, progress_every=100, label='items'):
+    """
+    Feed `items` through a bounded queue to `concurrency` workers that await `handle(item)`.
+
+    Exceptions raised by `handle` are logged and do not stop the pool. If the
+    pool itself is cancelled (e.g. on Ctrl+C), all workers are cancelled too.
+
+    Args:
+        items (iterable or async iterable): Items to process, consumed lazily.
+        handle (callable): Coroutine function called with each item.
+        concurrency (int): Number of worker tasks.
+        progress_every (int): Log progress after this many processed items (0 to disable).
+        label (str): Name of the items in progress messages and of the queue in metrics.
+
+    Returns:
+        int: Number of items processed.
+    """
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    processed = 0
+
+    async def worker():
+        nonlocal processed
+        while True:
+            item = await queue.get()
+            QUEUE_DEPTH.set(queue.qsize(), queue=label)
+            if item is _DONE:
+                return
+            try:
+                await handle(item)
+            except Exception as e:
+                logger.exception(f"Unhandled error processing {item!r}: {e}")
+            processed += 1
+            if progress_every and processed % progress_every == 0:
+                logger.info(f"Progress: {processed} {label} processed")
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        if hasattr(items, '__aiter__'):
+            async for item in items:
+                await queue.put(item)
+        else:
+            for item in items:
+                await queue.put(item)
+        for _ in workers:
+            await queue.put(_DONE)
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+    return processed